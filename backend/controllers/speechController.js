@@ -1,5 +1,12 @@
 const { supabase } = require('../config/supabase');
-const { runPythonScript, runFullAnalysis } = require('../utils/pythonRunner');
+const {
+    runPythonScript,
+    runFullAnalysis,
+    ingestAudio,
+    enqueueAnalysis,
+    getAnalysisJob,
+    collectAnalysisJob
+} = require('../utils/pythonRunner');
 const fs = require('fs').promises;
 const path = require('path');
 const { v4: uuidv4 } = require('uuid');
@@ -70,6 +77,44 @@ const uploadSpeech = async (req, res) => {
     }
 };
 
+/**
+ * Insert the analysis_results row of a session, or return the row already saved for it
+ */
+const saveAnalysis = async (req, sessionId, analysisResults) => {
+    const { data: inserted, error } = await req.supabase
+        .from('analysis_results')
+        .upsert({
+            id: uuidv4(),
+            session_id: sessionId,
+            fluency_score: analysisResults.fluency.score,
+            pace_score: analysisResults.pace.score,
+            tone_score: analysisResults.tone.score,
+            confidence_score: analysisResults.confidence.score,
+            overall_score: analysisResults.overallScore,
+            filler_words: analysisResults.fluency.fillerWords || [],
+            wpm: analysisResults.pace.wpm || 0,
+            raw_metrics: analysisResults.metrics || null,
+            feedback: {
+                fluency: analysisResults.fluency.feedback,
+                pace: analysisResults.pace.feedback,
+                tone: analysisResults.tone.feedback,
+                confidence: analysisResults.confidence.feedback
+            }
+        }, { onConflict: 'session_id', ignoreDuplicates: true })
+        .select();
+
+    if (error || inserted.length > 0) {
+        return { data: inserted && inserted[0], error };
+    }
+
+    // Another request saved this session's analysis first
+    return await req.supabase
+        .from('analysis_results')
+        .select('*')
+        .eq('session_id', sessionId)
+        .single();
+};
+
 /**
  * Analyze uploaded speech
  */
@@ -114,51 +159,173 @@ const analyzeSpeech = async (req, res) => {
             });
         }
 
-        // Step 1: Speech-to-text
-        const transcriptionResult = await runPythonScript('speech_to_text', [session.audio_file_path]);
+        // ANALYSIS_QUEUE hands the analysis to the job queue workers; the client polls GET /api/speech/jobs/:id
+        if (process.env.ANALYSIS_QUEUE === 'true') {
+            return await queueAnalysis(res, session);
+        }
+
+        // Decode the upload once into a canonical PCM file shared by every script
+        const audioPath = await ingestAudio(session.audio_file_path);
+
+        let transcription;
+        let analysisResults;
+        try {
+            // Step 1: Speech-to-text
+            // TRANSCRIPTION_SEGMENTED splits long recordings at pauses and transcribes the pieces concurrently
+            const transcriptionArgs = [audioPath];
+            if (process.env.TRANSCRIPTION_SEGMENTED === 'true') {
+                transcriptionArgs.push('--segmented');
+            }
+            const transcriptionResult = await runPythonScript('speech_to_text', transcriptionArgs);
+
+            if (!transcriptionResult.success) {
+                return res.status(500).json({
+                    success: false,
+                    error: 'Speech-to-text conversion failed',
+                    details: transcriptionResult.error
+                });
+            }
+
+            transcription = transcriptionResult.transcription;
+
+            // Update session with transcription
+            await req.supabase
+                .from('speech_sessions')
+                .update({ transcription })
+                .eq('id', sessionId);
 
-        if (!transcriptionResult.success) {
+            // Step 2: Run full analysis
+            analysisResults = await runFullAnalysis(audioPath, transcription);
+        } finally {
+            if (audioPath !== session.audio_file_path) {
+                await fs.unlink(audioPath).catch(console.error);
+            }
+        }
+
+        // Step 3: Save analysis results
+        const { data: analysis, error: analysisError } = await saveAnalysis(req, sessionId, analysisResults);
+
+        if (analysisError) {
+            console.error('Failed to save analysis:', analysisError);
             return res.status(500).json({
                 success: false,
-                error: 'Speech-to-text conversion failed',
-                details: transcriptionResult.error
+                error: 'Failed to save analysis results'
             });
         }
 
-        const transcription = transcriptionResult.transcription;
+        res.json({
+            success: true,
+            message: 'Analysis completed successfully',
+            analysis: {
+                ...analysis,
+                transcription,
+                context: session.context
+            }
+        });
+    } catch (error) {
+        console.error('Analysis error:', error);
+        res.status(500).json({
+            success: false,
+            error: 'Analysis failed',
+            details: error.message
+        });
+    }
+};
+
+/**
+ * Queue the analysis of a session and answer without waiting for it
+ */
+const queueAnalysis = async (res, session) => {
+    const queued = await enqueueAnalysis(session.id, session.audio_file_path);
 
-        // Update session with transcription
-        await req.supabase
+    if (!queued.job) {
+        // Backpressure: the queue is full, so the client retries later
+        res.set('Retry-After', String(queued.retryAfter));
+        return res.status(503).json({
+            success: false,
+            error: 'Analysis queue is full, please try again later',
+            retryAfter: queued.retryAfter
+        });
+    }
+
+    res.status(202).json({
+        success: true,
+        message: 'Analysis queued',
+        job: {
+            id: queued.job.id,
+            status: queued.job.status,
+            ahead: queued.job.ahead
+        }
+    });
+};
+
+/**
+ * Get the status of a queued analysis, saving its results once it is done
+ */
+const getAnalysisStatus = async (req, res) => {
+    try {
+        const { id } = req.params;
+
+        const { data: session, error: sessionError } = await req.supabase
             .from('speech_sessions')
-            .update({ transcription })
-            .eq('id', sessionId);
+            .select('*')
+            .eq('id', id)
+            .eq('user_id', req.user.id)
+            .single();
 
-        // Step 2: Run full analysis
-        const analysisResults = await runFullAnalysis(session.audio_file_path, transcription);
+        if (sessionError || !session) {
+            return res.status(404).json({
+                success: false,
+                error: 'Speech session not found'
+            });
+        }
 
-        // Step 3: Save analysis results
-        const { data: analysis, error: analysisError } = await req.supabase
+        const { data: existingAnalysis } = await req.supabase
             .from('analysis_results')
-            .insert({
-                id: uuidv4(),
-                session_id: sessionId,
-                fluency_score: analysisResults.fluency.score,
-                pace_score: analysisResults.pace.score,
-                tone_score: analysisResults.tone.score,
-                confidence_score: analysisResults.confidence.score,
-                overall_score: analysisResults.overallScore,
-                filler_words: analysisResults.fluency.fillerWords || [],
-                wpm: analysisResults.pace.wpm || 0,
-                feedback: {
-                    fluency: analysisResults.fluency.feedback,
-                    pace: analysisResults.pace.feedback,
-                    tone: analysisResults.tone.feedback,
-                    confidence: analysisResults.confidence.feedback
-                }
-            })
-            .select()
+            .select('*')
+            .eq('session_id', id)
             .single();
 
+        if (existingAnalysis) {
+            return res.json({
+                success: true,
+                job: { id, status: 'done' },
+                analysis: existingAnalysis
+            });
+        }
+
+        const job = await getAnalysisJob(id);
+
+        if (!job) {
+            return res.status(404).json({
+                success: false,
+                error: 'No analysis queued for this session'
+            });
+        }
+
+        if (job.status !== 'done') {
+            return res.json({
+                success: true,
+                job: {
+                    id: job.id,
+                    status: job.status,
+                    ahead: job.ahead,
+                    attempts: job.attempts,
+                    error: job.error
+                }
+            });
+        }
+
+        // First poll after the job finished: save its results like a synchronous analysis
+        const { transcription, analysis: analysisResults } = job.result;
+
+        await req.supabase
+            .from('speech_sessions')
+            .update({ transcription })
+            .eq('id', id);
+
+        const { data: analysis, error: analysisError } = await saveAnalysis(req, id, analysisResults);
+
         if (analysisError) {
             console.error('Failed to save analysis:', analysisError);
             return res.status(500).json({
@@ -167,9 +334,14 @@ const analyzeSpeech = async (req, res) => {
             });
         }
 
+        // The results are in the database now; let the queue forget the job
+        await collectAnalysisJob(id).catch((error) => {
+            console.error('Failed to collect analysis job:', error.message);
+        });
+
         res.json({
             success: true,
-            message: 'Analysis completed successfully',
+            job: { id, status: 'done' },
             analysis: {
                 ...analysis,
                 transcription,
@@ -177,10 +349,10 @@ const analyzeSpeech = async (req, res) => {
             }
         });
     } catch (error) {
-        console.error('Analysis error:', error);
+        console.error('Analysis status error:', error);
         res.status(500).json({
             success: false,
-            error: 'Analysis failed',
+            error: 'Failed to fetch analysis status',
             details: error.message
         });
     }
@@ -341,6 +513,7 @@ const deleteSpeech = async (req, res) => {
 module.exports = {
     uploadSpeech,
     analyzeSpeech,
+    getAnalysisStatus,
     getSpeechHistory,
     getAnalysisById,
     deleteSpeech
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Combined Analysis
+Decodes the audio once and runs fluency, pace, tone and confidence analysis
+on the same buffer, returning the combined result used by the backend
+"""
+
+import sys
+import json
+import math
+from pathlib import Path
+
+from fluency_analysis import analyze_fluency
+from pace_analysis import analyze_pace
+from tone_analysis import analyze_tone
+from confidence_analysis import analyze_confidence
+from profiling import profiled, stage
+from quality import DEFAULT_QUALITY, QUALITY_PROFILES, load_audio, parse_quality
+from rescoring import build_metrics
+from result_cache import cached
+
+# Score used when an individual analyzer fails
+DEFAULT_SCORE = 50
+
+# Weight of each analyzer in the overall score
+SCORE_WEIGHTS = {
+    "fluency": 0.25,
+    "pace": 0.25,
+    "tone": 0.25,
+    "confidence": 0.25
+}
+
+@cached("analyze_all")
+@profiled("analyze_all")
+def analyze_all(audio_file_path, transcription, stream=False, parallel=False,
+                quality=DEFAULT_QUALITY, vad=False, sample=False):
+    """
+    Run every analyzer on a single decode of the audio file
+
+    Args:
+        audio_file_path: Path to audio file
+        transcription: Text transcription
+        stream: Make one bounded-memory streaming pass for all analyzers
+            instead of loading the whole file
+        parallel: Run pace, tone and confidence in worker processes sharing
+            the decoded audio, as far as the memory budget allows (see
+            shared_executor; ignored in stream mode)
+        quality: Quality profile for the acoustic analyzers (see quality;
+            ignored in stream mode)
+        vad: Limit pitch tracking and the spectral centroid to voiced
+            frames (see vad; ignored in stream mode)
+        sample: Estimate recordings of SAMPLE_MIN_SECONDS or more from one
+            sample of windows shared by the acoustic analyzers, which then
+            report confidence intervals (see sampling); shorter recordings
+            take the stream or full-load path
+
+    Returns:
+        dict: {success, fluency, pace, tone, confidence, overallScore,
+        metrics} where metrics is the raw-metrics record (see rescoring)
+    """
+    try:
+        if quality not in QUALITY_PROFILES:
+            return {
+                "success": False,
+                "error": f"Unknown quality profile: {quality}"
+            }
+
+        results = {
+            "fluency": with_fallback("fluency_analysis", analyze_fluency(transcription))
+        }
+
+        # Decode once and share the buffer between the acoustic analyzers
+        audio_error = None
+        y, sr, features = None, None, None
+        if not Path(audio_file_path).exists():
+            audio_error = f"Audio file not found: {audio_file_path}"
+        else:
+            try:
+                with stage("load"):
+                    if sample:
+                        from sampling import sample_features
+                        features = sample_features(
+                            audio_file_path, pitch=True, centroid=True, zcr=True, silence=True
+                        )
+                    if features is None and stream:
+                        from audio_stream import stream_features
+                        features = stream_features(
+                            audio_file_path, pitch=True, centroid=True, zcr=True, silence=True
+                        )
+                    elif features is None:
+                        y, sr = load_audio(audio_file_path, quality)
+            except Exception as e:
+                audio_error = f"Failed to load audio: {str(e)}"
+
+        if audio_error:
+            failed = {"success": False, "error": audio_error}
+            results["pace"] = with_fallback("pace_analysis", failed)
+            results["tone"] = with_fallback("tone_analysis", failed)
+            results["confidence"] = with_fallback("confidence_analysis", failed)
+        elif features is not None:
+            results["pace"] = with_fallback(
+                "pace_analysis",
+                analyze_pace(audio_file_path, transcription, stream=True, features=features)
+            )
+            results["tone"] = with_fallback(
+                "tone_analysis",
+                analyze_tone(audio_file_path, stream=True, features=features)
+            )
+            results["confidence"] = with_fallback(
+                "confidence_analysis",
+                analyze_confidence(audio_file_path, transcription, stream=True, features=features)
+            )
+        else:
+            from shared_executor import run_analyzers
+            acoustic = run_analyzers(
+                audio_file_path, transcription, y, sr,
+                options={"quality": quality}, parallel=parallel,
+                analyzer_options={"tone": {"vad": vad}, "confidence": {"vad": vad}}
+            )
+            for name, result in acoustic.items():
+                results[name] = with_fallback(f"{name}_analysis", result)
+
+        return combine_results(results)
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Combined analysis error: {str(e)}"
+        }
+
+def combine_results(results):
+    """Combined result of the four analyzer results (failed ones already replaced)"""
+    return {
+        "success": True,
+        **results,
+        "overallScore": calculate_overall_score(results),
+        "metrics": build_metrics(results)
+    }
+
+def with_fallback(name, result):
+    """Replace a failed analyzer result with the default score"""
+    if result.get("success"):
+        return result
+    return {
+        "success": True,
+        "score": DEFAULT_SCORE,
+        "feedback": f"Analysis could not be completed. {name}: {result.get('error')}"
+    }
+
+def calculate_overall_score(results):
+    """Weighted average of the analyzer scores (rounded like Math.round)"""
+    total = sum(results[name]["score"] * weight for name, weight in SCORE_WEIGHTS.items())
+    return int(math.floor(total + 0.5))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(json.dumps({
+            "success": False,
+            "error": "Audio file path and transcription required"
+        }))
+        sys.exit(1)
+
+    audio_path = sys.argv[1]
+    transcription = sys.argv[2]
+    stream = "--stream" in sys.argv[3:]
+    parallel = "--parallel" in sys.argv[3:]
+    vad = "--vad" in sys.argv[3:]
+    sample = "--sample" in sys.argv[3:]
+    quality = parse_quality(sys.argv[3:])
+    result = analyze_all(
+        audio_path, transcription, stream=stream, parallel=parallel, quality=quality, vad=vad, sample=sample
+    )
+    print(json.dumps(result))
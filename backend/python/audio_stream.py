@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Streaming Audio Features
+Reads audio in fixed-size blocks and accumulates the acoustic statistics
+used by the analyzers, so peak memory does not depend on recording length
+"""
+
+import numpy as np
+import librosa
+import soundfile as sf
+
+import startup
+import pcm_store
+
+# Frame settings shared by rms, spectral_centroid, zero_crossing_rate,
+# piptrack and effects.split (the librosa defaults the analyzers use)
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+# Frames processed per block (about 12 s of audio at 44.1 kHz)
+BLOCK_FRAMES = 1024
+
+# Resolution and range of the silence threshold histogram (dB relative to
+# full scale); amplitude_to_db never goes below -100 dB
+SILENCE_DB_MIN = -100.0
+SILENCE_DB_MAX = 40.0
+SILENCE_DB_STEP = 0.01
+
+class RunningStats:
+    """Online mean/variance (Welford/Chan) with min and max"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        """Merge a batch of values into the running statistics"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        n = len(values)
+        if n == 0:
+            return
+
+        batch_mean = values.mean()
+        batch_m2 = np.sum((values - batch_mean) ** 2)
+        total = self.count + n
+        delta = batch_mean - self.mean
+
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    @classmethod
+    def combined(cls, parts):
+        """Statistics of the values of several RunningStats together (Chan's formula)"""
+        parts = [part for part in parts if part.count > 0]
+        stats = cls()
+        if not parts:
+            return stats
+
+        counts = np.array([part.count for part in parts], dtype=np.float64)
+        means = np.array([part.mean for part in parts])
+        stats.count = int(counts.sum())
+        stats.mean = float(np.sum(counts * means) / stats.count)
+        stats.m2 = float(sum(part.m2 for part in parts) + np.sum(counts * (means - stats.mean) ** 2))
+        stats.min = min(part.min for part in parts)
+        stats.max = max(part.max for part in parts)
+        return stats
+
+    @property
+    def std(self):
+        """Population standard deviation (same as np.std)"""
+        return float(np.sqrt(self.m2 / self.count)) if self.count > 0 else 0.0
+
+class SilenceTracker:
+    """
+    Count the non-silent intervals effects.split would find, in one pass
+
+    effects.split marks a frame non-silent when its RMS is within top_db of
+    the loudest frame, which is only known at the end. Every rising edge
+    (previous frame quieter than the current one) starts an interval for any
+    threshold between the two levels, so those edges are accumulated in a
+    fixed-size histogram over thresholds and read out once the maximum is
+    known.
+    """
+
+    def __init__(self):
+        n_bins = int(round((SILENCE_DB_MAX - SILENCE_DB_MIN) / SILENCE_DB_STEP)) + 2
+        self.edges = np.zeros(n_bins, dtype=np.int64)
+        self.previous_db = -np.inf
+        self.max_db = -np.inf
+
+    def _bins(self, db):
+        clipped = np.clip(db, SILENCE_DB_MIN, SILENCE_DB_MAX)
+        return np.ceil((clipped - SILENCE_DB_MIN) / SILENCE_DB_STEP).astype(np.int64)
+
+    def update(self, rms):
+        """Add a block of consecutive frame RMS values"""
+        if len(rms) == 0:
+            return
+
+        db = librosa.amplitude_to_db(rms, ref=1.0, top_db=None).astype(np.float64)
+        previous = np.concatenate(([self.previous_db], db[:-1]))
+        rising = previous < db
+
+        # An edge (a -> b) counts for thresholds t with a <= t < b
+        low = np.where(np.isfinite(previous[rising]), self._bins(previous[rising]), 0)
+        np.add.at(self.edges, low, 1)
+        np.add.at(self.edges, self._bins(db[rising]), -1)
+
+        self.previous_db = db[-1]
+        self.max_db = max(self.max_db, db.max())
+
+    def count_intervals(self, top_db):
+        """Number of non-silent intervals for the given top_db"""
+        if not np.isfinite(self.max_db):
+            return 0
+        threshold_bin = self._bins(np.array([self.max_db - top_db]))[0]
+        return int(np.cumsum(self.edges)[threshold_bin])
+
+def open_audio_blocks(audio_file_path, block_samples):
+    """
+    Open an audio file for block-wise mono float32 reads at the native rate
+
+    Canonical PCM files (see pcm_store) are read as slices of a memory map.
+    Otherwise uses soundfile when libsndfile can read the format and falls
+    back to audioread (ffmpeg, etc.) for compressed containers such as
+    MP4/WebM.
+
+    Returns:
+        tuple: (sample_rate, iterator of 1-D float32 chunks)
+    """
+    if pcm_store.is_pcm(audio_file_path):
+        return _open_pcm_blocks(audio_file_path, block_samples)
+
+    try:
+        sound_file = sf.SoundFile(audio_file_path)
+    except Exception:
+        return _open_audioread_blocks(audio_file_path)
+
+    def chunks():
+        with sound_file:
+            while True:
+                data = sound_file.read(block_samples, dtype="float32", always_2d=True)
+                if len(data) == 0:
+                    break
+                yield data.mean(axis=1, dtype=np.float32)
+
+    return sound_file.samplerate, chunks()
+
+def _open_pcm_blocks(audio_file_path, block_samples):
+    samples, sample_rate = pcm_store.open_pcm(audio_file_path)
+
+    def chunks():
+        for start in range(0, len(samples), block_samples):
+            yield pcm_store.to_float32(samples[start:start + block_samples])
+
+    return sample_rate, chunks()
+
+def _open_audioread_blocks(audio_file_path):
+    import audioread
+
+    reader = audioread.audio_open(audio_file_path)
+    channels = reader.channels
+
+    def chunks():
+        with reader:
+            for buffer in reader:
+                data = librosa.util.buf_to_float(buffer, n_bytes=2, dtype=np.float32)
+                yield data.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+    return reader.samplerate, chunks()
+
+def iter_frame_blocks(chunks, block_frames=BLOCK_FRAMES):
+    """
+    Regroup decoded chunks into blocks of whole, overlapping frames
+
+    The signal is padded with FRAME_LENGTH // 2 zeros at both ends, so
+    framing each block with center=False yields the same frames as a
+    centered librosa analysis of the whole file.
+    """
+    block_length = (block_frames - 1) * HOP_LENGTH + FRAME_LENGTH
+    advance = block_frames * HOP_LENGTH
+    padding = np.zeros(FRAME_LENGTH // 2, dtype=np.float32)
+
+    buffer = padding
+    for chunk in chunks:
+        buffer = np.concatenate((buffer, chunk))
+        while len(buffer) >= block_length:
+            yield buffer[:block_length]
+            buffer = buffer[advance:]
+
+    buffer = np.concatenate((buffer, padding))
+    if len(buffer) >= FRAME_LENGTH:
+        n_frames = 1 + (len(buffer) - FRAME_LENGTH) // HOP_LENGTH
+        yield buffer[:(n_frames - 1) * HOP_LENGTH + FRAME_LENGTH]
+
+def update_features(block, sr, stats, silence_tracker=None):
+    """
+    Add the frames of one block (framed with center=False) to running statistics
+
+    Args:
+        block: Samples holding whole frames (see iter_frame_blocks)
+        sr: Sample rate
+        stats: Dict of RunningStats; "rms" is always updated, "pitch",
+            "centroid" and "zcr" when present
+        silence_tracker: Optional SilenceTracker fed with the frame RMS
+    """
+    frame_options = {"hop_length": HOP_LENGTH, "center": False}
+
+    rms = librosa.feature.rms(y=block, frame_length=FRAME_LENGTH, **frame_options)[0]
+    stats["rms"].update(rms)
+    if silence_tracker is not None:
+        silence_tracker.update(rms)
+
+    if "centroid" in stats:
+        stats["centroid"].update(librosa.feature.spectral_centroid(
+            y=block, sr=sr, n_fft=FRAME_LENGTH, **frame_options
+        )[0])
+
+    if "zcr" in stats:
+        stats["zcr"].update(librosa.feature.zero_crossing_rate(
+            block, frame_length=FRAME_LENGTH, **frame_options
+        )[0])
+
+    if "pitch" in stats:
+        pitches, magnitudes = librosa.piptrack(
+            y=block, sr=sr, n_fft=FRAME_LENGTH, **frame_options
+        )
+        strongest = magnitudes.argmax(axis=0)
+        frame_pitch = pitches[strongest, np.arange(pitches.shape[1])]
+        stats["pitch"].update(frame_pitch[frame_pitch > 0])
+
+def stream_features(audio_file_path, pitch=False, centroid=False, zcr=False,
+                    silence=False, block_frames=BLOCK_FRAMES):
+    """
+    Compute frame statistics of an audio file block by block
+
+    Args:
+        audio_file_path: Path to audio file
+        pitch: Track the strongest piptrack peak per frame
+        centroid: Track the spectral centroid
+        zcr: Track the zero-crossing rate
+        silence: Track non-silent intervals (see SilenceTracker)
+        block_frames: Frames per processing block
+
+    Returns:
+        dict: sr, duration, and RunningStats for rms (always) and each
+        requested feature; "silence" holds the SilenceTracker
+    """
+    block_samples = (block_frames - 1) * HOP_LENGTH + FRAME_LENGTH
+    sr, chunks = open_audio_blocks(audio_file_path, block_samples)
+
+    stats = {"rms": RunningStats()}
+    if pitch:
+        stats["pitch"] = RunningStats()
+    if centroid:
+        stats["centroid"] = RunningStats()
+    if zcr:
+        stats["zcr"] = RunningStats()
+    silence_tracker = SilenceTracker() if silence else None
+
+    total_samples = 0
+
+    def counted(chunks):
+        nonlocal total_samples
+        for chunk in chunks:
+            total_samples += len(chunk)
+            yield chunk
+
+    for block in iter_frame_blocks(counted(chunks), block_frames):
+        update_features(block, sr, stats, silence_tracker)
+
+    return {
+        "sr": sr,
+        "duration": total_samples / sr,
+        "silence": silence_tracker,
+        **stats
+    }
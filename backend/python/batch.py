@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Batch Analysis
+Runs the full analysis over many recordings in a process pool, for backfills
+after a scoring change
+
+Input is a directory (searched recursively for audio files; a same-named
+.txt file next to a recording is used as its transcript) or a JSONL manifest
+of {"path": ..., "transcription": ...} lines. Recordings without a transcript
+are transcribed first. One JSON line per recording is appended to --output
+as soon as it finishes, and the output file doubles as the checkpoint: a
+rerun skips every recording it already holds.
+
+Jobs run on as many processes as there are CPUs, and as many at once as the
+memory budget allows (estimated from each recording's duration and checked
+against the measured memory, see shared_executor). Jobs lost when a worker
+process dies are run again on a fresh pool.
+
+    python batch.py <directory|manifest.jsonl> --output results.jsonl
+                    [--workers N] [--quality fast] [--stream] [--vad] [--retry-failed]
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from quality import DEFAULT_QUALITY, QUALITY_PROFILES, get_duration, target_sample_rate
+from shared_executor import (
+    ANALYZER_BYTES_PER_SAMPLE, MEMORY_BUDGET_BYTES, MEMORY_POLL_SECONDS, PROCESS_OVERHEAD_BYTES,
+    BudgetMonitor, admits, available_cpus
+)
+
+AUDIO_EXTENSIONS = {".wav", ".wave", ".flac", ".mp3", ".ogg", ".m4a", ".mp4", ".webm", ".aac", ".pcm"}
+
+# Working memory of a streaming job beyond the process overhead (one block
+# of frames and its spectra; independent of the recording length)
+STREAM_JOB_BYTES = 64 * 1024 * 1024
+
+# Times a recording is run again after a worker process died while it ran
+# (the pool cannot tell which of its jobs killed the worker)
+BROKEN_POOL_RETRIES = 2
+
+# Print a progress line after this many finished recordings
+PROGRESS_EVERY = 10
+
+def find_recordings(source):
+    """
+    Recordings to analyze from a directory or a JSONL manifest
+
+    Returns:
+        list: dicts with path and transcription (None when not given)
+    """
+    source = Path(source)
+    if source.is_dir():
+        entries = []
+        for path in sorted(source.rglob("*")):
+            if path.suffix.lower() not in AUDIO_EXTENSIONS or not path.is_file():
+                continue
+            transcript_path = path.with_suffix(".txt")
+            transcription = transcript_path.read_text(encoding="utf-8").strip() if transcript_path.exists() else None
+            entries.append({"path": str(path), "transcription": transcription or None})
+        return entries
+
+    entries = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            path = Path(entry["path"])
+            if not path.is_absolute():
+                # Relative paths are relative to the manifest
+                path = source.parent / path
+            entries.append({"path": str(path), "transcription": entry.get("transcription") or None})
+    return entries
+
+def load_checkpoint(output_path, retry_failed=False):
+    """
+    Paths already in the output file
+
+    A line cut short by an interrupted run is removed so the file stays
+    valid JSONL. Failed recordings are not counted when retry_failed is set.
+    """
+    done = set()
+    if not output_path.exists():
+        return done
+
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) < len(data):
+            f.truncate(len(complete))
+
+    for line in complete.decode("utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get("success") or not retry_failed:
+            done.add(record["path"])
+    return done
+
+def estimate_file_bytes(audio_file_path, quality=DEFAULT_QUALITY, stream=False):
+    """
+    Estimated peak memory of analyzing one recording in a worker process
+
+    Returns (duration, bytes); unreadable headers count as zero duration.
+    """
+    from quality import get_samplerate
+
+    try:
+        duration = get_duration(audio_file_path)
+        sample_rate = target_sample_rate(get_samplerate(audio_file_path), "precise" if stream else quality)
+    except Exception:
+        return 0.0, PROCESS_OVERHEAD_BYTES
+    if stream:
+        return duration, PROCESS_OVERHEAD_BYTES + STREAM_JOB_BYTES
+
+    # The decoded float32 buffer plus the largest analyzer (they run one
+    # after another inside the job)
+    samples = int(duration * sample_rate)
+    return duration, PROCESS_OVERHEAD_BYTES + samples * (4 + max(ANALYZER_BYTES_PER_SAMPLE.values()))
+
+def analyze_recording(entry, quality=DEFAULT_QUALITY, stream=False, vad=False):
+    """
+    Worker entry point: transcribe if needed, then run analyze_all
+
+    Returns:
+        dict: Output record {path, success, transcription, analysis | error, elapsed}
+    """
+    from analyze_all import analyze_all
+    from speech_to_text import speech_to_text
+
+    start = time.perf_counter()
+    record = {"path": entry["path"]}
+    try:
+        transcription = entry.get("transcription")
+        if not transcription:
+            transcribed = speech_to_text(entry["path"])
+            if not transcribed["success"]:
+                record.update(success=False, error=transcribed["error"])
+                return record
+            transcription = transcribed["transcription"]
+
+        analysis = analyze_all(entry["path"], transcription, stream=stream, quality=quality, vad=vad)
+        record.update(success=analysis["success"], transcription=transcription)
+        if analysis["success"]:
+            record["analysis"] = analysis
+        else:
+            record["error"] = analysis["error"]
+    except Exception as e:
+        record.update(success=False, error=f"Batch analysis error: {str(e)}")
+    finally:
+        record["elapsed"] = round(time.perf_counter() - start, 3)
+    return record
+
+class Progress:
+    """Throughput counters: files/sec and audio-hours per wall-clock hour"""
+
+    def __init__(self, total):
+        self.total = total
+        self.finished = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.start = time.perf_counter()
+
+    def add(self, record, duration):
+        self.finished += 1
+        self.failed += 0 if record["success"] else 1
+        self.audio_seconds += duration
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return {
+            "finished": self.finished,
+            "failed": self.failed,
+            "remaining": self.total - self.finished,
+            "elapsedSeconds": round(elapsed, 1),
+            "filesPerSecond": round(self.finished / elapsed, 3),
+            "audioHoursPerHour": round(self.audio_seconds / elapsed, 2)
+        }
+
+    def report(self, final=False):
+        s = self.summary()
+        print(
+            f"{'done' if final else 'progress'}: {s['finished']}/{self.total} files "
+            f"({s['failed']} failed) in {s['elapsedSeconds']}s, "
+            f"{s['filesPerSecond']} files/s, {s['audioHoursPerHour']} audio-h/h",
+            file=sys.stderr
+        )
+
+def run_batch(entries, output, quality=DEFAULT_QUALITY, stream=False, workers=None,
+              memory_budget=MEMORY_BUDGET_BYTES, vad=False):
+    """
+    Analyze recordings on a process pool, writing each record as it finishes
+
+    Args:
+        entries: Recordings (see find_recordings)
+        output: Text file object the JSONL records are written to
+        quality: Quality profile (see quality)
+        stream: Use the bounded-memory streaming analysis
+        workers: Worker processes (default: available CPUs)
+        memory_budget: Bytes the concurrent jobs may use together
+        vad: Skip silent frames in the spectral features (see vad)
+
+    Returns:
+        dict: Progress summary
+    """
+    from worker import warm_up
+
+    workers = max(1, workers or available_cpus())
+    pending = list(entries)
+    estimates = {entry["path"]: estimate_file_bytes(entry["path"], quality, stream) for entry in pending}
+    progress = Progress(len(pending))
+
+    def finish(record):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        progress.add(record, estimates[record["path"]][0])
+        if progress.finished % PROGRESS_EVERY == 0:
+            progress.report()
+
+    def collect(future, entry):
+        """Write a finished job's record; False when its worker process died"""
+        error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            return False
+        if error is not None:
+            finish({"path": entry["path"], "success": False, "error": f"Batch analysis error: {str(error)}"})
+        else:
+            finish(future.result())
+        return True
+
+    retries = {}
+    monitor = BudgetMonitor(memory_budget, "batch analysis")
+    while pending:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+        running = {}
+        in_use = 0
+        broken = None
+        try:
+            while (pending or running) and broken is None:
+                # Admit jobs in input order while they fit the budget (one
+                # job always runs, however large)
+                while pending and len(running) < workers:
+                    cost = estimates[pending[0]["path"]][1]
+                    if running and not admits(in_use, cost, memory_budget):
+                        break
+                    try:
+                        future = executor.submit(analyze_recording, pending[0], quality, stream, vad)
+                    except BrokenProcessPool as e:
+                        broken = e
+                        break
+                    running[future] = pending.pop(0)
+                    in_use += cost
+                if broken is not None or not running:
+                    continue
+
+                # Wake up periodically to measure memory and retry admission
+                finished, _ = wait(running, timeout=MEMORY_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                monitor.check()
+                for future in finished:
+                    if collect(future, running[future]):
+                        in_use -= estimates[running.pop(future)["path"]][1]
+                    else:
+                        broken = future.exception()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        if broken is not None:
+            # A worker died (e.g. killed for memory) and took the pool down:
+            # keep every result that made it and run the lost jobs again on
+            # a fresh pool, up to BROKEN_POOL_RETRIES times each
+            lost = []
+            for future, entry in running.items():
+                if future.cancelled():
+                    lost.append(entry)
+                elif not collect(future, entry):
+                    retries[entry["path"]] = retries.get(entry["path"], 0) + 1
+                    if retries[entry["path"]] > BROKEN_POOL_RETRIES:
+                        finish({"path": entry["path"], "success": False,
+                                "error": f"Analyzer process failed: {str(broken) or type(broken).__name__}"})
+                    else:
+                        lost.append(entry)
+            pending[:0] = lost
+
+    progress.report(final=True)
+    return progress.summary()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or manifest of recordings")
+    parser.add_argument("source", help="Directory of recordings or JSONL manifest")
+    parser.add_argument("--output", help="JSONL results file, also the resume checkpoint (default: stdout)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: available CPUs)")
+    parser.add_argument("--memory-budget-mb", type=float, default=MEMORY_BUDGET_BYTES / (1024 * 1024),
+                        help="Memory the concurrent jobs may use (default: ANALYSIS_MEMORY_BUDGET_MB)")
+    parser.add_argument("--quality", default=DEFAULT_QUALITY, choices=sorted(QUALITY_PROFILES),
+                        help=f"Analysis quality profile (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--stream", action="store_true", help="Use the bounded-memory streaming analysis")
+    parser.add_argument("--vad", action="store_true", help="Skip silent frames in the spectral features")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Re-run recordings whose earlier result failed")
+    options = parser.parse_args(argv)
+
+    entries = find_recordings(options.source)
+    if options.output:
+        output_path = Path(options.output)
+        done = load_checkpoint(output_path, options.retry_failed)
+        skipped = sum(1 for entry in entries if entry["path"] in done)
+        entries = [entry for entry in entries if entry["path"] not in done]
+        if skipped:
+            print(f"resuming: {skipped} recordings already in {output_path}", file=sys.stderr)
+        output = open(output_path, "a", encoding="utf-8")
+    else:
+        output = sys.stdout
+
+    try:
+        run_batch(
+            entries, output, quality=options.quality, stream=options.stream, workers=options.workers,
+            memory_budget=int(options.memory_budget_mb * 1024 * 1024), vad=options.vad
+        )
+    except KeyboardInterrupt:
+        print("interrupted; rerun with the same --output to resume", file=sys.stderr)
+        return 130
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
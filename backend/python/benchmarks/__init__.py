@@ -0,0 +1,10 @@
+"""
+Benchmarks
+Synthetic audio corpus and timing harness for the speech analyzers
+
+    python -m benchmarks.corpus <corpus_dir>
+    python -m benchmarks.run <corpus_dir> --output results.json
+    python -m benchmarks.run <corpus_dir> --baseline results.json
+    python -m benchmarks.recognizer_load --failure-rate 0.1
+    python -m benchmarks.rescoring_parity
+"""
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark Corpus
+Generates a reproducible set of synthetic speech-like clips and matching
+transcripts for benchmarking the analyzers
+"""
+
+import sys
+import json
+import numpy as np
+import soundfile as sf
+from pathlib import Path
+
+DEFAULT_SEED = 1234
+
+# (name, duration seconds, sample rate, format)
+CLIPS = [
+    ("short_16k_wav", 8, 16000, "wav"),
+    ("short_48k_wav", 8, 48000, "wav"),
+    ("medium_22k_wav", 45, 22050, "wav"),
+    ("medium_44k_flac", 45, 44100, "flac"),
+    ("medium_16k_ogg", 45, 16000, "ogg"),
+    ("medium_44k_mp3", 45, 44100, "mp3"),
+    ("long_16k_wav", 300, 16000, "wav"),
+]
+
+# soundfile (format, subtype) for each file type
+FORMATS = {
+    "wav": ("WAV", "PCM_16"),
+    "flac": ("FLAC", "PCM_16"),
+    "ogg": ("OGG", "VORBIS"),
+    "mp3": ("MP3", "MPEG_LAYER_III"),
+}
+
+WORDS = (
+    "today I want to talk about how we plan our projects and why clear "
+    "communication matters when the team is working on something new"
+).split()
+FILLERS = ["um", "uh", "like", "you know", "so", "basically"]
+
+# Speaking rate used to size transcripts (words per minute of voiced audio)
+TRANSCRIPT_WPM = 140
+
+def synthesize_clip(duration, sample_rate, rng):
+    """
+    Voiced harmonic phrases with pitch contours, separated by silence gaps,
+    over low-level background noise
+
+    Returns:
+        tuple: (samples, voiced seconds)
+    """
+    n = int(duration * sample_rate)
+    y = np.zeros(n, dtype=np.float64)
+    voiced_seconds = 0.0
+    base_f0 = rng.uniform(110, 230)
+
+    position = int(rng.uniform(0.1, 0.5) * sample_rate)
+    while n - position > sample_rate // 4:
+        phrase_length = min(int(rng.uniform(1.0, 4.0) * sample_rate), n - position)
+        t = np.arange(phrase_length) / sample_rate
+
+        # Declining pitch with vibrato-like movement and per-phrase offset
+        f0 = base_f0 * rng.uniform(0.85, 1.2) * (1 - 0.15 * t / t[-1])
+        f0 = f0 * (1 + 0.06 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+        phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+
+        harmonics = sum(np.sin(k * phase) / k for k in range(1, 9) if k * f0.max() < sample_rate / 2)
+        envelope = np.sqrt(np.clip(np.sin(np.pi * t / t[-1]), 0, None)) * rng.uniform(0.15, 0.35)
+        y[position:position + phrase_length] += harmonics * envelope
+        voiced_seconds += phrase_length / sample_rate
+
+        position += phrase_length + int(rng.uniform(0.2, 1.5) * sample_rate)
+
+    y += rng.normal(0, rng.uniform(0.001, 0.01), n)
+    return np.clip(y, -1, 1).astype(np.float32), voiced_seconds
+
+def synthesize_transcript(voiced_seconds, rng):
+    """Transcript with fillers, sized to the voiced duration"""
+    word_count = max(1, int(voiced_seconds / 60 * TRANSCRIPT_WPM))
+    words = []
+    while len(words) < word_count:
+        if rng.random() < 0.08:
+            words.extend(FILLERS[rng.integers(len(FILLERS))].split())
+        else:
+            words.append(WORDS[rng.integers(len(WORDS))])
+    return " ".join(words[:word_count])
+
+def generate_corpus(output_dir, seed=DEFAULT_SEED, clips=CLIPS):
+    """
+    Write the corpus clips and a manifest.json describing them
+
+    Args:
+        output_dir: Directory for the clips
+        seed: Random seed (same seed, same corpus)
+        clips: Clip specifications
+
+    Returns:
+        list: Manifest entries
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    manifest = []
+    for name, duration, sample_rate, file_type in clips:
+        y, voiced_seconds = synthesize_clip(duration, sample_rate, rng)
+        transcript = synthesize_transcript(voiced_seconds, rng)
+
+        file_format, subtype = FORMATS[file_type]
+        path = output_dir / f"{name}.{file_type}"
+        sf.write(str(path), y, sample_rate, format=file_format, subtype=subtype)
+
+        manifest.append({
+            "name": name,
+            "path": path.name,
+            "duration": duration,
+            "sample_rate": sample_rate,
+            "format": file_type,
+            "transcript": transcript
+        })
+
+    with open(output_dir / "manifest.json", "w") as f:
+        json.dump({"seed": seed, "clips": manifest}, f, indent=2)
+
+    return manifest
+
+def load_manifest(corpus_dir):
+    """Manifest entries with absolute clip paths"""
+    corpus_dir = Path(corpus_dir)
+    with open(corpus_dir / "manifest.json") as f:
+        clips = json.load(f)["clips"]
+    for clip in clips:
+        clip["path"] = str(corpus_dir / clip["path"])
+    return clips
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "success": False,
+            "error": "Output directory required"
+        }))
+        sys.exit(1)
+
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SEED
+    entries = generate_corpus(sys.argv[1], seed=seed)
+    print(json.dumps({
+        "success": True,
+        "clips": len(entries),
+        "path": str(Path(sys.argv[1]).resolve())
+    }))
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Quality Profile Parity
+Checks that each quality profile's scores stay within a fixed distance of
+the "precise" scores on the benchmark corpus
+
+Runs analyze_all once per profile and clip (feature and result caches
+disabled) and exits with status 1 when any score drifts past its profile's
+tolerance.
+
+    python -m benchmarks.parity <corpus_dir> [--profiles balanced,fast]
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Largest allowed |score - precise score| per analyzer and overall, in points
+SCORE_TOLERANCES = {
+    "balanced": 3,
+    "fast": 5
+}
+
+SCORED = ("pace", "tone", "confidence", "overallScore")
+
+def score_of(result, name):
+    return result[name] if name == "overallScore" else result[name]["score"]
+
+def check_parity(corpus_dir, profiles):
+    """
+    Compare each profile with "precise" on every corpus clip
+
+    Returns:
+        tuple: (rows, violations) where rows hold per-clip scores and CPU
+        time per profile and violations describe out-of-tolerance scores
+    """
+    from analyze_all import analyze_all
+    from benchmarks.corpus import load_manifest
+
+    rows, violations = [], []
+    for clip in load_manifest(corpus_dir):
+        row = {"clip": clip["name"], "scores": {}, "cpu_time": {}}
+        for quality in ("precise",) + tuple(profiles):
+            start = time.process_time()
+            result = analyze_all(clip["path"], clip["transcript"], quality=quality)
+            row["cpu_time"][quality] = time.process_time() - start
+            if not result.get("success"):
+                violations.append(f"{clip['name']} [{quality}]: {result.get('error')}")
+                continue
+            row["scores"][quality] = {name: score_of(result, name) for name in SCORED}
+
+        precise = row["scores"].get("precise")
+        for quality in profiles:
+            scores = row["scores"].get(quality)
+            if precise is None or scores is None:
+                continue
+            for name in SCORED:
+                drift = abs(scores[name] - precise[name])
+                if drift > SCORE_TOLERANCES[quality]:
+                    violations.append(
+                        f"{clip['name']} [{quality}]: {name} {precise[name]} -> {scores[name]} "
+                        f"(tolerance {SCORE_TOLERANCES[quality]})"
+                    )
+        rows.append(row)
+        print_row(row, profiles)
+
+    return rows, violations
+
+def print_row(row, profiles):
+    parts = []
+    for quality in ("precise",) + tuple(profiles):
+        scores = row["scores"].get(quality)
+        summary = "/".join(str(scores[name]) for name in SCORED) if scores else "failed"
+        parts.append(f"{quality} {summary} cpu {row['cpu_time'][quality]:.2f}s")
+    print(f"{row['clip']:<18} " + "  ".join(parts), file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check quality profile scores against precise")
+    parser.add_argument("corpus", help="Corpus directory (generated if it has no manifest)")
+    parser.add_argument("--profiles", default=",".join(SCORE_TOLERANCES),
+                        help="Comma-separated profiles to check (default: all)")
+    options = parser.parse_args(argv)
+
+    profiles = [name.strip() for name in options.profiles.split(",") if name.strip()]
+    unknown = [name for name in profiles if name not in SCORE_TOLERANCES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+
+    # Measure the analyzers, not cache hits
+    os.environ["FEATURE_CACHE_MAX_MB"] = "0"
+    os.environ["RESULT_CACHE_MAX_MB"] = "0"
+
+    if not (Path(options.corpus) / "manifest.json").exists():
+        from benchmarks.corpus import generate_corpus
+        generate_corpus(options.corpus)
+
+    _, violations = check_parity(options.corpus, profiles)
+    for violation in violations:
+        print(f"DRIFT {violation}", file=sys.stderr)
+    if violations:
+        return 1
+    print("All profiles within tolerance of precise", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Recognizer Load Test
+Sends a burst of recognition requests through the pooled client and reports
+throughput, latency and how many connections and retries it took
+
+Runs against an in-process recognizer stub unless --endpoint is given; the
+stub options (latency, failure rate, rate limit) simulate a busy service.
+
+    python -m benchmarks.recognizer_load [--requests 200] [--concurrency 16]
+                                         [--max-connections 4] [--failure-rate 0.1]
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.recognizer_stub import add_stub_arguments, start_stub, stub_settings
+
+def synthetic_audio(seconds=5.0, sample_rate=16000):
+    """AudioData holding a quiet tone (the stub does not listen to it)"""
+    import numpy as np
+    from speech_to_text import to_audio_data
+
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return to_audio_data((0.1 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), sample_rate)
+
+def run_load(client, requests, concurrency, audio):
+    """
+    Send requests recognize calls from concurrency threads
+
+    Returns:
+        dict: throughput, latency percentiles, outcome counts and client stats
+    """
+    from segmented_transcription import NoSpeechError
+
+    def call(_):
+        start = time.perf_counter()
+        try:
+            client.recognize(audio)
+            outcome = "ok"
+        except NoSpeechError:
+            outcome = "no_speech"
+        except Exception:
+            outcome = "failed"
+        return outcome, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    outcomes = {}
+    for outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return {
+        "elapsed": elapsed,
+        "throughput": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "outcomes": outcomes,
+        "client": client.stats()
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the recognizer client")
+    parser.add_argument("--endpoint", help="Recognition URL (default: an in-process stub)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests to send (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Calling threads (default: 16)")
+    parser.add_argument("--max-connections", type=int, default=4, help="Client pool size (default: 4)")
+    parser.add_argument("--client-rate-limit", type=float, default=0.0,
+                        help="Client requests per second (default: no limit)")
+    parser.add_argument("--retries", type=int, default=2, help="Client retries per request (default: 2)")
+    parser.add_argument("--timeout", type=float, default=15.0, help="Client timeout in seconds")
+    add_stub_arguments(parser)
+    options = parser.parse_args(argv)
+
+    from recognizer_client import RecognizerClient
+
+    server = None
+    endpoint = options.endpoint
+    if endpoint is None:
+        server, endpoint = start_stub(**stub_settings(options))
+
+    client = RecognizerClient(
+        endpoint, max_connections=options.max_connections, rate_limit=options.client_rate_limit,
+        timeout=options.timeout, retries=options.retries
+    )
+    try:
+        report = run_load(client, options.requests, options.concurrency, synthetic_audio())
+    finally:
+        client.close()
+        if server is not None:
+            server.shutdown()
+
+    stats = report["client"]
+    print(
+        f"{options.requests} requests in {report['elapsed']:.2f}s "
+        f"({report['throughput']:.1f}/s)  p50 {report['p50'] * 1000:.0f}ms  p95 {report['p95'] * 1000:.0f}ms",
+        file=sys.stderr
+    )
+    print(
+        "outcomes " + " ".join(f"{name}={count}" for name, count in sorted(report["outcomes"].items())) +
+        f"  connections={stats['connections']} sent={stats['requests']} retries={stats['retries']}",
+        file=sys.stderr
+    )
+    return 0 if "failed" not in report["outcomes"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
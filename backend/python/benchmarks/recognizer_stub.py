@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Recognizer Stub Server
+Local stand-in for the Google Web Speech API, so the recognizer client can
+be load-tested offline
+
+Accepts the same POST (FLAC body, "audio/x-flac; rate=N" content type) and
+answers in the same line-delimited JSON format. Latency, failures, silent
+results and a request-rate limit (answered with 429 and Retry-After) can be
+simulated; connections are kept alive like the real service. GET /stats
+returns request and connection counts.
+
+    python -m benchmarks.recognizer_stub [--port 8765] [--latency 0.2]
+                                         [--failure-rate 0.05] [--rate-limit 20]
+    RECOGNIZER_ENDPOINT=http://127.0.0.1:8765/speech-api/v2/recognize
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_PATH = "/speech-api/v2/recognize"
+
+STUB_TRANSCRIPT = "this is a transcription from the local recognizer stub"
+
+class StubState:
+    """Simulation settings and counters shared by the handler threads"""
+
+    def __init__(self, latency=0.2, jitter=0.05, failure_rate=0.0, no_speech_rate=0.0, rate_limit=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.no_speech_rate = no_speech_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.window_requests = 0
+        self.stats = {"connections": 0, "requests": 0, "ok": 0, "no_speech": 0,
+                      "failed": 0, "rate_limited": 0, "bad_request": 0}
+
+    def count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def admit(self):
+        """Whether a request fits the per-second rate limit"""
+        if self.rate_limit <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1:
+                self.window_start = now
+                self.window_requests = 0
+            self.window_requests += 1
+            return self.window_requests <= self.rate_limit
+
+    def draw(self):
+        with self.lock:
+            return self.random.random(), self.random.uniform(-self.jitter, self.jitter)
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.state.count("connections")
+
+    def do_GET(self):
+        if self.path != "/stats":
+            self.respond(404, "not found\n", "text/plain")
+            return
+        with self.server.state.lock:
+            body = json.dumps(self.server.state.stats)
+        self.respond(200, body, "application/json")
+
+    def do_POST(self):
+        state = self.server.state
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        state.count("requests")
+
+        if not self.path.startswith(STUB_PATH) or not self.headers.get("Content-Type", "").startswith("audio/x-flac"):
+            state.count("bad_request")
+            self.respond(400, "bad request\n", "text/plain")
+            return
+        if not state.admit():
+            state.count("rate_limited")
+            self.respond(429, "rate limited\n", "text/plain", {"Retry-After": "1"})
+            return
+
+        roll, jitter = state.draw()
+        time.sleep(max(0.0, state.latency + jitter))
+
+        if roll < state.failure_rate:
+            state.count("failed")
+            self.respond(503, "unavailable\n", "text/plain")
+        elif roll < state.failure_rate + state.no_speech_rate or not body:
+            state.count("no_speech")
+            self.respond(200, '{"result":[]}\n', "application/json")
+        else:
+            state.count("ok")
+            result = {
+                "result": [{"alternative": [{"transcript": STUB_TRANSCRIPT, "confidence": 0.9}], "final": True}],
+                "result_index": 0
+            }
+            self.respond(200, '{"result":[]}\n' + json.dumps(result) + "\n", "application/json")
+
+    def respond(self, status, text, content_type, headers=None):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub(port=0, **settings):
+    """
+    Serve the stub on 127.0.0.1 from a background thread
+
+    Returns:
+        tuple: (server, endpoint URL); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}{STUB_PATH}"
+
+def add_stub_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per request (default: 0.2)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Random +/- latency (default: 0.05)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction answered with 503")
+    parser.add_argument("--no-speech-rate", type=float, default=0.0, help="Fraction answered with no result")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Requests per second before answering 429 (default: no limit)")
+    parser.add_argument("--seed", type=int, help="Seed for the simulated failures")
+
+def stub_settings(options):
+    return {
+        "latency": options.latency,
+        "jitter": options.jitter,
+        "failure_rate": options.failure_rate,
+        "no_speech_rate": options.no_speech_rate,
+        "rate_limit": options.rate_limit,
+        "seed": options.seed
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the speech recognition API")
+    parser.add_argument("--port", type=int, default=8765, help="Port on 127.0.0.1 (default: 8765)")
+    add_stub_arguments(parser)
+    options = parser.parse_args(argv)
+
+    server, endpoint = start_stub(options.port, **stub_settings(options))
+    print(f"Recognizer stub listening; RECOGNIZER_ENDPOINT={endpoint}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Rescoring Parity
+Checks that the vectorized scoring functions in rescoring return exactly
+what the scalar analyzer functions return
+
+Inputs are random values plus every threshold of the scalar if/elif chains,
+the floats right next to them, NaN and signed zero. Exits with status 1 on
+any mismatch and prints the vectorized throughput.
+
+    python -m benchmarks.rescoring_parity [--samples 100000]
+"""
+
+import sys
+import time
+import argparse
+
+def edge_values(rng, n, low, high, thresholds):
+    """n random values in [low, high) plus thresholds, their neighbours and specials"""
+    import numpy as np
+
+    thresholds = np.array(thresholds, dtype=np.float64)
+    edges = np.concatenate((
+        thresholds,
+        np.nextafter(thresholds, np.inf),
+        np.nextafter(thresholds, -np.inf),
+        [np.nan, 0.0, -0.0]
+    ))
+    values = np.concatenate((edges, rng.uniform(low, high, max(0, n - len(edges)))))
+    rng.shuffle(values)
+    return values
+
+def check(name, vectorized, scalar):
+    """Compare elementwise, NaN equal to NaN; returns the mismatch count"""
+    import numpy as np
+
+    vectorized = np.asarray(vectorized)
+    scalar = np.asarray(scalar, dtype=vectorized.dtype)
+    if vectorized.dtype.kind == "f":
+        mismatches = ~((vectorized == scalar) | (np.isnan(vectorized) & np.isnan(scalar)))
+    else:
+        mismatches = vectorized != scalar
+    count = int(mismatches.sum())
+    status = "ok" if count == 0 else f"{count} MISMATCHES (first at {int(np.argmax(mismatches))})"
+    print(f"{name:<20} {len(vectorized)} values  {status}", file=sys.stderr)
+    return count
+
+def check_parity(samples, seed=0):
+    import numpy as np
+    import rescoring
+    from pace_analysis import calculate_pace_score, categorize_pace
+    from tone_analysis import calculate_tone_score
+    from confidence_analysis import calculate_confidence_score
+    from fluency_analysis import calculate_fluency_score
+
+    rng = np.random.default_rng(seed)
+    wpm = edge_values(rng, samples, -50, 400, [0, 100, 120, 150, 180, 260])
+    cv_pitch = edge_values(rng, samples, -5, 80, [10, 15, 30, 40])
+    cv_energy = edge_values(rng, samples, -5, 80, [15, 20, 40, 50])
+    stability = edge_values(rng, samples, -20, 120, [0, 100])
+    consistency = edge_values(rng, samples, -20, 120, [0, 100])
+    pauses = edge_values(rng, samples, -1, 30, [2, 4, 6, 16])
+    clarity = edge_values(rng, samples, -1, 200, [100])
+    hesitation = edge_values(rng, samples, -1, 15, [2, 5, 8])
+    fillers = edge_values(rng, samples, -5, 80, [0, 50])
+    repetitions = rng.integers(0, 10, samples)
+
+    failures = 0
+    failures += check("pace", rescoring.pace_scores(wpm), [calculate_pace_score(x) for x in wpm])
+    failures += check("pace category", rescoring.pace_categories(wpm), [categorize_pace(x) for x in wpm])
+    failures += check("tone", rescoring.tone_scores(cv_pitch, cv_energy), [
+        calculate_tone_score(p, e, p < 10) for p, e in zip(cv_pitch, cv_energy)
+    ])
+    failures += check("confidence", rescoring.confidence_scores(stability, consistency, pauses, clarity, hesitation), [
+        calculate_confidence_score(*values) for values in zip(stability, consistency, pauses, clarity, hesitation)
+    ])
+    failures += check("fluency", rescoring.fluency_scores(fillers, repetitions), [
+        calculate_fluency_score(f, int(r)) for f, r in zip(fillers, repetitions)
+    ])
+    return failures
+
+def measure_throughput(records, seed=0):
+    import numpy as np
+    import rescoring
+
+    rng = np.random.default_rng(seed)
+    metrics = {name: rng.uniform(0, 100, records) for name in rescoring.METRIC_SOURCES}
+    start = time.perf_counter()
+    rescoring.rescore(metrics)
+    return records / (time.perf_counter() - start)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check vectorized rescoring against the scalar scoring")
+    parser.add_argument("--samples", type=int, default=100000, help="Values per function (default: 100000)")
+    options = parser.parse_args(argv)
+
+    failures = check_parity(options.samples)
+    print(f"rescore throughput: {measure_throughput(1000000):,.0f} records/s", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+Times every analyzer on the benchmark corpus and compares against a baseline
+
+Each (analyzer, clip) pair runs in a fresh Python process so peak RSS and
+import cost are measured in isolation. The first call is reported as the
+cold time (lazy imports, numba compilation); wall/cpu time are medians of
+the following --repeat calls. The feature cache is disabled unless
+--with-cache is given; the result cache always is.
+
+    python -m benchmarks.run <corpus_dir> [--repeat 3] [--output results.json]
+                             [--baseline baseline.json] [--tolerance 0.15]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+
+# Analyzer name -> (module, function, argument builder)
+ANALYZERS = {
+    "fluency": ("fluency_analysis", "analyze_fluency", lambda clip: [clip["transcript"]]),
+    "pace": ("pace_analysis", "analyze_pace", lambda clip: [clip["path"], clip["transcript"]]),
+    "tone": ("tone_analysis", "analyze_tone", lambda clip: [clip["path"]]),
+    "confidence": ("confidence_analysis", "analyze_confidence",
+                   lambda clip: [clip["path"], clip["transcript"]]),
+    "stt_decode": ("speech_to_text", "load_audio_data", lambda clip: [clip["path"]]),
+    "analyze_all": ("analyze_all", "analyze_all", lambda clip: [clip["path"], clip["transcript"]]),
+}
+
+# Slowdowns smaller than this are treated as noise regardless of tolerance
+MIN_REGRESSION_SECONDS = 0.005
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None if unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def measure(analyzer, clip, repeat):
+    """Run one analyzer on one clip in this process and return its timings"""
+    import importlib
+
+    module_name, function_name, build_args = ANALYZERS[analyzer]
+
+    start = time.perf_counter()
+    function = getattr(importlib.import_module(module_name), function_name)
+    import_time = time.perf_counter() - start
+
+    args = build_args(clip)
+
+    wall_times, cpu_times, error = [], [], None
+    for _ in range(repeat + 1):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = function(*args)
+        wall_times.append(time.perf_counter() - wall_start)
+        cpu_times.append(time.process_time() - cpu_start)
+        if isinstance(result, dict) and result.get("success") is False:
+            error = result.get("error")
+
+    return {
+        "import_time": import_time,
+        "cold_time": wall_times[0],
+        "wall_times": wall_times[1:],
+        "cpu_times": cpu_times[1:],
+        "peak_rss_mb": peak_rss_mb(),
+        "error": error
+    }
+
+def run_isolated(analyzer, clip, repeat, with_cache):
+    """Measure in a child process"""
+    env = dict(os.environ)
+    # Repeated calls must rerun the analyzer, not return its stored result
+    env["RESULT_CACHE_MAX_MB"] = "0"
+    if not with_cache:
+        env["FEATURE_CACHE_MAX_MB"] = "0"
+
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--single", analyzer, json.dumps(clip), str(repeat)],
+        cwd=PYTHON_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run_benchmarks(corpus_dir, analyzers, repeat, with_cache=False, clip_filter=None):
+    """
+    Benchmark analyzers over the corpus
+
+    Returns:
+        dict: {meta, results}
+    """
+    from benchmarks.corpus import load_manifest
+
+    clips = load_manifest(corpus_dir)
+    results = []
+    for clip in clips:
+        if clip_filter and clip_filter not in clip["name"]:
+            continue
+        for analyzer in analyzers:
+            measurement = run_isolated(analyzer, clip, repeat, with_cache)
+            entry = {
+                "analyzer": analyzer,
+                "clip": clip["name"],
+                "duration": clip["duration"],
+                "sample_rate": clip["sample_rate"],
+                "format": clip["format"],
+                "error": measurement.get("error")
+            }
+            if "wall_times" in measurement:
+                wall = statistics.median(measurement["wall_times"])
+                entry.update({
+                    "wall_time": wall,
+                    "cpu_time": statistics.median(measurement["cpu_times"]),
+                    "rtf": wall / clip["duration"],
+                    "peak_rss_mb": measurement["peak_rss_mb"],
+                    "import_time": measurement["import_time"],
+                    "cold_time": measurement["cold_time"],
+                    "wall_times": measurement["wall_times"]
+                })
+            results.append(entry)
+            print_result(entry)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "with_cache": with_cache
+        },
+        "results": results
+    }
+
+def print_result(entry):
+    name = f"{entry['analyzer']:<12} {entry['clip']:<18}"
+    if "wall_time" not in entry:
+        print(f"{name} ERROR {entry['error']}", file=sys.stderr)
+        return
+    rss = f"{entry['peak_rss_mb']:.0f} MB" if entry["peak_rss_mb"] is not None else "n/a"
+    print(
+        f"{name} wall {entry['wall_time']:.3f}s  cpu {entry['cpu_time']:.3f}s  "
+        f"rtf {entry['rtf']:.4f}  rss {rss}  import {entry['import_time']:.2f}s  "
+        f"cold {entry['cold_time']:.3f}s",
+        file=sys.stderr
+    )
+
+def compare(current, baseline, tolerance):
+    """
+    Compare results with a baseline run
+
+    Returns:
+        list: Regression descriptions (empty when none)
+    """
+    previous = {(r["analyzer"], r["clip"]): r for r in baseline["results"] if "wall_time" in r}
+    regressions = []
+    for result in current["results"]:
+        base = previous.get((result["analyzer"], result["clip"]))
+        if base is None or "wall_time" not in result:
+            continue
+
+        label = f"{result['analyzer']} on {result['clip']}"
+        slower = result["wall_time"] - base["wall_time"]
+        if result["wall_time"] > base["wall_time"] * (1 + tolerance) and slower > MIN_REGRESSION_SECONDS:
+            regressions.append(
+                f"{label}: wall time {base['wall_time']:.3f}s -> {result['wall_time']:.3f}s "
+                f"(+{slower / base['wall_time'] * 100:.0f}%)"
+            )
+
+        if result.get("peak_rss_mb") and base.get("peak_rss_mb"):
+            if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(
+                    f"{label}: peak RSS {base['peak_rss_mb']:.0f} MB -> {result['peak_rss_mb']:.0f} MB"
+                )
+    return regressions
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Child mode: measure a single (analyzer, clip) pair and print JSON
+    if argv and argv[0] == "--single":
+        print(json.dumps(measure(argv[1], json.loads(argv[2]), int(argv[3]))))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Benchmark the speech analyzers")
+    parser.add_argument("corpus", help="Corpus directory (generated if it has no manifest)")
+    parser.add_argument("--analyzers", default=",".join(ANALYZERS),
+                        help="Comma-separated analyzers (default: all)")
+    parser.add_argument("--clips", help="Only clips whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: 3)")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the feature cache enabled")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative slowdown before flagging a regression (default: 0.15)")
+    options = parser.parse_args(argv)
+
+    analyzers = [name.strip() for name in options.analyzers.split(",") if name.strip()]
+    unknown = [name for name in analyzers if name not in ANALYZERS]
+    if unknown:
+        parser.error(f"unknown analyzers: {', '.join(unknown)}")
+
+    if not (Path(options.corpus) / "manifest.json").exists():
+        from benchmarks.corpus import generate_corpus
+        generate_corpus(options.corpus)
+
+    current = run_benchmarks(
+        options.corpus, analyzers, max(1, options.repeat),
+        with_cache=options.with_cache, clip_filter=options.clips
+    )
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            regressions = compare(current, json.load(f), options.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline", file=sys.stderr)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
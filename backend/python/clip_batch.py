@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Short-Clip Batch Analysis
+Analyzes many short recordings (practice drills of a few seconds) in one
+call, for callers that would otherwise make one analyze_all request per clip
+
+Each clip is decoded once and analyzed on a memory-only FeatureStore: drill
+clips are analyzed once, so the feature cache writes and eviction scans of
+analyze_all cost a large share of a short clip's own signal processing.
+Results equal analyze_all on each clip (full-load path, default options).
+
+    python clip_batch.py <directory|manifest.jsonl> [--quality fast] [--output results.jsonl]
+
+Input is read like batch.py; one JSON line per clip is written in input order.
+The analysis worker runs the same batch as the "clip_batch" script.
+"""
+
+import sys
+import json
+import argparse
+
+import startup
+from quality import DEFAULT_QUALITY, QUALITY_PROFILES
+
+def analyze_clip(audio_file_path, transcription, y, sr, quality=DEFAULT_QUALITY):
+    """analyze_all of one decoded clip, without the on-disk feature cache"""
+    from analyze_all import combine_results, with_fallback
+    from feature_cache import FeatureStore
+    from fluency_analysis import analyze_fluency
+    from pace_analysis import analyze_pace
+    from tone_analysis import analyze_tone
+    from confidence_analysis import analyze_confidence
+
+    options = {
+        "y": y, "sr": sr, "quality": quality,
+        "store": FeatureStore(audio_file_path, y=y, sr=sr, quality=quality, persist=False)
+    }
+    return combine_results({
+        "fluency": with_fallback("fluency_analysis", analyze_fluency(transcription)),
+        "pace": with_fallback("pace_analysis", analyze_pace(audio_file_path, transcription, **options)),
+        "tone": with_fallback("tone_analysis", analyze_tone(audio_file_path, **options)),
+        "confidence": with_fallback(
+            "confidence_analysis", analyze_confidence(audio_file_path, transcription, **options)
+        )
+    })
+
+def analyze_clips(entries, quality=DEFAULT_QUALITY):
+    """
+    Analyze many short clips
+
+    Args:
+        entries: dicts with path and transcription (see batch.find_recordings;
+            missing transcriptions are transcribed first)
+        quality: Quality profile (see quality)
+
+    Returns:
+        list: One record per entry, in order: {path, success, transcription,
+        analysis | error}, like batch.py
+    """
+    from analyze_all import analyze_all
+    from quality import load_audio
+    from speech_to_text import speech_to_text
+
+    records = []
+    for entry in entries:
+        record = {"path": entry["path"]}
+        records.append(record)
+        try:
+            transcription = entry.get("transcription")
+            if not transcription:
+                transcribed = speech_to_text(entry["path"])
+                if not transcribed["success"]:
+                    record.update(success=False, error=transcribed["error"])
+                    continue
+                transcription = transcribed["transcription"]
+
+            try:
+                y, sr = load_audio(entry["path"], quality)
+            except Exception:
+                y = None
+            if y is None:
+                # analyze_all reports the decoding error the way the backend expects
+                analysis = analyze_all(entry["path"], transcription, quality=quality)
+            else:
+                analysis = analyze_clip(entry["path"], transcription, y, sr, quality)
+
+            record.update(success=analysis["success"], transcription=transcription)
+            if analysis["success"]:
+                record["analysis"] = analysis
+            else:
+                record["error"] = analysis["error"]
+        except Exception as e:
+            record.update(success=False, error=f"Clip analysis error: {str(e)}")
+    return records
+
+def analyze_clip_source(source, quality=DEFAULT_QUALITY):
+    """
+    Worker entry point: analyze the clips of a directory or JSONL manifest
+
+    Returns:
+        dict: {success, clips} with the records of analyze_clips
+    """
+    from batch import find_recordings
+
+    try:
+        return {
+            "success": True,
+            "clips": analyze_clips(find_recordings(source), quality=quality)
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Clip batch error: {str(e)}"
+        }
+
+def main(argv=None):
+    from batch import find_recordings
+
+    parser = argparse.ArgumentParser(description="Analyze many short clips in one process")
+    parser.add_argument("source", help="Directory of recordings or JSONL manifest")
+    parser.add_argument("--output", help="JSONL results file (default: stdout)")
+    parser.add_argument("--quality", default=DEFAULT_QUALITY, choices=sorted(QUALITY_PROFILES),
+                        help=f"Analysis quality profile (default: {DEFAULT_QUALITY})")
+    options = parser.parse_args(argv)
+
+    records = analyze_clips(find_recordings(options.source), quality=options.quality)
+    output = open(options.output, "w", encoding="utf-8") if options.output else sys.stdout
+    try:
+        for record in records:
+            output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
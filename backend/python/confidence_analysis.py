@@ -6,24 +6,57 @@ Analyzes speech confidence based on voice stability, hesitation, and clarity
 
 import sys
 import json
-import numpy as np
-import librosa
 from pathlib import Path
 
-def analyze_confidence(audio_file_path, transcription):
+from filler_matcher import get_matcher, tokenize
+from profiling import profiled, stage
+from quality import DEFAULT_QUALITY, QUALITY_PROFILES, parse_quality
+from result_cache import cached
+
+# Hesitation sounds counted against confidence
+HESITATION_WORDS = ['um', 'uh', 'er', 'ah', 'hmm']
+
+# Frames more than this many dB below the loudest frame count as silence
+SILENCE_TOP_DB = 30
+
+@cached("confidence_analysis")
+@profiled("confidence_analysis")
+def analyze_confidence(audio_file_path, transcription, y=None, sr=None, stream=False,
+                       features=None, hesitation_words=None, quality=DEFAULT_QUALITY, vad=False,
+                       store=None, sample=False):
     """
     Analyze speech confidence
     
     Args:
         audio_file_path: Path to audio file
         transcription: Text transcription
+        y: Optional pre-decoded audio samples (skips loading the file)
+        sr: Sample rate of y
+        stream: Read the file in blocks with bounded memory instead of
+            loading it whole (see audio_stream)
+        features: Optional stream_features() result to reuse in stream mode
+        hesitation_words: Optional hesitation words (default: HESITATION_WORDS)
+        quality: Quality profile for the full-load path (see quality)
+        vad: Compute the spectral centroid on voiced frames only (see vad;
+            full-load path) and report speechRatio
+        store: Optional FeatureStore of the same audio and quality, shared
+            with the other analyzers so features are computed once
+        sample: Estimate recordings of SAMPLE_MIN_SECONDS or more from a
+            sample of windows and add confidence intervals (see sampling);
+            shorter recordings take the exact path
         
     Returns:
         dict: Confidence analysis results
     """
     try:
-        # Check if file exists
-        if not Path(audio_file_path).exists():
+        if quality not in QUALITY_PROFILES:
+            return {
+                "success": False,
+                "error": f"Unknown quality profile: {quality}"
+            }
+        
+        # Check if file exists (not needed when stream features are supplied)
+        if not (stream and features is not None) and not Path(audio_file_path).exists():
             return {
                 "success": False,
                 "error": f"Audio file not found: {audio_file_path}"
@@ -35,69 +68,111 @@ def analyze_confidence(audio_file_path, transcription):
                 "error": "Empty transcription"
             }
         
-        # Load audio file
-        y, sr = librosa.load(audio_file_path, sr=None)
-        
-        # Analyze voice stability (spectral centroid stability)
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        centroid_stability = 100 - min(100, (np.std(spectral_centroids) / np.mean(spectral_centroids)) * 100)
+        # Estimate long recordings from a sample of windows (see sampling);
+        # shorter ones, or files that cannot seek, take the exact path
+        if sample and features is None:
+            from sampling import sample_features
+            features = sample_features(audio_file_path, centroid=True, zcr=True, silence=True)
+            stream = stream or features is not None
         
-        # Analyze energy consistency
-        energy = librosa.feature.rms(y=y)[0]
-        energy_consistency = 100 - min(100, (np.std(energy) / np.mean(energy)) * 100)
+        with stage("features"):
+            if stream:
+                # Accumulate frame statistics block by block
+                if features is None:
+                    from audio_stream import stream_features
+                    features = stream_features(
+                        audio_file_path, centroid=True, zcr=True, silence=True
+                    )
+                mean_centroid = features["centroid"].mean
+                std_centroid = features["centroid"].std
+                mean_energy = features["rms"].mean
+                std_energy = features["rms"].std
+                num_segments = features["silence"].count_intervals(SILENCE_TOP_DB)
+                duration = features["duration"]
+                mean_zcr = features["zcr"].mean
+            else:
+                # Features are read through the cache; the file is only
+                # decoded (unless the caller already did) on a cache miss
+                import numpy as np
+                from feature_cache import FeatureStore
+                if store is None:
+                    store = FeatureStore(audio_file_path, y=y, sr=sr, quality=quality)
+                
+                spectral_centroids = store.spectral_centroid(voiced_only=vad)
+                mean_centroid = np.mean(spectral_centroids)
+                std_centroid = np.std(spectral_centroids)
+                
+                energy = store.rms()
+                mean_energy = np.mean(energy)
+                std_energy = np.std(energy)
+                
+                # Identify silent segments
+                intervals = store.nonsilent_intervals(SILENCE_TOP_DB)
+                num_segments = len(intervals)
+                duration = store.duration()
+                
+                zcr = store.zero_crossing_rate()
+                mean_zcr = np.mean(zcr)
         
-        # Detect pauses/hesitations
-        # Identify silent segments
-        intervals = librosa.effects.split(y, top_db=30)
-        num_segments = len(intervals)
-        duration = librosa.get_duration(y=y, sr=sr)
-        
-        # Calculate pause frequency (pauses per minute)
-        pauses_per_minute = (num_segments - 1) / (duration / 60) if duration > 0 else 0
-        
-        # Analyze zero-crossing rate (voice clarity indicator)
-        zcr = librosa.feature.zero_crossing_rate(y)[0]
-        mean_zcr = np.mean(zcr)
-        clarity_score = min(100, mean_zcr * 1000)  # Normalize
-        
-        # Text-based confidence indicators
-        text_lower = transcription.lower()
-        words = text_lower.split()
-        
-        # Detect hesitation words
-        hesitation_words = ['um', 'uh', 'er', 'ah', 'hmm']
-        hesitation_count = sum(1 for word in words if word in hesitation_words)
-        hesitation_rate = (hesitation_count / len(words)) * 100 if len(words) > 0 else 0
-        
-        # Calculate overall confidence score
-        confidence_score = calculate_confidence_score(
-            centroid_stability,
-            energy_consistency,
-            pauses_per_minute,
-            clarity_score,
-            hesitation_rate
-        )
+        with stage("scoring"):
+            # Voice stability, energy consistency, pause frequency and clarity
+            centroid_stability, energy_consistency, pauses_per_minute, clarity_score = voice_metrics(
+                mean_centroid, std_centroid, mean_energy, std_energy, num_segments, duration, mean_zcr
+            )
+            
+            # Text-based confidence indicators
+            text_lower = transcription.lower()
+            words = text_lower.split()
+            
+            # Detect hesitation words
+            matcher = get_matcher(tuple(hesitation_words or HESITATION_WORDS))
+            hesitation_count = sum(matcher.count_tokens(tokenize(text_lower)).values())
+            hesitation_rate = (hesitation_count / len(words)) * 100 if len(words) > 0 else 0
+            
+            # Calculate overall confidence score
+            confidence_score = calculate_confidence_score(
+                centroid_stability,
+                energy_consistency,
+                pauses_per_minute,
+                clarity_score,
+                hesitation_rate
+            )
         
         # Generate feedback
-        feedback = generate_confidence_feedback(
-            confidence_score,
-            centroid_stability,
-            pauses_per_minute,
-            hesitation_count,
-            len(words)
-        )
+        with stage("feedback"):
+            feedback = generate_confidence_feedback(
+                confidence_score,
+                centroid_stability,
+                pauses_per_minute,
+                hesitation_count,
+                len(words)
+            )
         
-        return {
+        result = {
             "success": True,
-            "score": round(confidence_score),
-            "voiceStability": round(centroid_stability, 2),
-            "energyConsistency": round(energy_consistency, 2),
-            "pausesPerMinute": round(pauses_per_minute, 2),
-            "clarityScore": round(clarity_score, 2),
+            "score": int(round(confidence_score)),
+            "voiceStability": round(float(centroid_stability), 2),
+            "energyConsistency": round(float(energy_consistency), 2),
+            "pausesPerMinute": round(float(pauses_per_minute), 2),
+            "clarityScore": round(float(clarity_score), 2),
             "hesitationCount": hesitation_count,
-            "hesitationRate": round(hesitation_rate, 2),
-            "feedback": feedback
+            "hesitationRate": round(float(hesitation_rate), 2),
+            "feedback": feedback,
+            "metrics": {
+                "voice_stability": float(centroid_stability),
+                "energy_consistency": float(energy_consistency),
+                "pauses_per_minute": float(pauses_per_minute),
+                "clarity": float(clarity_score),
+                "hesitation_rate": float(hesitation_rate)
+            }
         }
+        if vad and not stream:
+            from vad import speech_ratio
+            result["speechRatio"] = round(speech_ratio(store.voiced_mask()), 4)
+        if stream and "windows" in features:
+            from sampling import with_intervals
+            result = with_intervals(result, features, lambda f: stream_metrics(f, hesitation_rate))
+        return result
         
     except Exception as e:
         return {
@@ -105,6 +180,56 @@ def analyze_confidence(audio_file_path, transcription):
             "error": f"Confidence analysis error: {str(e)}"
         }
 
+def voice_metrics(mean_centroid, std_centroid, mean_energy, std_energy, num_segments, duration, mean_zcr):
+    """
+    Voice stability, energy consistency, pauses per minute and clarity from
+    frame statistics
+    
+    Returns:
+        tuple: (stability, consistency, pauses_per_minute, clarity)
+    """
+    # Analyze voice stability (spectral centroid stability)
+    centroid_stability = 100 - min(100, (std_centroid / mean_centroid) * 100)
+    
+    # Analyze energy consistency
+    energy_consistency = 100 - min(100, (std_energy / mean_energy) * 100)
+    
+    # Detect pauses/hesitations
+    # Calculate pause frequency (pauses per minute)
+    pauses_per_minute = (num_segments - 1) / (duration / 60) if duration > 0 else 0
+    
+    # Analyze zero-crossing rate (voice clarity indicator)
+    clarity_score = min(100, mean_zcr * 1000)  # Normalize
+    
+    return centroid_stability, energy_consistency, pauses_per_minute, clarity_score
+
+def stream_metrics(features, hesitation_rate):
+    """
+    Raw metrics of stream_features() output, without scoring or feedback;
+    the sampled-estimate bootstrap calls this once per resample
+    
+    Args:
+        features: stream_features() output with centroid, zcr and silence
+        hesitation_rate: Hesitation rate of the transcription, which does
+            not depend on the audio windows
+    """
+    stability, consistency, pauses_per_minute, clarity = voice_metrics(
+        features["centroid"].mean,
+        features["centroid"].std,
+        features["rms"].mean,
+        features["rms"].std,
+        features["silence"].count_intervals(SILENCE_TOP_DB),
+        features["duration"],
+        features["zcr"].mean
+    )
+    return {
+        "voice_stability": float(stability),
+        "energy_consistency": float(consistency),
+        "pauses_per_minute": float(pauses_per_minute),
+        "clarity": float(clarity),
+        "hesitation_rate": float(hesitation_rate)
+    }
+
 def calculate_confidence_score(stability, consistency, pauses_pm, clarity, hesitation_rate):
     """Calculate overall confidence score"""
     # Weighted scoring
@@ -184,5 +309,11 @@ if __name__ == "__main__":
     
     audio_path = sys.argv[1]
     transcription = sys.argv[2]
-    result = analyze_confidence(audio_path, transcription)
+    stream = "--stream" in sys.argv[3:]
+    vad = "--vad" in sys.argv[3:]
+    sample = "--sample" in sys.argv[3:]
+    quality = parse_quality(sys.argv[3:])
+    result = analyze_confidence(
+        audio_path, transcription, stream=stream, quality=quality, vad=vad, sample=sample
+    )
     print(json.dumps(result))
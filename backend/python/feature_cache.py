@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Feature Cache
+On-disk store for intermediate feature arrays, keyed by the SHA-256 of the
+audio file, the sample rate and the feature parameters
+
+Entries are compressed .npz files evicted least-recently-used first once the
+cache grows past its disk budget. Within one FeatureStore, features are also
+memoized in memory, and the spectral features are derived from a single
+shared STFT magnitude instead of each running its own. Configure with
+environment variables:
+    FEATURE_CACHE_DIR     cache directory (default: <tmp>/stutterless-feature-cache)
+    FEATURE_CACHE_MAX_MB  disk budget in MB; 0 disables the cache (default: 256)
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+import librosa
+from pathlib import Path
+
+import startup
+from profiling import stage
+from quality import (
+    DEFAULT_QUALITY, get_profile, get_samplerate, load_audio, resample_audio, target_sample_rate
+)
+from result_cache import audio_digest
+
+CACHE_DIR = os.environ.get(
+    "FEATURE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "stutterless-feature-cache")
+)
+CACHE_MAX_BYTES = int(float(os.environ.get("FEATURE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+# Largest STFT magnitude a store keeps for reuse; longer recordings compute
+# each spectral feature from the samples instead (blockwise where it matters)
+MAGNITUDE_MAX_BYTES = 256 * 1024 * 1024
+
+def cache_enabled():
+    return CACHE_MAX_BYTES > 0
+
+def _entry_path(key):
+    return Path(CACHE_DIR) / f"{key}.npz"
+
+def load_entry(key):
+    """Return the cached array for key, or None on a miss"""
+    path = _entry_path(key)
+    try:
+        with np.load(path) as data:
+            value = data["value"]
+        # Refresh the timestamp so eviction is least-recently-used
+        os.utime(path)
+        return value
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Corrupt or partially written entry: drop it and recompute
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+
+def store_entry(key, value):
+    """Persist an array under key and enforce the disk budget"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, value=value)
+        os.replace(temp_path, _entry_path(key))
+        evict(CACHE_MAX_BYTES)
+    except OSError:
+        # The cache is an optimization; never fail an analysis over it
+        pass
+
+def evict(max_bytes):
+    """Delete least-recently-used entries until the cache fits max_bytes"""
+    entries = []
+    for path in Path(CACHE_DIR).glob("*.npz"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            pass
+
+class FeatureStore:
+    """
+    Read-through feature access for one audio file
+
+    The audio is only decoded when a requested feature is not cached, so a
+    re-run whose features are all cached skips decoding entirely (unless
+    persist is False: memory only). Features use the sample rate and frame
+    sizes of the quality profile (see quality).
+
+    Each feature is computed at most once per store: results are memoized,
+    the STFT magnitude is shared by the spectral centroid and pitch, and the
+    non-silent intervals reuse the frame RMS. Analyzers of the same audio
+    can share one store so they reuse each other's features.
+    """
+
+    def __init__(self, audio_file_path, y=None, sr=None, quality=DEFAULT_QUALITY, persist=True):
+        self.audio_file_path = audio_file_path
+        self.quality = quality
+        self.persist = persist
+        self.profile = get_profile(quality)
+        self.n_fft = self.profile["n_fft"]
+        self.hop_length = self.profile["hop_length"]
+        self._y = y
+        self._sr = sr
+        self._digest = None
+        self._voiced_mask = None
+        self._magnitude = None
+        self._memo = {}
+
+    def audio(self):
+        """Decoded (y, sr) at the profile's sample rate, loading the file on first use"""
+        if self._y is None:
+            with stage("load"):
+                self._y, self._sr = load_audio(self.audio_file_path, self.quality)
+        elif target_sample_rate(self._sr, self.quality) != self._sr:
+            with stage("load"):
+                self._y, self._sr = resample_audio(self._y, self._sr, self.quality)
+        return self._y, self._sr
+
+    @property
+    def sr(self):
+        """Analysis sample rate"""
+        if self._sr is None:
+            self._sr = get_samplerate(self.audio_file_path)
+        return target_sample_rate(self._sr, self.quality)
+
+    def get(self, name, params, compute):
+        """
+        Return a feature array, computing and caching it on a miss
+
+        Args:
+            name: Feature name
+            params: JSON-serializable parameters that affect the result
+            compute: Function (y, sr) -> array-like
+        """
+        memo_key = (name, json.dumps(params, sort_keys=True))
+        if memo_key not in self._memo:
+            self._memo[memo_key] = self._load_or_compute(name, params, compute)
+        return self._memo[memo_key]
+
+    def _load_or_compute(self, name, params, compute):
+        if not self.persist or not cache_enabled():
+            y, sr = self.audio()
+            return np.asarray(compute(y, sr))
+
+        if self._digest is None:
+            self._digest = audio_digest(self.audio_file_path)
+        key = hashlib.sha256(json.dumps({
+            "audio": self._digest,
+            "sr": self.sr,
+            "quality": self.profile,
+            "feature": name,
+            "params": params
+        }, sort_keys=True).encode("utf-8")).hexdigest()
+
+        value = load_entry(key)
+        if value is None:
+            y, sr = self.audio()
+            value = np.asarray(compute(y, sr))
+            store_entry(key, value)
+        return value
+
+    def magnitude(self, compute=True):
+        """
+        STFT magnitude at the profile's frame settings, computed once per store
+
+        Returns None when compute is False and no feature has needed it yet,
+        or when the recording is too long to hold it (MAGNITUDE_MAX_BYTES).
+        """
+        if self._magnitude is None and compute:
+            y, _ = self.audio()
+            n_frames = 1 + len(y) // self.hop_length
+            if n_frames * (self.n_fft // 2 + 1) * 4 <= MAGNITUDE_MAX_BYTES:
+                with stage("stft"):
+                    self._magnitude = np.abs(librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length))
+        return self._magnitude
+
+    def duration(self):
+        """Duration in seconds"""
+        return float(self.get("duration", {}, lambda y, sr: librosa.get_duration(y=y, sr=sr)))
+
+    def rms(self):
+        """Frame RMS energy"""
+        return self.get(
+            "rms", {"frame_length": self.n_fft, "hop_length": self.hop_length},
+            lambda y, sr: librosa.feature.rms(y=y, frame_length=self.n_fft, hop_length=self.hop_length)[0]
+        )
+
+    def spectral_centroid(self, voiced_only=False):
+        """Frame spectral centroid (of the voiced frames only if voiced_only, see vad)"""
+        if voiced_only:
+            mask = self.voiced_mask()
+            return self.get(
+                "spectral_centroid",
+                {"n_fft": self.n_fft, "hop_length": self.hop_length, "vad": self.vad_params()},
+                lambda y, sr: self._masked_centroid(y, sr, mask)
+            )
+        return self.get(
+            "spectral_centroid", {"n_fft": self.n_fft, "hop_length": self.hop_length},
+            lambda y, sr: self._centroid(y, sr, self.magnitude())
+        )
+
+    def _centroid(self, y, sr, S):
+        if S is None:
+            return librosa.feature.spectral_centroid(
+                y=y, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length
+            )[0]
+        return librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length)[0]
+
+    def _masked_centroid(self, y, sr, mask):
+        # Select the voiced columns when another feature already paid for
+        # the full STFT; otherwise transform the voiced frames only
+        S = self.magnitude(compute=False)
+        if S is not None:
+            return self._centroid(y, sr, S[:, mask])
+
+        from vad import masked_frames
+        return masked_frames(
+            y, mask, self.n_fft, self.hop_length,
+            lambda segment: librosa.feature.spectral_centroid(
+                y=segment, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length, center=False
+            )[0]
+        )
+
+    def zero_crossing_rate(self):
+        """Frame zero-crossing rate"""
+        return self.get(
+            "zero_crossing_rate", {"frame_length": self.n_fft, "hop_length": self.hop_length},
+            lambda y, sr: librosa.feature.zero_crossing_rate(
+                y, frame_length=self.n_fft, hop_length=self.hop_length
+            )[0]
+        )
+
+    def vad_params(self):
+        """Parameters that determine voiced_mask output (feature cache key)"""
+        from vad import VAD_PAD_FRAMES, VAD_TOP_DB
+        return {"top_db": VAD_TOP_DB, "pad_frames": VAD_PAD_FRAMES}
+
+    def voiced_mask(self):
+        """Voiced flag per frame from the cached frame RMS (see vad)"""
+        from vad import voiced_mask
+        if self._voiced_mask is None:
+            self._voiced_mask = voiced_mask(self.rms(), **self.vad_params())
+        return self._voiced_mask
+
+    def nonsilent_intervals(self, top_db):
+        """Sample intervals of librosa.effects.split, from the frame RMS"""
+        return self.get(
+            "nonsilent_intervals",
+            {"top_db": top_db, "frame_length": self.n_fft, "hop_length": self.hop_length},
+            lambda y, sr: split_intervals(self.rms(), top_db, self.hop_length, len(y))
+        )
+
+def split_intervals(rms, top_db, hop_length, n_samples):
+    """
+    librosa.effects.split on precomputed frame RMS
+
+    effects.split frames the signal and takes the same RMS that rms()
+    returns; this is its interval logic without that second pass.
+    """
+    non_silent = librosa.amplitude_to_db(rms, ref=np.max, top_db=None) > -top_db
+
+    edges = [np.flatnonzero(np.diff(non_silent.astype(int))) + 1]
+    if non_silent[0]:
+        edges.insert(0, np.array([0]))
+    if non_silent[-1]:
+        edges.append(np.array([len(non_silent)]))
+    edges = librosa.frames_to_samples(np.concatenate(edges), hop_length=hop_length)
+    return np.minimum(edges, n_samples).reshape((-1, 2))
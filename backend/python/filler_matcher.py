@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Filler Matcher
+Single-pass matcher for single- and multi-word filler phrases, shared by
+fluency and confidence analysis
+"""
+
+import string
+from collections import Counter
+from functools import lru_cache
+
+# Punctuation stripped from token edges before matching ("um," -> "um")
+TOKEN_PUNCTUATION = string.punctuation + "‘’“”…"
+
+def tokenize(text):
+    """Lowercase whitespace tokens with surrounding punctuation removed"""
+    return [token.strip(TOKEN_PUNCTUATION) for token in text.lower().split()]
+
+class FillerMatcher:
+    """
+    Token trie over filler phrases
+
+    Phrases only match on whole tokens, so "you know" never matches inside
+    "you knowingly". At each position the longest phrase wins and matching
+    resumes after it, so every token is examined once per phrase length.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = list(dict.fromkeys(phrase.lower().strip() for phrase in phrases))
+        self.trie = {}
+        for phrase in self.phrases:
+            node = self.trie
+            for token in phrase.split():
+                node = node.setdefault(token, {})
+            # None is never a token, so it marks the end of a phrase
+            node[None] = phrase
+
+    def count_tokens(self, tokens):
+        """Count phrase occurrences in a token list"""
+        counts = Counter()
+        i = 0
+        n = len(tokens)
+        while i < n:
+            node = self.trie
+            match, match_end = None, i
+            j = i
+            while j < n and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if None in node:
+                    match, match_end = node[None], j
+            if match is None:
+                i += 1
+            else:
+                counts[match] += 1
+                i = match_end
+        return counts
+
+    def count(self, text):
+        """Count phrase occurrences in text"""
+        return self.count_tokens(tokenize(text))
+
+@lru_cache(maxsize=16)
+def get_matcher(phrases):
+    """Compiled matcher for a tuple of phrases (cached)"""
+    return FillerMatcher(phrases)
@@ -5,9 +5,15 @@ Analyzes speech for filler words, pauses, repetitions, and overall fluency
 """
 
 import sys
+import csv
 import json
-import re
-from collections import Counter
+import itertools
+import multiprocessing
+from functools import partial
+
+from filler_matcher import get_matcher, tokenize
+from profiling import profiled, stage
+from result_cache import cached
 
 # Common filler words and phrases
 FILLER_WORDS = [
@@ -16,12 +22,18 @@ FILLER_WORDS = [
     'right', 'okay', 'so', 'well', 'just'
 ]
 
-def analyze_fluency(transcription):
+# Transcripts handed to a batch worker at a time
+BATCH_CHUNKSIZE = 256
+
+@cached("fluency_analysis")
+@profiled("fluency_analysis")
+def analyze_fluency(transcription, filler_words=None):
     """
     Analyze speech fluency
     
     Args:
         transcription: Text transcription of speech
+        filler_words: Optional filler words/phrases (default: FILLER_WORDS)
         
     Returns:
         dict: Fluency analysis results
@@ -44,50 +56,44 @@ def analyze_fluency(transcription):
                 "error": "No words in transcription"
             }
         
-        # Detect filler words
-        filler_count = 0
-        detected_fillers = []
-        
-        for filler in FILLER_WORDS:
-            # Count occurrences
-            if ' ' in filler:
-                # Multi-word filler
-                count = text_lower.count(filler)
-            else:
-                # Single word filler (match whole words only)
-                count = sum(1 for word in words if word == filler)
+        with stage("features"):
+            # Detect filler words in a single pass over the tokens
+            matcher = get_matcher(tuple(filler_words or FILLER_WORDS))
+            filler_counts = matcher.count_tokens(tokenize(text_lower))
+            filler_count = 0
+            detected_fillers = []
             
-            if count > 0:
-                filler_count += count
-                detected_fillers.append({
-                    "word": filler,
-                    "count": count
-                })
-        
-        # Calculate filler word percentage
-        filler_percentage = (filler_count / total_words) * 100
-        
-        # Detect repetitions (same word used consecutively)
-        repetitions = 0
-        for i in range(len(words) - 1):
-            if words[i] == words[i + 1] and len(words[i]) > 2:
-                repetitions += 1
+            for filler in matcher.phrases:
+                count = filler_counts[filler]
+                if count > 0:
+                    filler_count += count
+                    detected_fillers.append({
+                        "word": filler,
+                        "count": count
+                    })
+            
+            # Calculate filler word percentage
+            filler_percentage = (filler_count / total_words) * 100
+            
+            # Detect repetitions (same word used consecutively)
+            repetitions = 0
+            for i in range(len(words) - 1):
+                if words[i] == words[i + 1] and len(words[i]) > 2:
+                    repetitions += 1
         
-        # Calculate fluency score (0-100)
-        # Lower filler percentage = higher score
-        # Penalize for repetitions
-        base_score = max(0, 100 - (filler_percentage * 2))
-        repetition_penalty = min(repetitions * 5, 20)
-        fluency_score = max(0, min(100, base_score - repetition_penalty))
+        with stage("scoring"):
+            # Calculate fluency score (0-100)
+            fluency_score = calculate_fluency_score(filler_percentage, repetitions)
         
         # Generate feedback
-        feedback = generate_fluency_feedback(
-            fluency_score,
-            filler_percentage,
-            filler_count,
-            repetitions,
-            total_words
-        )
+        with stage("feedback"):
+            feedback = generate_fluency_feedback(
+                fluency_score,
+                filler_percentage,
+                filler_count,
+                repetitions,
+                total_words
+            )
         
         return {
             "success": True,
@@ -97,7 +103,11 @@ def analyze_fluency(transcription):
             "fillerPercentage": round(filler_percentage, 2),
             "repetitions": repetitions,
             "totalWords": total_words,
-            "feedback": feedback
+            "feedback": feedback,
+            "metrics": {
+                "filler_percentage": float(filler_percentage),
+                "repetitions": repetitions
+            }
         }
         
     except Exception as e:
@@ -106,6 +116,119 @@ def analyze_fluency(transcription):
             "error": f"Fluency analysis error: {str(e)}"
         }
 
+def calculate_fluency_score(filler_percentage, repetitions):
+    """Calculate fluency score from filler percentage and repetitions"""
+    # Lower filler percentage = higher score
+    # Penalize for repetitions
+    base_score = max(0, 100 - (filler_percentage * 2))
+    repetition_penalty = min(repetitions * 5, 20)
+    return max(0, min(100, base_score - repetition_penalty))
+
+def _analyze_uncached(transcription, filler_words=None):
+    """analyze_fluency without the result cache (batch transcripts are rarely repeated)"""
+    return analyze_fluency.__wrapped__(transcription, filler_words=filler_words)
+
+def analyze_fluency_batch(transcriptions, processes=None, chunksize=BATCH_CHUNKSIZE,
+                          filler_words=None):
+    """
+    Analyze many transcriptions across a process pool
+    
+    Input is consumed lazily, a bounded window at a time, so memory does not
+    grow with the number of transcriptions.
+    
+    Args:
+        transcriptions: Iterable of transcription strings
+        processes: Worker processes (default: CPU count; 1 runs inline)
+        chunksize: Transcriptions per task sent to a worker
+        filler_words: Optional filler words/phrases (default: FILLER_WORDS)
+        
+    Yields:
+        dict: analyze_fluency result for each transcription, in input order
+    """
+    analyze = partial(_analyze_uncached, filler_words=filler_words)
+    transcriptions = iter(transcriptions)
+    processes = processes or multiprocessing.cpu_count()
+    
+    if processes == 1:
+        for transcription in transcriptions:
+            yield analyze(transcription)
+        return
+    
+    window_size = chunksize * processes * 2
+    with multiprocessing.Pool(processes) as pool:
+        while True:
+            window = list(itertools.islice(transcriptions, window_size))
+            if not window:
+                break
+            yield from pool.imap(analyze, window, chunksize)
+
+def read_batch_records(stream, input_format):
+    """
+    Read (id, transcription, error) records from JSONL or CSV
+    
+    JSONL lines and CSV rows carry "transcription" (or "text") and an
+    optional "id"; the line/row number is used when id is missing.
+    """
+    if input_format == "csv":
+        rows = enumerate(csv.DictReader(stream), start=1)
+        for number, row in rows:
+            text = row.get("transcription", row.get("text"))
+            yield row.get("id") or number, text or "", None if text is not None else "Missing transcription"
+        return
+    
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("record must be a JSON object")
+        except ValueError as e:
+            yield number, "", f"Invalid record: {str(e)}"
+            continue
+        text = record.get("transcription", record.get("text"))
+        error = None if isinstance(text, str) else "Missing transcription"
+        yield record.get("id", number), text if error is None else "", error
+
+def run_batch(argv):
+    """Batch CLI: stream JSONL results for JSONL/CSV transcripts"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog="fluency_analysis.py --batch",
+        description="Analyze transcripts in bulk, writing one JSON result per line"
+    )
+    parser.add_argument("input", nargs="?", default="-",
+                        help="JSONL or CSV file of transcripts ('-' or omitted: stdin)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Input format (default: from file extension, else jsonl)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=BATCH_CHUNKSIZE,
+                        help=f"Transcripts per worker task (default: {BATCH_CHUNKSIZE})")
+    options = parser.parse_args(argv)
+    
+    input_format = options.format
+    if input_format is None:
+        input_format = "csv" if options.input.lower().endswith(".csv") else "jsonl"
+    
+    stream = sys.stdin if options.input == "-" else open(options.input, newline="", encoding="utf-8")
+    try:
+        # One copy of the records feeds the pool, the other pairs ids with results
+        records, pending = itertools.tee(read_batch_records(stream, input_format))
+        results = analyze_fluency_batch(
+            (text for _, text, _ in records),
+            processes=options.workers,
+            chunksize=max(1, options.chunksize)
+        )
+        for (record_id, _, error), result in zip(pending, results):
+            if error:
+                result = {"success": False, "error": error}
+            sys.stdout.write(json.dumps({"id": record_id, "result": result}) + "\n")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
 def generate_fluency_feedback(score, filler_pct, filler_count, repetitions, total_words):
     """Generate human-readable feedback"""
     feedback = []
@@ -132,6 +255,10 @@ def generate_fluency_feedback(score, filler_pct, filler_count, repetitions, tota
     return " ".join(feedback)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        run_batch(sys.argv[2:])
+        sys.exit(0)
+    
     if len(sys.argv) < 2:
         print(json.dumps({
             "success": False,
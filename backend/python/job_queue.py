@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Analysis Job Queue
+Durable local queue that takes analysis out of the HTTP request: the backend
+enqueues a job and returns, worker processes run it, and clients poll the
+job's status
+
+Jobs live in a SQLite file and use the worker's job format ("script" and
+"args", see worker). Lower priorities run first; by default the priority is
+the recording's duration in seconds, so short clips overtake long lectures.
+A claimed job stays invisible to other workers for a visibility timeout that
+its worker keeps extending while it runs; a job whose worker died becomes
+visible again and is retried, as is a job that returned an error, until it
+has had ANALYSIS_QUEUE_MAX_ATTEMPTS attempts. Producers are refused with a
+retry-after hint while ANALYSIS_QUEUE_MAX_DEPTH jobs are waiting or running.
+A finished job is kept until the backend has saved its results and collected
+it, then forgotten a day later.
+
+    python job_queue.py serve [--workers N]       run the worker processes
+    python job_queue.py enqueue '<job json>'      {"id", "script", "args", "priority"}
+    python job_queue.py status <job id>
+    python job_queue.py collect <job id>
+    python job_queue.py stats
+
+Configure with environment variables:
+    ANALYSIS_QUEUE_PATH                 SQLite file (default: <tmp>/stutterless-jobs.sqlite3)
+    ANALYSIS_QUEUE_WORKERS              worker processes of serve (default: available CPUs)
+    ANALYSIS_QUEUE_MAX_DEPTH            waiting and running jobs before producers back off (default: 100)
+    ANALYSIS_QUEUE_VISIBILITY_SECONDS   lease of a claimed job without a heartbeat (default: 120)
+    ANALYSIS_QUEUE_MAX_ATTEMPTS         attempts per job (default: 3)
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import signal
+import sqlite3
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+import startup
+
+QUEUE_PATH = os.environ.get(
+    "ANALYSIS_QUEUE_PATH",
+    os.path.join(tempfile.gettempdir(), "stutterless-jobs.sqlite3")
+)
+QUEUE_MAX_DEPTH = int(os.environ.get("ANALYSIS_QUEUE_MAX_DEPTH", "100"))
+VISIBILITY_SECONDS = float(os.environ.get("ANALYSIS_QUEUE_VISIBILITY_SECONDS", "120"))
+MAX_ATTEMPTS = int(os.environ.get("ANALYSIS_QUEUE_MAX_ATTEMPTS", "3"))
+
+# First retry delay after a failed attempt; doubles on every further attempt
+RETRY_BACKOFF_SECONDS = 5.0
+
+# Seconds an idle worker waits before looking for a job again
+POLL_SECONDS = 0.5
+
+# Collected jobs, and failed jobs, are deleted after this long
+RETENTION_SECONDS = 24 * 3600
+
+# Retry-after hint while no job has finished yet to estimate it from
+DEFAULT_RETRY_AFTER = 5
+
+# Recycle a worker process after this many jobs to bound memory growth
+# (same default as worker)
+DEFAULT_MAX_JOBS = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    script TEXT NOT NULL,
+    args TEXT NOT NULL,
+    priority REAL NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    visible_at REAL NOT NULL,
+    lease TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    collected_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority, visible_at);
+"""
+
+class QueueFullError(Exception):
+    """Raised by enqueue while the queue is at its maximum depth"""
+
+    def __init__(self, depth, retry_after):
+        super().__init__(f"Analysis queue is full ({depth} jobs); retry in {retry_after}s")
+        self.depth = depth
+        self.retry_after = retry_after
+
+def recording_priority(args):
+    """Default priority of a job: duration in seconds of its recording (0 when unknown)"""
+    path = next((arg for arg in args if isinstance(arg, str) and not arg.startswith("--")), None)
+    if path is None or not os.path.isfile(path):
+        return 0.0
+    try:
+        # The header is enough for WAV/FLAC/OGG and the PCM store; other
+        # containers go through the full duration probe
+        import pcm_store
+        if not pcm_store.is_pcm(path):
+            import soundfile as sf
+            return float(sf.info(path).duration)
+    except Exception:
+        pass
+    try:
+        from quality import get_duration
+        return float(get_duration(path))
+    except Exception:
+        return 0.0
+
+class JobQueue:
+    """
+    SQLite-backed job queue shared by producer and worker processes
+
+    Job states: queued -> running -> done | failed; a running job whose
+    lease expires, or whose attempt failed, is queued again while attempts
+    remain.
+    """
+
+    def __init__(self, path=QUEUE_PATH, max_depth=QUEUE_MAX_DEPTH,
+                 visibility_seconds=VISIBILITY_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_depth = max_depth
+        self.visibility_seconds = visibility_seconds
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit; multi-statement changes take the write lock explicitly
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        # Queue files created before jobs were collected lack the column
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(jobs)")}
+        if "collected_at" not in columns:
+            try:
+                self.db.execute("ALTER TABLE jobs ADD COLUMN collected_at REAL")
+            except sqlite3.OperationalError:
+                # Another process added it first
+                pass
+
+    def close(self):
+        self.db.close()
+
+    def _transaction(self):
+        """Context manager holding the write lock (BEGIN IMMEDIATE ... COMMIT)"""
+        queue = self
+
+        class Transaction:
+            def __enter__(self):
+                queue.db.execute("BEGIN IMMEDIATE")
+                return queue.db
+
+            def __exit__(self, exc_type, exc, tb):
+                queue.db.execute("ROLLBACK" if exc_type else "COMMIT")
+                return False
+
+        return Transaction()
+
+    def depth(self):
+        """Jobs waiting or running"""
+        return self.db.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchone()[0]
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: the mean run time of recent jobs"""
+        mean = self.db.execute(
+            "SELECT AVG(finished_at - started_at) FROM (SELECT finished_at, started_at FROM jobs "
+            "WHERE status = 'done' ORDER BY finished_at DESC LIMIT 50)"
+        ).fetchone()[0]
+        return max(1, math.ceil(mean)) if mean is not None else DEFAULT_RETRY_AFTER
+
+    def enqueue(self, script, args, job_id=None, priority=None):
+        """
+        Add a job
+
+        Enqueueing an id that is already waiting, running or done returns
+        that job unchanged; a failed job with the same id is queued again.
+
+        Args:
+            script: Worker script name (see worker.SCRIPTS)
+            args: Script arguments, as on its command line
+            job_id: Job id (default: a new UUID)
+            priority: Lower runs first (default: recording_priority(args))
+
+        Returns:
+            dict: The job's status (see status)
+
+        Raises:
+            QueueFullError: When max_depth jobs are waiting or running
+        """
+        job_id = job_id or str(uuid.uuid4())
+        row = self.db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if priority is None and (row is None or row["status"] == "failed"):
+            # Probe the recording only for a new job, and outside the write lock
+            priority = recording_priority(args)
+        now = time.time()
+
+        with self._transaction() as db:
+            row = db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row["status"] == "failed":
+                if priority is None:
+                    priority = recording_priority(args)
+                depth = self.depth()
+                if depth >= self.max_depth:
+                    raise QueueFullError(depth, self.retry_after())
+                db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                db.execute(
+                    "INSERT INTO jobs (id, script, args, priority, status, max_attempts, visible_at, created_at) "
+                    "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                    (job_id, script, json.dumps(args), float(priority), self.max_attempts, now, now)
+                )
+            # Forget jobs whose results were collected long ago; a done job
+            # nobody collected keeps its results
+            db.execute(
+                "DELETE FROM jobs WHERE collected_at < ? OR (status = 'failed' AND finished_at < ?)",
+                (now - RETENTION_SECONDS, now - RETENTION_SECONDS)
+            )
+        return self.status(job_id)
+
+    def claim(self):
+        """
+        Take the next visible job for this worker
+
+        Returns:
+            dict: {id, script, args, attempts, lease}, or None when no job
+            is ready; lease must be passed back to extend/complete/fail
+        """
+        now = time.time()
+        with self._transaction() as db:
+            # Jobs whose last allowed attempt ran out of time are given up
+            db.execute(
+                "UPDATE jobs SET status = 'failed', lease = NULL, finished_at = ?, "
+                "error = 'Job timed out after ' || attempts || ' attempt(s)' "
+                "WHERE status = 'running' AND visible_at <= ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            row = db.execute(
+                "SELECT id, script, args, attempts FROM jobs "
+                "WHERE status IN ('queued', 'running') AND visible_at <= ? "
+                "ORDER BY priority, created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            lease = uuid.uuid4().hex
+            db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease = ?, "
+                "visible_at = ?, started_at = ? WHERE id = ?",
+                (lease, now + self.visibility_seconds, now, row["id"])
+            )
+        return {
+            "id": row["id"],
+            "script": row["script"],
+            "args": json.loads(row["args"]),
+            "attempts": row["attempts"] + 1,
+            "lease": lease
+        }
+
+    def extend(self, job_id, lease):
+        """Push back a running job's visibility timeout; False when the lease was lost"""
+        cursor = self.db.execute(
+            "UPDATE jobs SET visible_at = ? WHERE id = ? AND lease = ? AND status = 'running'",
+            (time.time() + self.visibility_seconds, job_id, lease)
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id, lease, result):
+        """Store a job's result; False when the lease was lost (another worker retried it)"""
+        cursor = self.db.execute(
+            "UPDATE jobs SET status = 'done', lease = NULL, finished_at = ?, result = ?, error = NULL "
+            "WHERE id = ? AND lease = ? AND status = 'running'",
+            (time.time(), json.dumps(result), job_id, lease)
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id, lease, error):
+        """
+        Record a failed attempt: the job is retried after a backoff while
+        attempts remain, else it fails for good
+
+        Returns:
+            bool: False when the lease was lost
+        """
+        now = time.time()
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease = ? AND status = 'running'",
+                (job_id, lease)
+            ).fetchone()
+            if row is None:
+                return False
+            if row["attempts"] < row["max_attempts"]:
+                db.execute(
+                    "UPDATE jobs SET status = 'queued', lease = NULL, visible_at = ?, error = ? WHERE id = ?",
+                    (now + RETRY_BACKOFF_SECONDS * 2 ** (row["attempts"] - 1), error, job_id)
+                )
+            else:
+                db.execute(
+                    "UPDATE jobs SET status = 'failed', lease = NULL, finished_at = ?, error = ? WHERE id = ?",
+                    (now, error, job_id)
+                )
+        return True
+
+    def collect(self, job_id):
+        """
+        Mark a done job's results as saved by the backend, so the job can be
+        forgotten after RETENTION_SECONDS; False unless the job is done
+        """
+        cursor = self.db.execute(
+            "UPDATE jobs SET collected_at = COALESCE(collected_at, ?) WHERE id = ? AND status = 'done'",
+            (time.time(), job_id)
+        )
+        return cursor.rowcount > 0
+
+    def status(self, job_id):
+        """
+        Status of a job
+
+        Returns:
+            dict: {id, status, priority, attempts, ahead, result, error}
+            where ahead counts the waiting jobs that run first, or None for
+            an unknown id
+        """
+        row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        ahead = 0
+        if row["status"] == "queued":
+            ahead = self.db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND id != ? "
+                "AND (priority < ? OR (priority = ? AND created_at <= ?))",
+                (job_id, row["priority"], row["priority"], row["created_at"])
+            ).fetchone()[0]
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "priority": row["priority"],
+            "attempts": row["attempts"],
+            "ahead": ahead,
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"]
+        }
+
+    def stats(self):
+        """Job counts per status, the depth and the retry-after estimate"""
+        counts = dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "counts": {name: counts.get(name, 0) for name in ("queued", "running", "done", "failed")},
+            "depth": counts.get("queued", 0) + counts.get("running", 0),
+            "maxDepth": self.max_depth,
+            "retryAfter": self.retry_after()
+        }
+
+def analyze_upload(audio_file_path, pcm_ingest=False, segmented=False, **options):
+    """
+    Queue job entry point: transcribe an upload and run the full analysis,
+    the two steps of the backend's analyze request
+
+    Args:
+        audio_file_path: Path to the uploaded audio file
+        pcm_ingest: Decode once into a PCM file shared by both steps (see
+            pcm_store); the file is removed afterwards
+        segmented: Transcribe in segments (see segmented_transcription)
+        options: analyze_all options (stream, parallel, quality, vad, sample)
+
+    Returns:
+        dict: {success, transcription, analysis} where analysis is the
+        analyze_all result
+    """
+    from analyze_all import analyze_all
+    from speech_to_text import speech_to_text
+
+    path = audio_file_path
+    try:
+        if pcm_ingest:
+            import pcm_store
+            ingested = pcm_store.ingest_audio(audio_file_path, quality=options.get("quality", "precise"))
+            if ingested["success"]:
+                path = ingested["path"]
+
+        transcribed = speech_to_text(path, segmented=segmented)
+        if not transcribed["success"]:
+            return {
+                "success": False,
+                "error": f"Speech-to-text conversion failed: {transcribed['error']}"
+            }
+
+        analysis = analyze_all(path, transcribed["transcription"], **options)
+        if not analysis["success"]:
+            return analysis
+        return {
+            "success": True,
+            "transcription": transcribed["transcription"],
+            "analysis": analysis
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Queued analysis error: {str(e)}"
+        }
+    finally:
+        if path != audio_file_path and os.path.exists(path):
+            os.unlink(path)
+
+def queue_command(command, argument=None):
+    """
+    Producer-side commands for the backend (also the "job_queue" worker script)
+
+    Args:
+        command: "enqueue" (argument: job JSON with script, args and
+            optional id and priority), "status" (argument: job id),
+            "collect" (argument: job id, see JobQueue.collect) or "stats"
+
+    Returns:
+        dict: {success, job} for enqueue and status (job is None for an
+        unknown id, and for a job refused by a full queue, which adds depth
+        and retryAfter), {success, collected} for collect, {success, stats}
+        for stats
+    """
+    try:
+        queue = JobQueue()
+        try:
+            if command == "enqueue":
+                job = json.loads(argument)
+                try:
+                    return {
+                        "success": True,
+                        "job": queue.enqueue(
+                            job["script"], job.get("args") or [],
+                            job_id=job.get("id"), priority=job.get("priority")
+                        )
+                    }
+                except QueueFullError as e:
+                    # Not an error for the caller, which backs off for retryAfter seconds
+                    return {
+                        "success": True,
+                        "job": None,
+                        "depth": e.depth,
+                        "retryAfter": e.retry_after
+                    }
+            if command == "status":
+                return {"success": True, "job": queue.status(argument)}
+            if command == "collect":
+                return {"success": True, "collected": queue.collect(argument)}
+            if command == "stats":
+                return {"success": True, "stats": queue.stats()}
+            raise ValueError(f"Unknown queue command: {command}")
+        finally:
+            queue.close()
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"Job queue error: {str(e)}"
+        }
+
+def heartbeat(queue_path, job_id, lease, interval, stopped):
+    """Extend a running job's lease every interval seconds until stopped is set"""
+    queue = JobQueue(queue_path)
+    try:
+        while not stopped.wait(interval):
+            if not queue.extend(job_id, lease):
+                break
+    finally:
+        queue.close()
+
+def work(queue_path=QUEUE_PATH, max_jobs=DEFAULT_MAX_JOBS, poll_seconds=POLL_SECONDS):
+    """Worker process: claim and run jobs until max_jobs have run"""
+    from worker import run_job, warm_up
+
+    # The supervisor handles Ctrl+C and SIGTERM; a worker just stops when terminated
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    warm_up()
+    queue = JobQueue(queue_path)
+    finished = 0
+    while finished < max_jobs:
+        job = queue.claim()
+        if job is None:
+            time.sleep(poll_seconds)
+            continue
+
+        stopped = threading.Event()
+        beat = threading.Thread(
+            target=heartbeat,
+            args=(queue_path, job["id"], job["lease"], queue.visibility_seconds / 3, stopped),
+            daemon=True
+        )
+        beat.start()
+        try:
+            result = run_job(job)["result"]
+        finally:
+            stopped.set()
+            beat.join()
+
+        if isinstance(result, dict) and result.get("success"):
+            queue.complete(job["id"], job["lease"], result)
+        else:
+            error = result.get("error") if isinstance(result, dict) else "empty result"
+            queue.fail(job["id"], job["lease"], error)
+        finished += 1
+    queue.close()
+
+def serve(workers, max_jobs=DEFAULT_MAX_JOBS, queue_path=QUEUE_PATH):
+    """Keep the worker processes running until interrupted, replacing any that exit"""
+    # Create the database before the workers race to
+    JobQueue(queue_path).close()
+
+    # Treat SIGTERM like Ctrl+C so the workers are stopped on shutdown
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    processes = []
+    try:
+        while True:
+            processes = [process for process in processes if process.is_alive()]
+            while len(processes) < workers:
+                process = multiprocessing.Process(target=work, args=(queue_path, max_jobs))
+                process.start()
+                processes.append(process)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # A job cut short here is retried once its lease expires
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+def main(argv=None):
+    from shared_executor import available_cpus
+
+    parser = argparse.ArgumentParser(description="Durable analysis job queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the worker processes")
+    serve_parser.add_argument("--workers", type=int,
+                              default=int(os.environ.get("ANALYSIS_QUEUE_WORKERS", "0")) or None,
+                              help="Worker processes (default: ANALYSIS_QUEUE_WORKERS or available CPUs)")
+    serve_parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS,
+                              help=f"Recycle a worker after this many jobs (default: {DEFAULT_MAX_JOBS})")
+    enqueue_parser = commands.add_parser("enqueue", help="Add a job")
+    enqueue_parser.add_argument("job", help='Job JSON: {"script", "args", "id", "priority"}')
+    status_parser = commands.add_parser("status", help="Print a job's status")
+    status_parser.add_argument("id", help="Job id")
+    collect_parser = commands.add_parser("collect", help="Mark a done job's results as saved")
+    collect_parser.add_argument("id", help="Job id")
+    commands.add_parser("stats", help="Print job counts")
+    options = parser.parse_args(argv)
+
+    if options.command == "serve":
+        serve(max(1, options.workers or available_cpus()), max(1, options.max_jobs))
+        return 0
+
+    argument = options.job if options.command == "enqueue" else getattr(options, "id", None)
+    print(json.dumps(queue_command(options.command, argument)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Live Analysis
+Incremental analysis of audio that arrives in chunks, for real-time feedback
+
+StreamingAnalyzer keeps the running statistics of the streaming analyzers
+(see audio_stream): each fed chunk is framed and merged into them, so an
+update costs O(chunk) and a snapshot O(1). A snapshot returns the same
+result fields as analyze_all in streaming mode for the audio fed so far.
+
+Command line: reads mono 16-bit little-endian PCM from stdin and prints one
+JSON snapshot per --interval seconds of audio (and a final one at EOF):
+
+    python live_analysis.py <sample_rate> [--interval=1] [--transcript-file=path]
+
+The transcript file, if given, is re-read before each snapshot, so a
+recognizer can keep appending the partial transcript to it.
+"""
+
+import sys
+import json
+import copy
+
+import startup
+from audio_stream import FRAME_LENGTH, HOP_LENGTH, RunningStats, SilenceTracker, update_features
+
+class StreamingAnalyzer:
+    """
+    Running pace, tone and confidence analysis of a live recording
+
+    Args:
+        sample_rate: Sample rate of the fed audio
+        hesitation_words: Optional hesitation words for confidence analysis
+    """
+
+    def __init__(self, sample_rate, hesitation_words=None):
+        import numpy as np
+
+        self.sample_rate = sample_rate
+        self.hesitation_words = hesitation_words
+        self.transcript = ""
+        self.total_samples = 0
+        self.stats = {
+            "rms": RunningStats(),
+            "pitch": RunningStats(),
+            "centroid": RunningStats(),
+            "zcr": RunningStats()
+        }
+        self.silence = SilenceTracker()
+
+        # Samples not yet covered by a whole frame; starts with the same
+        # padding as a centered analysis of the whole recording
+        self.pending = np.zeros(FRAME_LENGTH // 2, dtype=np.float32)
+
+    def feed(self, chunk):
+        """
+        Add a chunk of audio
+
+        Args:
+            chunk: Mono samples (int16, or float in [-1, 1]) or raw 16-bit
+                little-endian PCM bytes
+        """
+        import numpy as np
+        from pcm_store import to_float32
+
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            chunk = np.frombuffer(chunk, dtype="<i2")
+        chunk = np.asarray(chunk)
+        samples = to_float32(chunk if chunk.dtype == np.int16 else chunk.astype(np.float32, copy=False))
+        if len(samples) == 0:
+            return
+
+        self.total_samples += len(samples)
+        self.pending = np.concatenate((self.pending, samples))
+        if len(self.pending) < FRAME_LENGTH:
+            return
+
+        n_frames = 1 + (len(self.pending) - FRAME_LENGTH) // HOP_LENGTH
+        update_features(
+            self.pending[:(n_frames - 1) * HOP_LENGTH + FRAME_LENGTH], self.sample_rate, self.stats, self.silence
+        )
+        self.pending = self.pending[n_frames * HOP_LENGTH:]
+
+    def update_transcript(self, transcript):
+        """Replace the transcript so far (partial recognizer output)"""
+        self.transcript = transcript or ""
+
+    @property
+    def duration(self):
+        """Seconds of audio fed so far"""
+        return self.total_samples / self.sample_rate
+
+    def features(self):
+        """
+        stream_features()-style result for the audio fed so far
+
+        The trailing frames, which would be padded at the end of a recording,
+        are added to copies of the statistics; the running state is unchanged.
+        """
+        import numpy as np
+
+        stats = copy.deepcopy(self.stats)
+        silence = copy.deepcopy(self.silence)
+        tail = np.concatenate((self.pending, np.zeros(FRAME_LENGTH // 2, dtype=np.float32)))
+        if self.total_samples > 0 and len(tail) >= FRAME_LENGTH:
+            n_frames = 1 + (len(tail) - FRAME_LENGTH) // HOP_LENGTH
+            update_features(tail[:(n_frames - 1) * HOP_LENGTH + FRAME_LENGTH], self.sample_rate, stats, silence)
+
+        return {
+            "sr": self.sample_rate,
+            "duration": self.duration,
+            "silence": silence,
+            **stats
+        }
+
+    def snapshot(self):
+        """
+        Scores for the audio and transcript so far
+
+        Returns:
+            dict: {success, duration, fluency, pace, tone, confidence, overallScore}
+            like analyze_all (failed analyzers get the default score)
+        """
+        from analyze_all import calculate_overall_score, with_fallback
+        from fluency_analysis import analyze_fluency
+        from pace_analysis import analyze_pace
+        from tone_analysis import analyze_tone
+        from confidence_analysis import analyze_confidence
+
+        try:
+            features = self.features()
+            results = {
+                # Bypass the result cache: every snapshot's transcript is new
+                "fluency": with_fallback("fluency_analysis", analyze_fluency.__wrapped__(self.transcript)),
+                "pace": with_fallback(
+                    "pace_analysis",
+                    analyze_pace(None, self.transcript, stream=True, features=features)
+                ),
+                "tone": with_fallback(
+                    "tone_analysis",
+                    analyze_tone(None, stream=True, features=features)
+                ),
+                "confidence": with_fallback(
+                    "confidence_analysis",
+                    analyze_confidence(
+                        None, self.transcript, stream=True, features=features,
+                        hesitation_words=self.hesitation_words
+                    )
+                )
+            }
+
+            return {
+                "success": True,
+                "duration": round(self.duration, 2),
+                **results,
+                "overallScore": calculate_overall_score(results)
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Live analysis error: {str(e)}"
+            }
+
+def read_transcript(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "success": False,
+            "error": "Sample rate required"
+        }))
+        sys.exit(1)
+
+    sample_rate = int(sys.argv[1])
+    interval = 1.0
+    transcript_file = None
+    for arg in sys.argv[2:]:
+        if arg.startswith("--interval="):
+            interval = float(arg.split("=", 1)[1])
+        elif arg.startswith("--transcript-file="):
+            transcript_file = arg.split("=", 1)[1]
+
+    analyzer = StreamingAnalyzer(sample_rate)
+    chunk_bytes = max(2, int(interval * sample_rate)) * 2
+    leftover = b""
+    while True:
+        data = sys.stdin.buffer.read(chunk_bytes)
+        if not data:
+            break
+        # Keep sample alignment if a read ends mid-sample
+        data = leftover + data
+        leftover = data[len(data) - len(data) % 2:]
+        analyzer.feed(data[:len(data) - len(leftover)])
+        if transcript_file:
+            analyzer.update_transcript(read_transcript(transcript_file))
+        print(json.dumps(analyzer.snapshot()), flush=True)
+
+    if transcript_file:
+        analyzer.update_transcript(read_transcript(transcript_file))
+    print(json.dumps(analyzer.snapshot()), flush=True)
@@ -6,29 +6,52 @@ Analyzes speech pace (words per minute) and speaking rate variation
 
 import sys
 import json
-import librosa
 from pathlib import Path
 
+from profiling import profiled, stage
+from quality import DEFAULT_QUALITY, QUALITY_PROFILES, parse_quality
+from result_cache import cached
+
 # Optimal speaking pace ranges (words per minute)
 OPTIMAL_WPM_MIN = 120
 OPTIMAL_WPM_MAX = 150
 SLOW_WPM = 100
 FAST_WPM = 180
 
-def analyze_pace(audio_file_path, transcription):
+@cached("pace_analysis")
+@profiled("pace_analysis")
+def analyze_pace(audio_file_path, transcription, y=None, sr=None, stream=False, features=None,
+                 quality=DEFAULT_QUALITY, store=None, sample=False):
     """
     Analyze speech pace
     
     Args:
         audio_file_path: Path to audio file
         transcription: Text transcription
+        y: Optional pre-decoded audio samples (skips loading the file)
+        sr: Sample rate of y
+        stream: Read the file in blocks with bounded memory instead of
+            loading it whole (see audio_stream)
+        features: Optional stream_features() result to reuse in stream mode
+        quality: Quality profile for the full-load path (see quality)
+        store: Optional FeatureStore of the same audio and quality, shared
+            with the other analyzers so features are computed once
+        sample: Estimate recordings of SAMPLE_MIN_SECONDS or more from a
+            sample of windows and add confidence intervals (see sampling);
+            shorter recordings take the exact path
         
     Returns:
         dict: Pace analysis results
     """
     try:
-        # Check if file exists
-        if not Path(audio_file_path).exists():
+        if quality not in QUALITY_PROFILES:
+            return {
+                "success": False,
+                "error": f"Unknown quality profile: {quality}"
+            }
+        
+        # Check if file exists (not needed when stream features are supplied)
+        if not (stream and features is not None) and not Path(audio_file_path).exists():
             return {
                 "success": False,
                 "error": f"Audio file not found: {audio_file_path}"
@@ -40,11 +63,31 @@ def analyze_pace(audio_file_path, transcription):
                 "error": "Empty transcription"
             }
         
-        # Load audio file
-        y, sr = librosa.load(audio_file_path, sr=None)
+        # Estimate long recordings from a sample of windows (see sampling);
+        # shorter ones, or files that cannot seek, take the exact path
+        if sample and features is None:
+            from sampling import sample_features
+            features = sample_features(audio_file_path)
+            stream = stream or features is not None
+        
+        with stage("features"):
+            if stream:
+                # Accumulate statistics block by block
+                if features is None:
+                    from audio_stream import stream_features
+                    features = stream_features(audio_file_path)
+                duration_seconds = features["duration"]
+                energy_stats = (features["rms"].mean, features["rms"].std)
+            else:
+                # Features are read through the cache; the file is only
+                # decoded (unless the caller already did) on a cache miss
+                from feature_cache import FeatureStore
+                if store is None:
+                    store = FeatureStore(audio_file_path, y=y, sr=sr, quality=quality)
+                duration_seconds = store.duration()
+                energy = store.rms()
         
         # Calculate duration in minutes
-        duration_seconds = librosa.get_duration(y=y, sr=sr)
         duration_minutes = duration_seconds / 60.0
         
         if duration_minutes == 0:
@@ -53,22 +96,27 @@ def analyze_pace(audio_file_path, transcription):
                 "error": "Audio duration is zero"
             }
         
-        # Count words
-        word_count = len(transcription.split())
-        
-        # Calculate words per minute
-        wpm = word_count / duration_minutes
-        
-        # Calculate pace score (0-100)
-        pace_score = calculate_pace_score(wpm)
-        
-        # Analyze speech rate variation
-        variation_analysis = analyze_rate_variation(y, sr)
+        with stage("scoring"):
+            # Count words
+            word_count = len(transcription.split())
+            
+            # Calculate words per minute
+            wpm = word_count / duration_minutes
+            
+            # Calculate pace score (0-100)
+            pace_score = calculate_pace_score(wpm)
+            
+            # Analyze speech rate variation
+            if stream:
+                variation_analysis = describe_rate_variation(*energy_stats)
+            else:
+                variation_analysis = analyze_rate_variation(energy)
         
         # Generate feedback
-        feedback = generate_pace_feedback(wpm, pace_score, duration_seconds)
+        with stage("feedback"):
+            feedback = generate_pace_feedback(wpm, pace_score, duration_seconds)
         
-        return {
+        result = {
             "success": True,
             "score": round(pace_score),
             "wpm": round(wpm),
@@ -76,8 +124,15 @@ def analyze_pace(audio_file_path, transcription):
             "wordCount": word_count,
             "paceCategory": categorize_pace(wpm),
             "variation": variation_analysis,
-            "feedback": feedback
+            "feedback": feedback,
+            "metrics": {
+                "wpm": float(wpm)
+            }
         }
+        if stream and "windows" in features:
+            from sampling import with_intervals
+            result = with_intervals(result, features, lambda f: stream_metrics(f, word_count))
+        return result
         
     except Exception as e:
         return {
@@ -85,6 +140,19 @@ def analyze_pace(audio_file_path, transcription):
             "error": f"Pace analysis error: {str(e)}"
         }
 
+def stream_metrics(features, word_count):
+    """
+    Raw metrics of stream_features() output, without scoring or feedback;
+    the sampled-estimate bootstrap calls this once per resample
+    
+    Returns:
+        dict: {"wpm"}, or None when the duration is zero
+    """
+    duration_minutes = features["duration"] / 60.0
+    if duration_minutes == 0:
+        return None
+    return {"wpm": float(word_count / duration_minutes)}
+
 def calculate_pace_score(wpm):
     """Calculate pace score based on WPM"""
     if OPTIMAL_WPM_MIN <= wpm <= OPTIMAL_WPM_MAX:
@@ -116,30 +184,34 @@ def categorize_pace(wpm):
     else:
         return "Very Fast"
 
-def analyze_rate_variation(y, sr):
-    """Analyze speech rate variation"""
+def analyze_rate_variation(energy):
+    """Analyze speech rate variation from frame RMS energy"""
     try:
         # Simple variation analysis based on energy
         # More sophisticated analysis could use syllable detection
-        hop_length = 512
-        energy = librosa.feature.rms(y=y, hop_length=hop_length)[0]
-        
-        # Calculate coefficient of variation
         import numpy as np
-        if len(energy) > 0 and np.mean(energy) > 0:
-            cv = (np.std(energy) / np.mean(energy)) * 100
-            
-            if cv < 20:
-                return "Low variation (monotonous)"
-            elif cv < 40:
-                return "Moderate variation"
-            else:
-                return "High variation (dynamic)"
+        if len(energy) > 0:
+            return describe_rate_variation(np.mean(energy), np.std(energy))
         else:
             return "Unable to analyze"
     except:
         return "Unable to analyze"
 
+def describe_rate_variation(mean_energy, std_energy):
+    """Describe rate variation from the energy mean and standard deviation"""
+    if mean_energy > 0:
+        # Calculate coefficient of variation
+        cv = (std_energy / mean_energy) * 100
+        
+        if cv < 20:
+            return "Low variation (monotonous)"
+        elif cv < 40:
+            return "Moderate variation"
+        else:
+            return "High variation (dynamic)"
+    else:
+        return "Unable to analyze"
+
 def generate_pace_feedback(wpm, score, duration):
     """Generate human-readable feedback"""
     feedback = []
@@ -175,5 +247,8 @@ if __name__ == "__main__":
     
     audio_path = sys.argv[1]
     transcription = sys.argv[2]
-    result = analyze_pace(audio_path, transcription)
+    stream = "--stream" in sys.argv[3:]
+    sample = "--sample" in sys.argv[3:]
+    quality = parse_quality(sys.argv[3:])
+    result = analyze_pace(audio_path, transcription, stream=stream, quality=quality, sample=sample)
     print(json.dumps(result))
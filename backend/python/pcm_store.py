@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Canonical PCM Store
+Converts an upload once into a raw mono PCM file that the analyzers open
+with numpy.memmap, so compressed formats are decoded a single time and the
+samples are shared through the OS page cache
+
+File layout (little-endian):
+    32-byte header: magic "SLPM", version, dtype code, sample rate, sample count
+    samples: float32 in [-1, 1] or int16
+"""
+
+import os
+import sys
+import json
+import struct
+from pathlib import Path
+
+from quality import DEFAULT_QUALITY, load_audio, parse_quality, target_sample_rate
+
+PCM_EXTENSION = ".pcm"
+PCM_MAGIC = b"SLPM"
+PCM_VERSION = 1
+
+# magic, version, dtype code, sample rate, sample count, padding to 32 bytes
+HEADER = struct.Struct("<4sHHIQ12x")
+
+DTYPE_CODES = {"float32": 0, "int16": 1}
+DTYPE_NAMES = {code: name for name, code in DTYPE_CODES.items()}
+
+def is_pcm(audio_file_path):
+    """Whether a path names a canonical PCM file"""
+    return Path(audio_file_path).suffix.lower() == PCM_EXTENSION
+
+def read_header(audio_file_path):
+    """
+    Read a canonical PCM header
+
+    Returns:
+        dict: sample_rate, dtype ("float32" or "int16"), samples
+    """
+    with open(audio_file_path, "rb") as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError("Truncated PCM header")
+
+    magic, version, dtype_code, sample_rate, samples = HEADER.unpack(header)
+    if magic != PCM_MAGIC or version != PCM_VERSION or dtype_code not in DTYPE_NAMES:
+        raise ValueError("Not a canonical PCM file")
+    return {"sample_rate": sample_rate, "dtype": DTYPE_NAMES[dtype_code], "samples": samples}
+
+def open_pcm(audio_file_path):
+    """
+    Memory-map the samples of a canonical PCM file (read-only, no copy)
+
+    Returns:
+        tuple: (np.memmap in the stored dtype, sample rate)
+    """
+    import numpy as np
+
+    header = read_header(audio_file_path)
+    if header["samples"] == 0:
+        return np.zeros(0, dtype=header["dtype"]), header["sample_rate"]
+    samples = np.memmap(
+        audio_file_path, dtype=np.dtype(header["dtype"]).newbyteorder("<"), mode="r",
+        offset=HEADER.size, shape=(header["samples"],)
+    )
+    return samples, header["sample_rate"]
+
+def to_float32(samples):
+    """float32 samples in [-1, 1]; float32 input is returned as is"""
+    import numpy as np
+
+    if samples.dtype == np.float32:
+        return samples
+    # Same scaling as librosa.util.buf_to_float
+    return samples.astype(np.float32) * np.float32(1 / 32768)
+
+def load_pcm(audio_file_path):
+    """Decoded (y, sr) of a canonical PCM file; float32 files are memory-mapped"""
+    samples, sample_rate = open_pcm(audio_file_path)
+    return to_float32(samples), sample_rate
+
+def read_wav(audio_file_path, dtype="float32"):
+    """
+    WAV fast path: read samples straight into the requested dtype
+
+    soundfile converts while reading, so there is no intermediate buffer in
+    another format; multichannel audio is averaged to mono.
+    """
+    import numpy as np
+    import soundfile as sf
+
+    samples, sample_rate = sf.read(audio_file_path, dtype=dtype, always_2d=False)
+    if samples.ndim > 1:
+        mono = samples.mean(axis=1, dtype=np.float32)
+        samples = mono if dtype == "float32" else np.round(mono).astype(dtype)
+    return samples, sample_rate
+
+def write_pcm(output_path, samples, sample_rate):
+    """Atomically write samples (float32 or int16) as a canonical PCM file"""
+    import numpy as np
+
+    dtype = np.dtype(samples.dtype).name
+    if dtype not in DTYPE_CODES:
+        raise ValueError(f"Unsupported PCM dtype: {dtype}")
+
+    output_path = Path(output_path)
+    temp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(HEADER.pack(PCM_MAGIC, PCM_VERSION, DTYPE_CODES[dtype], int(sample_rate), len(samples)))
+            np.ascontiguousarray(samples, dtype=np.dtype(dtype).newbyteorder("<")).tofile(f)
+        os.replace(temp_path, output_path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+def ingest_audio(audio_file_path, output_path=None, quality=DEFAULT_QUALITY, dtype="float32"):
+    """
+    Convert an audio file into a canonical PCM file
+
+    Args:
+        audio_file_path: Path to audio file
+        output_path: Destination (default: the input path with a .pcm suffix)
+        quality: Quality profile that sets the stored sample rate (see quality)
+        dtype: "float32" (memory-mapped without conversion) or "int16" (half
+            the size, converted to float32 when loaded)
+
+    Returns:
+        dict: {success, path, sampleRate, duration, dtype}
+    """
+    try:
+        import numpy as np
+
+        if not Path(audio_file_path).exists():
+            return {
+                "success": False,
+                "error": f"Audio file not found: {audio_file_path}"
+            }
+
+        if dtype not in DTYPE_CODES:
+            return {
+                "success": False,
+                "error": f"Unsupported PCM dtype: {dtype}"
+            }
+
+        if output_path is None:
+            output_path = Path(audio_file_path).with_suffix(PCM_EXTENSION)
+
+        samples, sample_rate = None, None
+        if Path(audio_file_path).suffix.lower() in (".wav", ".wave"):
+            import soundfile as sf
+            native_sr = sf.info(audio_file_path).samplerate
+            if target_sample_rate(native_sr, quality) == native_sr:
+                samples, sample_rate = read_wav(audio_file_path, dtype=dtype)
+
+        if samples is None:
+            y, sample_rate = load_audio(audio_file_path, quality)
+            if dtype == "int16":
+                samples = np.round(np.clip(y, -1, 1 - 1 / 32768) * 32768).astype(np.int16)
+            else:
+                samples = y
+
+        write_pcm(output_path, samples, sample_rate)
+
+        return {
+            "success": True,
+            "path": str(output_path),
+            "sampleRate": int(sample_rate),
+            "duration": round(len(samples) / sample_rate, 2),
+            "dtype": dtype
+        }
+
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"PCM ingest error: {str(e)}"
+        }
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "success": False,
+            "error": "Audio file path required"
+        }))
+        sys.exit(1)
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    audio_path = args[0]
+    output_path = args[1] if len(args) > 1 else None
+    dtype = next((arg.split("=", 1)[1] for arg in sys.argv[1:] if arg.startswith("--dtype=")), "float32")
+    result = ingest_audio(audio_path, output_path, quality=parse_quality(sys.argv[1:]), dtype=dtype)
+    print(json.dumps(result))
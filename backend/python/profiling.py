@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Analysis Profiling
+Opt-in per-stage wall time, CPU time and tracemalloc peak for the analyzers
+
+Enable with environment variables:
+    ANALYSIS_PROFILE=1                  add a "profile" block to analyzer results
+    ANALYSIS_PROFILE_SAMPLE_RATE=0.05   profile only this fraction of calls (default: 1)
+    ANALYSIS_PROFILE_DIR=/path          also dump a cProfile .prof file per call
+
+When disabled, @profiled calls the analyzer directly and stage() returns a
+shared no-op context manager.
+"""
+
+import os
+import time
+import random
+import functools
+import contextlib
+import tracemalloc
+
+PROFILE_ENABLED = os.environ.get("ANALYSIS_PROFILE", "").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.environ.get("ANALYSIS_PROFILE_SAMPLE_RATE", "1"))
+PROFILE_DIR = os.environ.get("ANALYSIS_PROFILE_DIR")
+
+_NULL_STAGE = contextlib.nullcontext()
+
+# Profiles of the analyzer calls in progress (analyze_all nests analyzers)
+_active_profiles = []
+# Open stages across all active profiles: [start_traced_bytes, peak_traced_bytes]
+_open_stages = []
+
+class Profile:
+    """Stage timings for one analyzer call"""
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.cprofile_path = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Measure a block; repeated stages accumulate, nested stages overlap"""
+        current, peak = tracemalloc.get_traced_memory()
+        if _open_stages:
+            # Keep the enclosing stage's peak before restarting peak tracking
+            _open_stages[-1][1] = max(_open_stages[-1][1], peak)
+        tracemalloc.reset_peak()
+
+        record = [current, current]
+        _open_stages.append(record)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            _open_stages.pop()
+
+            peak = max(record[1], tracemalloc.get_traced_memory()[1])
+            if _open_stages:
+                _open_stages[-1][1] = max(_open_stages[-1][1], peak)
+
+            stats = self.stages.setdefault(name, {"wall_time": 0.0, "cpu_time": 0.0, "memory_peak_mb": 0.0})
+            stats["wall_time"] += wall
+            stats["cpu_time"] += cpu
+            stats["memory_peak_mb"] = max(stats["memory_peak_mb"], (peak - record[0]) / (1024 * 1024))
+
+    def summary(self):
+        """JSON-ready profile block"""
+        stages = {
+            name: {key: round(value, 4) for key, value in stats.items()}
+            for name, stats in self.stages.items()
+        }
+        total = stages.pop("total", {})
+        summary = {**total, "stages": stages}
+        if self.cprofile_path:
+            summary["cprofile"] = self.cprofile_path
+        return summary
+
+def stage(name):
+    """Context manager timing a stage of the analyzer call in progress"""
+    if not _active_profiles:
+        return _NULL_STAGE
+    return _active_profiles[-1].stage(name)
+
+def _should_profile():
+    return PROFILE_ENABLED and random.random() < PROFILE_SAMPLE_RATE
+
+def profiled(name):
+    """
+    Decorator adding a "profile" block to an analyzer's result dict
+
+    Calls nested inside a profiled call are always profiled, so a sampled
+    analyze_all profiles every analyzer it runs.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _active_profiles and not _should_profile():
+                return function(*args, **kwargs)
+
+            profile = Profile(name)
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+
+            # Only the outermost call owns a cProfile session
+            profiler = None
+            if PROFILE_DIR and not _active_profiles:
+                import cProfile
+                profiler = cProfile.Profile()
+                profiler.enable()
+
+            _active_profiles.append(profile)
+            try:
+                with profile.stage("total"):
+                    result = function(*args, **kwargs)
+            finally:
+                _active_profiles.pop()
+                if profiler is not None:
+                    profiler.disable()
+                    profile.cprofile_path = _dump_cprofile(profiler, name)
+                if started_tracing:
+                    tracemalloc.stop()
+
+            if isinstance(result, dict):
+                result["profile"] = profile.summary()
+            return result
+        return wrapper
+    return decorator
+
+def _dump_cprofile(profiler, name):
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{name}-{time.time_ns()}-{os.getpid()}.prof")
+        profiler.dump_stats(path)
+        return path
+    except OSError:
+        return None
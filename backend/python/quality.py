@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Analysis Quality Profiles
+Named settings for the sample rate and frame sizes used by the acoustic
+analyzers, trading metric resolution for CPU time
+
+    precise   native sample rate, 2048-sample frames (the librosa defaults)
+    balanced  at most 22.05 kHz, 2048-sample frames
+    fast      at most 16 kHz, 1024-sample frames
+
+Audio is always decoded to mono float32 and only ever downsampled. Streaming
+mode (see audio_stream) always uses the precise settings.
+"""
+
+from pathlib import Path
+
+DEFAULT_QUALITY = "precise"
+
+QUALITY_PROFILES = {
+    "precise": {
+        "sample_rate": None,
+        "res_type": None,
+        "n_fft": 2048,
+        "hop_length": 512
+    },
+    "balanced": {
+        "sample_rate": 22050,
+        "res_type": "soxr_hq",
+        "n_fft": 2048,
+        "hop_length": 512
+    },
+    "fast": {
+        "sample_rate": 16000,
+        "res_type": "soxr_qq",
+        "n_fft": 1024,
+        "hop_length": 512
+    }
+}
+
+def get_profile(quality):
+    """Settings for a quality profile name (ValueError if unknown)"""
+    if quality not in QUALITY_PROFILES:
+        raise ValueError(f"Unknown quality profile: {quality}")
+    return QUALITY_PROFILES[quality]
+
+def target_sample_rate(native_sr, quality):
+    """Analysis sample rate for audio at native_sr"""
+    sample_rate = get_profile(quality)["sample_rate"]
+    if sample_rate is None or native_sr <= sample_rate:
+        return native_sr
+    return sample_rate
+
+def load_audio(audio_file_path, quality=DEFAULT_QUALITY):
+    """
+    Decode an audio file to mono float32 at the profile's sample rate
+
+    Canonical PCM files (see pcm_store) are memory-mapped and WAV files are
+    read directly with soundfile; other formats go through librosa.load.
+    """
+    import pcm_store
+
+    suffix = Path(audio_file_path).suffix.lower()
+    if pcm_store.is_pcm(audio_file_path):
+        y, sr = pcm_store.load_pcm(audio_file_path)
+    elif suffix in (".wav", ".wave"):
+        y, sr = pcm_store.read_wav(audio_file_path)
+    else:
+        import librosa
+        y, sr = librosa.load(audio_file_path, sr=None)
+    return resample_audio(y, sr, quality)
+
+def get_samplerate(audio_file_path):
+    """Native sample rate of an audio file without decoding it"""
+    import pcm_store
+
+    if pcm_store.is_pcm(audio_file_path):
+        return pcm_store.read_header(audio_file_path)["sample_rate"]
+
+    import librosa
+    return librosa.get_samplerate(audio_file_path)
+
+def get_duration(audio_file_path):
+    """Duration of an audio file in seconds, from its header where possible"""
+    import pcm_store
+
+    if pcm_store.is_pcm(audio_file_path):
+        header = pcm_store.read_header(audio_file_path)
+        return header["samples"] / header["sample_rate"]
+
+    import librosa
+    return librosa.get_duration(path=audio_file_path)
+
+def resample_audio(y, sr, quality=DEFAULT_QUALITY):
+    """Downsample decoded audio to the profile's sample rate if needed"""
+    target_sr = target_sample_rate(sr, quality)
+    if target_sr == sr:
+        return y, sr
+
+    import librosa
+    y = librosa.resample(y, orig_sr=sr, target_sr=target_sr, res_type=get_profile(quality)["res_type"])
+    return y, target_sr
+
+def parse_quality(argv):
+    """Value of a --quality=<name> command line flag (default: DEFAULT_QUALITY)"""
+    for arg in argv:
+        if arg.startswith("--quality="):
+            return arg.split("=", 1)[1]
+    return DEFAULT_QUALITY
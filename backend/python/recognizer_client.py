@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Recognizer Client
+Pooled, rate-limited HTTP client for the Google Web Speech API used by
+speech_to_text
+
+Connections are kept alive and reused across requests (and across jobs in
+the long-lived worker), concurrent requests and the request rate are capped,
+and failed requests are retried with jittered exponential backoff. Configure
+with environment variables:
+    GOOGLE_SPEECH_KEY           API key (default: the speech_recognition
+                                package's own key)
+    RECOGNIZER_ENDPOINT         recognition URL (default: the Google endpoint;
+                                point it at benchmarks.recognizer_stub for
+                                offline load tests)
+    RECOGNIZER_MAX_CONNECTIONS  concurrent requests / pooled connections (default: 4)
+    RECOGNIZER_RATE_LIMIT       requests per second, 0 for no limit (default: 0)
+    RECOGNIZER_TIMEOUT          connect/read timeout in seconds (default: 15)
+    RECOGNIZER_RETRIES          extra attempts for a failed request (default: 2)
+"""
+
+import os
+import json
+import time
+import random
+import threading
+import http.client
+from urllib.parse import urlencode, urlsplit
+
+from segmented_transcription import NoSpeechError
+
+GOOGLE_ENDPOINT = "http://www.google.com/speech-api/v2/recognize"
+
+GOOGLE_SPEECH_KEY = os.environ.get("GOOGLE_SPEECH_KEY")
+RECOGNIZER_ENDPOINT = os.environ.get("RECOGNIZER_ENDPOINT", GOOGLE_ENDPOINT)
+RECOGNIZER_MAX_CONNECTIONS = int(os.environ.get("RECOGNIZER_MAX_CONNECTIONS", "4"))
+RECOGNIZER_RATE_LIMIT = float(os.environ.get("RECOGNIZER_RATE_LIMIT", "0"))
+RECOGNIZER_TIMEOUT = float(os.environ.get("RECOGNIZER_TIMEOUT", "15"))
+RECOGNIZER_RETRIES = int(os.environ.get("RECOGNIZER_RETRIES", "2"))
+
+# First backoff ceiling; doubles per attempt up to MAX_BACKOFF_SECONDS and
+# the actual delay is drawn uniformly below it ("full jitter")
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 8.0
+
+# Idle connections older than this are closed instead of reused, since the
+# server may already have dropped them
+POOL_IDLE_SECONDS = 30.0
+
+# Statuses worth retrying; anything else but 200 fails immediately
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+def package_default_key():
+    """The API key speech_recognition uses when none is configured"""
+    try:
+        from speech_recognition.recognizers.google import create_request_builder
+        return create_request_builder(endpoint=GOOGLE_ENDPOINT).key
+    except (ImportError, AttributeError, TypeError):
+        raise ValueError("no default recognizer key in this speech_recognition version; set GOOGLE_SPEECH_KEY")
+
+class TransientRecognizerError(Exception):
+    """A failed request that may succeed when retried"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class RateLimiter:
+    """Token bucket shared by all threads of a client"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP connections to one host
+
+    At most max_connections are checked out at once; acquire blocks until
+    one is free, so the pool also caps concurrent requests.
+    """
+
+    def __init__(self, endpoint, max_connections=RECOGNIZER_MAX_CONNECTIONS, timeout=RECOGNIZER_TIMEOUT):
+        parts = urlsplit(endpoint)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid recognizer endpoint: {endpoint}")
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        )
+        self.host = parts.hostname
+        self.port = parts.port
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max(1, max_connections))
+        self.idle = []
+        self.lock = threading.Lock()
+        self.opened = 0
+
+    def acquire(self):
+        """Check out a connection: (connection, whether it was reused)"""
+        self.slots.acquire()
+        now = time.monotonic()
+        with self.lock:
+            while self.idle:
+                connection, last_used = self.idle.pop()
+                if now - last_used < POOL_IDLE_SECONDS:
+                    return connection, True
+                connection.close()
+            self.opened += 1
+        return self.connection_class(self.host, self.port, timeout=self.timeout), False
+
+    def release(self, connection, reusable):
+        """Return a connection; closed instead when it cannot be reused"""
+        if reusable:
+            with self.lock:
+                self.idle.append((connection, time.monotonic()))
+        else:
+            connection.close()
+        self.slots.release()
+
+    def close(self):
+        with self.lock:
+            for connection, _ in self.idle:
+                connection.close()
+            self.idle = []
+
+class RecognizerClient:
+    """
+    Google Web Speech API client (same request and response format as
+    speech_recognition's recognize_google)
+
+    Args:
+        endpoint: Recognition URL
+        max_connections: Pooled connections and concurrent requests
+        rate_limit: Requests per second (0 for no limit)
+        timeout: Connect/read timeout in seconds
+        retries: Extra attempts for a failed request
+        key: API key (default: GOOGLE_SPEECH_KEY, else the
+            speech_recognition package's key)
+        language: RFC5646 language tag
+    """
+
+    def __init__(self, endpoint=RECOGNIZER_ENDPOINT, max_connections=RECOGNIZER_MAX_CONNECTIONS,
+                 rate_limit=RECOGNIZER_RATE_LIMIT, timeout=RECOGNIZER_TIMEOUT, retries=RECOGNIZER_RETRIES,
+                 key=None, language="en-US"):
+        self.pool = ConnectionPool(endpoint, max_connections, timeout)
+        self.limiter = RateLimiter(rate_limit)
+        self.retries = retries
+        key = key or GOOGLE_SPEECH_KEY or package_default_key()
+        query = urlencode({"client": "chromium", "lang": language, "key": key, "pFilter": 0})
+        self.path = f"{urlsplit(endpoint).path or '/'}?{query}"
+        self.counters = {"requests": 0, "retries": 0, "failures": 0}
+        self.counter_lock = threading.Lock()
+
+    def recognize(self, audio):
+        """
+        Transcribe AudioData
+
+        Returns:
+            str: Best transcript
+
+        Raises:
+            NoSpeechError: The service found no speech
+            speech_recognition.RequestError: The request failed after all retries
+        """
+        import speech_recognition as sr
+
+        # The service requires 16-bit FLAC at 8 kHz or more
+        body = audio.get_flac_data(
+            convert_rate=None if audio.sample_rate >= 8000 else 8000,
+            convert_width=2
+        )
+        headers = {"Content-Type": f"audio/x-flac; rate={max(audio.sample_rate, 8000)}"}
+
+        attempt = 0
+        while True:
+            try:
+                return parse_response(self._send(body, headers))
+            except TransientRecognizerError as e:
+                if attempt >= self.retries:
+                    self._count("failures")
+                    raise sr.RequestError(f"recognition request failed: {e}")
+                self._count("retries")
+                ceiling = min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** attempt)
+                time.sleep(max(random.uniform(0, ceiling), e.retry_after or 0))
+                attempt += 1
+
+    def _send(self, body, headers):
+        """One POST on a pooled connection; returns the response text"""
+        import speech_recognition as sr
+
+        self.limiter.acquire()
+        self._count("requests")
+        connection, reused = self.pool.acquire()
+        reusable = False
+        try:
+            try:
+                connection.request("POST", self.path, body=body, headers=headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                if not reused:
+                    raise
+                # The server closed an idle keep-alive connection; resend once
+                # on a fresh one without counting it as a retry
+                connection.close()
+                with self.pool.lock:
+                    self.pool.opened += 1
+                connection.request("POST", self.path, body=body, headers=headers)
+                response = connection.getresponse()
+            text = response.read().decode("utf-8")
+            reusable = not response.will_close
+        except (OSError, http.client.HTTPException) as e:
+            raise TransientRecognizerError(f"connection failed: {str(e) or type(e).__name__}")
+        finally:
+            self.pool.release(connection, reusable)
+
+        if response.status == 200:
+            return text
+        if response.status in RETRYABLE_STATUSES:
+            retry_after = response.getheader("Retry-After")
+            raise TransientRecognizerError(
+                f"{response.status} {response.reason}",
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        raise sr.RequestError(f"recognition request failed: {response.status} {response.reason}")
+
+    def _count(self, name):
+        with self.counter_lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        """Request, retry and failure counts plus connections opened"""
+        with self.counter_lock:
+            return dict(self.counters, connections=self.pool.opened)
+
+    def close(self):
+        self.pool.close()
+
+def parse_response(response_text):
+    """
+    Best transcript from a response (one JSON object per line; the first
+    non-empty result wins, its first alternative is taken)
+    """
+    for line in response_text.split("\n"):
+        if not line:
+            continue
+        result = json.loads(line).get("result", [])
+        if result:
+            alternatives = result[0].get("alternative", [])
+            if not alternatives or "transcript" not in alternatives[0]:
+                raise NoSpeechError()
+            return alternatives[0]["transcript"]
+    raise NoSpeechError()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide client configured from the environment"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RecognizerClient()
+        return _client
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Rescoring
+Recomputes scores from stored raw metrics, so a scoring change can be
+applied to past analyses without re-running the audio pipeline
+
+analyze_all returns a versioned raw-metrics record ("metrics") holding the
+unrounded inputs of every scoring function. The functions here are NumPy
+versions of those scoring and categorizing functions: each takes arrays and
+returns exactly what the scalar version returns element by element (same
+operation order, and Python's max/min semantics, NaN included).
+
+    python rescoring.py <records.jsonl>
+
+Input lines are raw-metrics records, analyze_all results or batch records;
+each output line holds the recomputed scores.
+"""
+
+import sys
+import json
+
+from pace_analysis import FAST_WPM, OPTIMAL_WPM_MAX, OPTIMAL_WPM_MIN, SLOW_WPM
+
+# Bump when a metric's meaning changes; records of other versions are rejected
+METRICS_VERSION = 1
+
+# Metric -> analyzer that produces it
+METRIC_SOURCES = {
+    "filler_percentage": "fluency",
+    "repetitions": "fluency",
+    "wpm": "pace",
+    "cv_pitch": "tone",
+    "cv_energy": "tone",
+    "voice_stability": "confidence",
+    "energy_consistency": "confidence",
+    "pauses_per_minute": "confidence",
+    "clarity": "confidence",
+    "hesitation_rate": "confidence"
+}
+
+# Records rescored per NumPy call by the command line
+CHUNK_RECORDS = 100000
+
+def build_metrics(results):
+    """
+    Raw-metrics record of analyze_all results
+
+    Metrics of a failed analyzer are None.
+    """
+    metrics = {"version": METRICS_VERSION}
+    for name, source in METRIC_SOURCES.items():
+        metrics[name] = results[source].get("metrics", {}).get(name)
+    return metrics
+
+def _max(a, b):
+    """Python's max(a, b) elementwise (b only where b > a)"""
+    import numpy as np
+    return np.where(b > a, b, a)
+
+def _min(a, b):
+    """Python's min(a, b) elementwise (b only where b < a)"""
+    import numpy as np
+    return np.where(b < a, b, a)
+
+def _array(values):
+    import numpy as np
+    return np.asarray(values, dtype=np.float64)
+
+def pace_scores(wpm):
+    """Vectorized pace_analysis.calculate_pace_score"""
+    import numpy as np
+
+    wpm = _array(wpm)
+    optimal = (OPTIMAL_WPM_MIN <= wpm) & (wpm <= OPTIMAL_WPM_MAX)
+    slow = wpm < OPTIMAL_WPM_MIN
+    return np.select(
+        [optimal, slow & (wpm < SLOW_WPM), slow, wpm > FAST_WPM],
+        [
+            np.float64(100),
+            _max(0, 40 - (SLOW_WPM - wpm) * 0.5),
+            40 + ((wpm - SLOW_WPM) / (OPTIMAL_WPM_MIN - SLOW_WPM)) * 40,
+            _max(0, 40 - (wpm - FAST_WPM) * 0.5)
+        ],
+        40 + ((FAST_WPM - wpm) / (FAST_WPM - OPTIMAL_WPM_MAX)) * 40
+    )
+
+def pace_categories(wpm):
+    """Vectorized pace_analysis.categorize_pace"""
+    import numpy as np
+
+    wpm = _array(wpm)
+    return np.select(
+        [wpm < SLOW_WPM, wpm < OPTIMAL_WPM_MIN, wpm <= OPTIMAL_WPM_MAX, wpm <= FAST_WPM],
+        ["Very Slow", "Slow", "Optimal", "Fast"],
+        "Very Fast"
+    )
+
+def tone_scores(cv_pitch, cv_energy, is_monotone=None):
+    """
+    Vectorized tone_analysis.calculate_tone_score
+
+    is_monotone defaults to the analyzer's rule (pitch variation below 10%).
+    """
+    import numpy as np
+
+    cv_pitch = _array(cv_pitch)
+    cv_energy = _array(cv_energy)
+    if is_monotone is None:
+        is_monotone = cv_pitch < 10
+
+    score = 50 + np.select(
+        [
+            (15 <= cv_pitch) & (cv_pitch <= 30),
+            ((10 <= cv_pitch) & (cv_pitch < 15)) | ((30 < cv_pitch) & (cv_pitch <= 40)),
+            cv_pitch < 10
+        ],
+        [30, 20, 5],
+        15
+    )
+    score = score + np.select(
+        [
+            (20 <= cv_energy) & (cv_energy <= 40),
+            ((15 <= cv_energy) & (cv_energy < 20)) | ((40 < cv_energy) & (cv_energy <= 50)),
+            cv_energy < 15
+        ],
+        [20, 15, 5],
+        10
+    )
+    score = np.where(is_monotone, score - 20, score)
+    return _max(0, _min(100, score))
+
+def confidence_scores(stability, consistency, pauses_pm, clarity, hesitation_rate):
+    """Vectorized confidence_analysis.calculate_confidence_score"""
+    import numpy as np
+
+    stability = _array(stability)
+    consistency = _array(consistency)
+    pauses_pm = _array(pauses_pm)
+    clarity = _array(clarity)
+    hesitation_rate = _array(hesitation_rate)
+
+    # Same additions in the same order as the scalar version
+    score = 0 + (stability / 100) * 25
+    score = score + (consistency / 100) * 20
+    score = score + np.select(
+        [(2 <= pauses_pm) & (pauses_pm <= 4), pauses_pm < 2, pauses_pm <= 6],
+        [np.float64(20), np.float64(15), np.float64(15)],
+        _max(0, 20 - (pauses_pm - 6) * 2)
+    )
+    score = score + (_min(clarity, 100) / 100) * 20
+    score = score + np.select(
+        [hesitation_rate < 2, hesitation_rate < 5, hesitation_rate < 8],
+        [15, 10, 5],
+        0
+    )
+    return _max(0, _min(100, score))
+
+def fluency_scores(filler_percentage, repetitions):
+    """Vectorized fluency_analysis.calculate_fluency_score"""
+    filler_percentage = _array(filler_percentage)
+    repetitions = _array(repetitions)
+
+    base_score = _max(0, 100 - (filler_percentage * 2))
+    repetition_penalty = _min(repetitions * 5, 20)
+    return _max(0, _min(100, base_score - repetition_penalty))
+
+def overall_scores(scores):
+    """
+    Vectorized analyze_all.calculate_overall_score
+
+    Args:
+        scores: Analyzer name -> array of rounded scores
+    """
+    import numpy as np
+    from analyze_all import SCORE_WEIGHTS
+
+    total = 0
+    for name, weight in SCORE_WEIGHTS.items():
+        total = total + _array(scores[name]) * weight
+    return np.floor(total + 0.5).astype(np.int64)
+
+def rescore(metrics):
+    """
+    Scores for many raw-metrics records in one pass
+
+    Analyzers whose metrics are missing get the default score, as in
+    analyze_all.
+
+    Args:
+        metrics: List of raw-metrics records, or a dict of metric name ->
+            array (missing values NaN)
+
+    Returns:
+        dict: Arrays of fluency, pace, tone, confidence and overallScore
+        (rounded like the analyzers) plus paceCategory and isMonotone
+    """
+    import numpy as np
+    from analyze_all import DEFAULT_SCORE
+
+    if not isinstance(metrics, dict):
+        versions = {record.get("version") for record in metrics}
+        if versions - {METRICS_VERSION}:
+            raise ValueError(f"Unsupported metrics version: {sorted(versions - {METRICS_VERSION}, key=str)}")
+        metrics = {
+            name: np.array([np.nan if record.get(name) is None else record[name] for record in metrics],
+                           dtype=np.float64)
+            for name in METRIC_SOURCES
+        }
+    m = {name: _array(metrics[name]) for name in METRIC_SOURCES}
+
+    raw = {
+        "fluency": fluency_scores(m["filler_percentage"], m["repetitions"]),
+        "pace": pace_scores(m["wpm"]),
+        "tone": tone_scores(m["cv_pitch"], m["cv_energy"]),
+        "confidence": confidence_scores(
+            m["voice_stability"], m["energy_consistency"], m["pauses_per_minute"],
+            m["clarity"], m["hesitation_rate"]
+        )
+    }
+
+    scores = {}
+    for analyzer, values in raw.items():
+        inputs = [m[name] for name, source in METRIC_SOURCES.items() if source == analyzer]
+        missing = np.any(np.isnan(inputs), axis=0)
+        scores[analyzer] = np.where(missing, DEFAULT_SCORE, np.round(values)).astype(np.int64)
+
+    return {
+        **scores,
+        "overallScore": overall_scores(scores),
+        "paceCategory": pace_categories(m["wpm"]),
+        "isMonotone": m["cv_pitch"] < 10
+    }
+
+def metrics_of(record):
+    """Raw-metrics record inside a JSONL line (raw, analyze_all or batch record)"""
+    if "version" in record:
+        return record
+    if "metrics" in record:
+        return record["metrics"]
+    return record.get("analysis", {}).get("metrics")
+
+def rescore_lines(lines):
+    """Yield one output dict per input line, rescoring CHUNK_RECORDS at a time"""
+    import itertools
+
+    lines = iter(lines)
+    while True:
+        chunk = [line for line in itertools.islice(lines, CHUNK_RECORDS) if line.strip()]
+        if not chunk:
+            return
+        records = [json.loads(line) for line in chunk]
+        metrics = [metrics_of(record) for record in records]
+        usable = [i for i, record in enumerate(metrics) if record is not None]
+        scores = rescore([metrics[i] for i in usable]) if usable else {}
+
+        positions = {i: row for row, i in enumerate(usable)}
+        for i, record in enumerate(records):
+            output = {"path": record["path"]} if "path" in record else {}
+            if i not in positions:
+                output.update(success=False, error="No raw metrics in record")
+            else:
+                row = positions[i]
+                output["success"] = True
+                for name, values in scores.items():
+                    output[name] = values[row].item()
+            yield output
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({
+            "success": False,
+            "error": "Records file required"
+        }))
+        sys.exit(1)
+
+    with open(sys.argv[1], encoding="utf-8") as f:
+        for output in rescore_lines(f):
+            sys.stdout.write(json.dumps(output) + "\n")
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Result Cache
+On-disk store of finished analyzer results, keyed by the content of the
+input (the SHA-256 of the audio file, or the transcription text), the call's
+options and a stamp of the analysis code
+
+Every analyzer entry point (speech_to_text, the four analyzers and
+analyze_all) is wrapped with @cached, so analyzing the same recording again,
+under any session, returns the stored JSON without a recognizer request or
+any signal processing. The code stamp covers the sources of this directory,
+the installed numeric packages and the settings in RESULT_ENVIRONMENT:
+changing any of them starts a fresh cache, and entries of other stamps are
+dropped at a process's first store. Only successful results are stored; calls made
+with in-memory audio (analyze_all's shared buffers, features or stores) and
+profiled calls bypass the cache.
+
+Entries are JSON files whose modification time is their last use. They
+expire RESULT_CACHE_TTL_HOURS after it (sliding expiry: an entry in use stays
+cached), and are evicted least-recently-used first once the cache grows past
+its disk budget. Each process tracks an estimate of the cache size and only
+scans the directory when the estimate goes over budget, or every
+EVICT_INTERVAL_STORES stores to pick up other processes' entries.
+Configure with environment variables:
+    RESULT_CACHE_DIR        cache directory (default: <tmp>/stutterless-result-cache)
+    RESULT_CACHE_MAX_MB     disk budget in MB; 0 disables the cache (default: 64)
+    RESULT_CACHE_TTL_HOURS  idle lifetime of an entry; 0 keeps entries until evicted (default: 168)
+"""
+
+import os
+import json
+import time
+import hashlib
+import inspect
+import tempfile
+import functools
+from pathlib import Path
+
+from profiling import PROFILE_ENABLED
+
+CACHE_DIR = os.environ.get(
+    "RESULT_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "stutterless-result-cache")
+)
+CACHE_MAX_BYTES = int(float(os.environ.get("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024)
+CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_HOURS", "168")) * 3600
+
+# Settings that change analyzer output without changing the code
+RESULT_ENVIRONMENT = ("ANALYSIS_SAMPLE_MIN_SECONDS", "RECOGNIZER_ENDPOINT")
+
+# Packages whose versions change the numbers or the transcription
+RESULT_PACKAGES = ("numpy", "scipy", "librosa", "soundfile", "soxr", "audioread", "SpeechRecognition")
+
+# Hex digits of the code stamp that prefix each entry's file name
+STAMP_PREFIX_LENGTH = 16
+
+# Stores between directory scans while the size estimate is within budget
+EVICT_INTERVAL_STORES = 100
+
+# Eviction frees space down to this fraction of the budget, so a full cache
+# is not rescanned on every store
+EVICT_TARGET_FRACTION = 0.9
+
+_digests = {}
+_code_version = None
+
+# Estimated cache size in bytes (None until this process has scanned it)
+# and stores since the last scan
+_cache_bytes = None
+_stores_since_evict = 0
+
+def audio_digest(audio_file_path):
+    """SHA-256 of the file contents, memoized per path, size and mtime"""
+    stat = os.stat(audio_file_path)
+    memo_key = (os.path.realpath(audio_file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _digests:
+        digest = hashlib.sha256()
+        with open(audio_file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        _digests[memo_key] = digest.hexdigest()
+    return _digests[memo_key]
+
+def code_version():
+    """Stamp of the analysis code: module sources, package versions and RESULT_ENVIRONMENT"""
+    global _code_version
+    if _code_version is None:
+        from importlib import metadata
+
+        digest = hashlib.sha256()
+        for path in sorted(Path(__file__).resolve().parent.glob("*.py")):
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+        for package in RESULT_PACKAGES:
+            try:
+                version = metadata.version(package)
+            except metadata.PackageNotFoundError:
+                version = None
+            digest.update(f"{package}={version}".encode("utf-8"))
+        for name in RESULT_ENVIRONMENT:
+            digest.update(f"{name}={os.environ.get(name)}".encode("utf-8"))
+        _code_version = digest.hexdigest()
+    return _code_version
+
+def cache_enabled():
+    return CACHE_MAX_BYTES > 0
+
+def result_key(name, arguments):
+    """
+    Cache key of one call, or None when the call cannot be cached
+
+    Args:
+        name: Entry point name
+        arguments: The call's arguments by parameter name, defaults applied;
+            audio_file_path is replaced by the file's digest, and any value
+            that is not plain JSON (arrays, stores, callables) makes the
+            call uncacheable
+    """
+    arguments = dict(arguments)
+    if "audio_file_path" in arguments:
+        try:
+            arguments["audio_file_path"] = audio_digest(arguments["audio_file_path"])
+        except (OSError, TypeError):
+            # Missing files are reported by the analyzer itself
+            return None
+    try:
+        payload = json.dumps([name, arguments], sort_keys=True, allow_nan=False)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _entry_path(key):
+    return Path(CACHE_DIR) / f"{code_version()[:STAMP_PREFIX_LENGTH]}-{key}.json"
+
+def _expired(mtime, now):
+    return CACHE_TTL_SECONDS > 0 and now - mtime > CACHE_TTL_SECONDS
+
+def load_result(key):
+    """Return the cached result for key, or None on a miss"""
+    path = _entry_path(key)
+    try:
+        if _expired(path.stat().st_mtime, time.time()):
+            path.unlink()
+            return None
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        # Mark the entry used: eviction is least-recently-used, and the
+        # expiry slides
+        os.utime(path)
+        return entry["result"]
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Corrupt or partially written entry: drop it and recompute
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+
+def store_result(key, result):
+    """Persist a result under key and enforce the disk budget"""
+    global _cache_bytes, _stores_since_evict
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"result": result}, f)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, _entry_path(key))
+
+        _stores_since_evict += 1
+        if _cache_bytes is not None:
+            _cache_bytes += size
+        if (_cache_bytes is None or _cache_bytes > CACHE_MAX_BYTES
+                or _stores_since_evict >= EVICT_INTERVAL_STORES):
+            _cache_bytes = evict(int(CACHE_MAX_BYTES * EVICT_TARGET_FRACTION))
+            _stores_since_evict = 0
+    except (OSError, TypeError, ValueError):
+        # The cache is an optimization; never fail an analysis over it
+        pass
+
+def evict(max_bytes):
+    """
+    Delete entries of other code stamps and expired entries, then
+    least-recently-used entries until the cache fits max_bytes
+
+    Returns:
+        int: Bytes left in the cache
+    """
+    stamp = code_version()[:STAMP_PREFIX_LENGTH]
+    now = time.time()
+    entries = []
+    for path in Path(CACHE_DIR).glob("*.json"):
+        try:
+            stat = path.stat()
+            if not path.name.startswith(stamp + "-") or _expired(stat.st_mtime, now):
+                path.unlink()
+                continue
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            pass
+    return total
+
+def _successful(result):
+    return result.get("success")
+
+def cached(name, cacheable=_successful):
+    """
+    Decorator serving an analyzer entry point's successful results from the
+    result cache
+
+    Args:
+        name: Entry point name, part of the cache key
+        cacheable: Function result dict -> whether to store it; entry points
+            whose successful results can still be incomplete (partial
+            transcriptions) narrow it so a passing outage is not cached
+    """
+    def decorator(function):
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not cache_enabled() or PROFILE_ENABLED:
+                return function(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = result_key(name, bound.arguments)
+            if key is None:
+                return function(*args, **kwargs)
+
+            result = load_result(key)
+            if result is not None:
+                return result
+            result = function(*args, **kwargs)
+            if isinstance(result, dict) and cacheable(result):
+                store_result(key, result)
+            return result
+        return wrapper
+    return decorator
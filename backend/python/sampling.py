@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Sampled Estimation
+Approximate frame statistics of long recordings from a stratified random
+sample of short windows, read by seeking instead of decoding the whole file
+
+The recording is cut into SAMPLE_WINDOWS equal strata and one window of
+SAMPLE_WINDOW_SECONDS is drawn at random inside each. Windows are framed on
+the grid of the streaming analysis (see audio_stream), so the sampled frames
+are a subset of the frames stream mode sees, and the result is a
+stream_features()-style dict the analyzers score in stream mode. Each raw
+metric then gets a bootstrap confidence interval over the windows. The cost
+depends on the sample size, not on the recording length.
+
+Recordings shorter than SAMPLE_MIN_SECONDS, and formats that cannot seek
+(compressed containers decoded through audioread), are not sampled: callers
+take the exact path. Configure with environment variables:
+    ANALYSIS_SAMPLE_MIN_SECONDS  shortest recording that is sampled (default: 600)
+"""
+
+import os
+
+import numpy as np
+import librosa
+import soundfile as sf
+
+import startup
+import pcm_store
+from audio_stream import FRAME_LENGTH, HOP_LENGTH, RunningStats, update_features
+
+SAMPLE_MIN_SECONDS = float(os.environ.get("ANALYSIS_SAMPLE_MIN_SECONDS", "600"))
+
+# Strata (one window each) and window length; 120 s of audio in total
+SAMPLE_WINDOWS = 48
+SAMPLE_WINDOW_SECONDS = 2.5
+
+# Bootstrap resamples of the windows per confidence interval
+BOOTSTRAP_RESAMPLES = 200
+CONFIDENCE_LEVEL = 0.95
+
+# Fixed seed, so re-analyzing a recording returns the same estimate
+SAMPLE_SEED = 0
+
+class SampledSilence:
+    """
+    SilenceTracker stand-in estimating the non-silent interval count of the
+    whole recording from the sampled frames
+
+    A new interval starts at every voiced frame that follows a silent one.
+    The onset rate over the sampled pairs of consecutive frames, times the
+    recording's frame count, estimates the intervals beyond the first.
+    """
+
+    def __init__(self, window_db, total_frames):
+        self.window_db = window_db
+        self.total_frames = total_frames
+
+    def count_intervals(self, top_db):
+        """Estimated number of non-silent intervals for the given top_db (a float)"""
+        if not self.window_db:
+            return 0
+        threshold = max(db.max() for db in self.window_db) - top_db
+        onsets = 0
+        pairs = 0
+        for db in self.window_db:
+            voiced = db > threshold
+            onsets += np.count_nonzero(voiced[1:] & ~voiced[:-1])
+            pairs += len(db) - 1
+        return 1 + onsets / pairs * (self.total_frames - 1) if pairs > 0 else 1
+
+class _RmsRecorder:
+    """update_features silence hook that records the frame RMS"""
+
+    def __init__(self):
+        self.values = np.zeros(0, dtype=np.float32)
+
+    def update(self, rms):
+        self.values = np.concatenate((self.values, rms))
+
+def plan_windows(total_frames, window_frames, n_windows=SAMPLE_WINDOWS, seed=SAMPLE_SEED):
+    """Start frames of one uniformly drawn window inside each of n_windows equal strata"""
+    rng = np.random.default_rng(seed)
+    bounds = np.linspace(0, total_frames, n_windows + 1).astype(np.int64)
+    starts = []
+    for low, high in zip(bounds[:-1], bounds[1:]):
+        latest = max(low, high - window_frames)
+        starts.append(int(rng.integers(low, latest + 1)))
+    return starts
+
+def open_seekable(audio_file_path):
+    """
+    Open an audio file for random-access mono float32 reads
+
+    Returns:
+        tuple: (sample_rate, total_samples, read(start, count), close()), or
+        None when the format can only be decoded front to back
+    """
+    if pcm_store.is_pcm(audio_file_path):
+        samples, sample_rate = pcm_store.open_pcm(audio_file_path)
+        return (
+            sample_rate, len(samples),
+            lambda start, count: pcm_store.to_float32(samples[start:start + count]),
+            lambda: None
+        )
+
+    try:
+        sound_file = sf.SoundFile(audio_file_path)
+    except Exception:
+        return None
+    if not sound_file.seekable():
+        sound_file.close()
+        return None
+
+    def read(start, count):
+        sound_file.seek(start)
+        data = sound_file.read(count, dtype="float32", always_2d=True)
+        return data.mean(axis=1, dtype=np.float32)
+
+    return sound_file.samplerate, sound_file.frames, read, sound_file.close
+
+def read_window(read, total_samples, start, length):
+    """Samples [start, start + length) of the recording, zero outside it"""
+    low = max(start, 0)
+    high = min(start + length, total_samples)
+    data = read(low, high - low) if high > low else np.zeros(0, dtype=np.float32)
+    before = np.zeros(low - start, dtype=np.float32)
+    after = np.zeros(length - len(before) - len(data), dtype=np.float32)
+    return np.concatenate((before, data, after))
+
+def sample_features(audio_file_path, pitch=False, centroid=False, zcr=False, silence=False,
+                    min_seconds=SAMPLE_MIN_SECONDS, n_windows=SAMPLE_WINDOWS,
+                    window_seconds=SAMPLE_WINDOW_SECONDS, seed=SAMPLE_SEED):
+    """
+    Estimate stream_features() from a stratified sample of windows
+
+    Args:
+        audio_file_path: Path to audio file
+        pitch, centroid, zcr, silence: Features to track (see stream_features)
+        min_seconds: Shorter recordings are not sampled
+        n_windows: Windows (and strata)
+        window_seconds: Length of each window
+        seed: Random seed of the window positions
+
+    Returns:
+        dict: stream_features()-style result (duration of the whole
+        recording) plus the per-window statistics under "windows", or None
+        when the recording is too short or cannot seek
+    """
+    reader = open_seekable(audio_file_path)
+    if reader is None:
+        return None
+    sr, total_samples, read, close = reader
+
+    try:
+        if total_samples < min_seconds * sr:
+            return None
+
+        total_frames = 1 + total_samples // HOP_LENGTH
+        window_frames = max(2, int(round(window_seconds * sr / HOP_LENGTH)))
+        names = ["rms"] + [
+            name for name, wanted in (("pitch", pitch), ("centroid", centroid), ("zcr", zcr)) if wanted
+        ]
+
+        windows = []
+        for start in plan_windows(total_frames, window_frames, n_windows, seed):
+            # The frames centered on start .. start + window_frames - 1
+            block = read_window(
+                read, total_samples, start * HOP_LENGTH - FRAME_LENGTH // 2,
+                (window_frames - 1) * HOP_LENGTH + FRAME_LENGTH
+            )
+            stats = {name: RunningStats() for name in names}
+            rms = _RmsRecorder() if silence else None
+            update_features(block, sr, stats, rms)
+            windows.append({
+                "stats": stats,
+                "db": librosa.amplitude_to_db(rms.values, ref=1.0, top_db=None) if silence else None
+            })
+    finally:
+        close()
+
+    features = combine_windows(windows, sr, total_samples / sr, total_frames)
+    features["windows"] = windows
+    features["sampledSeconds"] = len(windows) * window_frames * HOP_LENGTH / sr
+    return features
+
+def combine_windows(windows, sr, duration, total_frames):
+    """stream_features()-style dict of a set of sampled windows"""
+    silence = None
+    if windows[0]["db"] is not None:
+        silence = SampledSilence([window["db"] for window in windows], total_frames)
+    return {
+        "sr": sr,
+        "duration": duration,
+        "frames": total_frames,
+        "silence": silence,
+        **{
+            name: RunningStats.combined([window["stats"][name] for window in windows])
+            for name in windows[0]["stats"]
+        }
+    }
+
+def with_intervals(result, features, metrics_of, resamples=BOOTSTRAP_RESAMPLES,
+                   level=CONFIDENCE_LEVEL, seed=SAMPLE_SEED):
+    """
+    Add the sample size and a confidence interval per raw metric to a result
+
+    The intervals are percentile bootstrap intervals over the windows; with
+    one window per stratum this ignores the stratification and errs wide.
+
+    Args:
+        result: Analyzer result computed from sample_features() output
+        features: That sample_features() output
+        metrics_of: Function features -> raw metrics dict (or None), i.e.
+            the analyzer's stream_metrics, which skips scoring and feedback
+        resamples: Bootstrap resamples
+        level: Confidence level
+
+    Returns:
+        dict: result with an "estimate" entry
+    """
+    if not result.get("success") or "metrics" not in result:
+        return result
+
+    rng = np.random.default_rng(seed)
+    windows = features["windows"]
+    draws = {name: [] for name in result["metrics"]}
+    for _ in range(resamples):
+        chosen = [windows[i] for i in rng.integers(0, len(windows), len(windows))]
+        metrics = metrics_of(combine_windows(chosen, features["sr"], features["duration"], features["frames"]))
+        if metrics is None:
+            continue
+        for name in draws:
+            draws[name].append(metrics[name])
+
+    tail = (1 - level) / 2
+    result["estimate"] = {
+        "sampled": True,
+        "windows": len(windows),
+        "sampledSeconds": round(features["sampledSeconds"], 2),
+        "confidenceLevel": level,
+        "intervals": {
+            name: [float(np.quantile(values, tail)), float(np.quantile(values, 1 - tail))] if values else None
+            for name, values in draws.items()
+        }
+    }
+    return result
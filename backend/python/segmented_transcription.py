@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Segmented Transcription
+Splits a recording at pauses and transcribes the segments concurrently, so
+long recordings stay under the recognizer's request limits and use several
+connections at once
+
+Configure with environment variables:
+    TRANSCRIPTION_WORKERS  concurrent recognizer requests (default: 4)
+    TRANSCRIPTION_RETRIES  extra attempts for a failed segment (default: 2)
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TRANSCRIPTION_WORKERS = int(os.environ.get("TRANSCRIPTION_WORKERS", "4"))
+TRANSCRIPTION_RETRIES = int(os.environ.get("TRANSCRIPTION_RETRIES", "2"))
+
+# Frames more than this many dB below the loudest frame count as a pause
+# (same threshold as confidence_analysis)
+SEGMENT_TOP_DB = 30
+
+# Pauses are merged into segments of up to MAX_SEGMENT_SECONDS; longer
+# stretches of speech are cut into equal pieces
+MAX_SEGMENT_SECONDS = 30.0
+
+# Silence kept around each segment so word edges are not clipped
+SEGMENT_PADDING_SECONDS = 0.25
+
+# First retry delay; doubles on every further attempt
+RETRY_BACKOFF_SECONDS = 0.5
+
+class NoSpeechError(Exception):
+    """Raised by a recognizer when a segment contains no recognizable speech"""
+
+def plan_segments(samples, sample_rate, top_db=SEGMENT_TOP_DB, max_seconds=MAX_SEGMENT_SECONDS,
+                  padding_seconds=SEGMENT_PADDING_SECONDS):
+    """
+    Choose segment boundaries at pauses
+
+    Args:
+        samples: Mono samples (int16 or float)
+        sample_rate: Sample rate of samples
+        top_db: Pause threshold for librosa.effects.split
+        max_seconds: Longest segment
+        padding_seconds: Silence kept on each side of a segment
+
+    Returns:
+        list: (start, end) sample indices in order
+    """
+    import numpy as np
+    import librosa
+
+    y = samples if samples.dtype == np.float32 else samples.astype(np.float32) / 32768
+    intervals = librosa.effects.split(y, top_db=top_db)
+    max_samples = max(1, int(max_seconds * sample_rate))
+
+    # Merge neighbouring speech intervals while the segment stays short enough
+    merged = []
+    for start, end in intervals:
+        if merged and end - merged[-1][0] <= max_samples:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    # Cut speech that runs longer than max_seconds without a pause
+    segments = []
+    for start, end in merged:
+        pieces = -(-(end - start) // max_samples)
+        bounds = np.linspace(start, end, pieces + 1).astype(int)
+        segments.extend(zip(bounds[:-1], bounds[1:]))
+
+    # Pad into the surrounding pauses, at most halfway to the next segment
+    padding = int(padding_seconds * sample_rate)
+    padded = []
+    for i, (start, end) in enumerate(segments):
+        low = (segments[i - 1][1] + start) // 2 if i > 0 else 0
+        high = (end + segments[i + 1][0]) // 2 if i + 1 < len(segments) else len(samples)
+        padded.append((int(max(low, start - padding)), int(min(high, end + padding))))
+    return padded
+
+def recognize_with_retries(recognize, audio, retries=TRANSCRIPTION_RETRIES, backoff=RETRY_BACKOFF_SECONDS):
+    """
+    Call recognize(audio), retrying errors other than NoSpeechError
+
+    Returns:
+        str: Recognized text ("" when the segment has no speech)
+    """
+    attempt = 0
+    while True:
+        try:
+            return recognize(audio)
+        except NoSpeechError:
+            return ""
+        except Exception:
+            if attempt >= retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+            attempt += 1
+
+def transcribe_segments(samples, sample_rate, recognize, segments=None, workers=TRANSCRIPTION_WORKERS,
+                        retries=TRANSCRIPTION_RETRIES):
+    """
+    Transcribe a recording segment by segment on a bounded thread pool
+
+    Args:
+        samples: Mono samples (int16, or float in [-1, 1])
+        sample_rate: Sample rate of samples
+        recognize: Function AudioData -> text; raises NoSpeechError for
+            silence and any other exception for a retryable failure
+        segments: Optional (start, end) sample indices (default: plan_segments)
+        workers: Concurrent recognize calls
+        retries: Extra attempts per failed segment
+
+    Returns:
+        dict: {success, transcription, word_count, segments, failedSegments}
+    """
+    from speech_to_text import to_audio_data
+
+    if segments is None:
+        segments = plan_segments(samples, sample_rate)
+    if not segments:
+        return {
+            "success": False,
+            "error": "No speech detected in audio"
+        }
+
+    def transcribe(segment):
+        start, end = segment
+        entry = {
+            "start": round(start / sample_rate, 2),
+            "end": round(end / sample_rate, 2)
+        }
+        try:
+            audio = to_audio_data(samples[start:end], sample_rate)
+            entry["text"] = recognize_with_retries(recognize, audio, retries=retries)
+        except Exception as e:
+            entry["text"] = ""
+            entry["error"] = str(e) or type(e).__name__
+        return entry
+
+    # map keeps the results in segment order
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(transcribe, segments))
+
+    failed = [entry for entry in results if "error" in entry]
+    if len(failed) == len(results):
+        return {
+            "success": False,
+            "error": f"Speech recognition service error: {failed[0]['error']}"
+        }
+
+    transcription = " ".join(entry["text"] for entry in results if entry["text"])
+    if not transcription:
+        return {
+            "success": False,
+            "error": "Could not understand audio. Please ensure clear speech."
+        }
+
+    return {
+        "success": True,
+        "transcription": transcription,
+        "word_count": len(transcription.split()),
+        "segments": results,
+        "failedSegments": len(failed)
+    }
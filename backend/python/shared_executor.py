@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory Analyzer Executor
+Runs the acoustic analyzers in parallel worker processes that all attach to
+one decoded copy of the audio in shared memory
+
+Jobs are admitted against a memory budget, so the analyzers run
+concurrently when the budget allows and one after another, in the calling
+process, when it does not. Each job's peak is estimated from the recording
+length, and on Linux a job is only started when the memory measured in this
+process and its workers (proportional set size, so the shared buffer counts
+once) also leaves room for that estimate; a warning is printed when the
+measured memory goes past the budget. Configure with environment variables:
+    ANALYSIS_MEMORY_BUDGET_MB  memory the analyzers may use at once (default: 1024)
+"""
+
+import os
+import sys
+import importlib
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+MEMORY_BUDGET_BYTES = int(float(os.environ.get("ANALYSIS_MEMORY_BUDGET_MB", "1024")) * 1024 * 1024)
+
+# Analyzer name -> (module, function, takes the transcription)
+ANALYZERS = {
+    "pace": ("pace_analysis", "analyze_pace", True),
+    "tone": ("tone_analysis", "analyze_tone", False),
+    "confidence": ("confidence_analysis", "analyze_confidence", True)
+}
+
+# Peak working memory per float32 input sample, measured with tracemalloc
+# (the STFT-based features dominate; tone allows for the yin method)
+ANALYZER_BYTES_PER_SAMPLE = {
+    "pace": 24,
+    "tone": 48,
+    "confidence": 52
+}
+
+# Memory a forked worker needs beyond the pages it shares with the parent
+PROCESS_OVERHEAD_BYTES = 64 * 1024 * 1024
+
+def estimate_job_bytes(name, n_samples):
+    """Estimated peak memory of one analyzer job in a worker process"""
+    return PROCESS_OVERHEAD_BYTES + ANALYZER_BYTES_PER_SAMPLE[name] * n_samples
+
+# Seconds between memory measurements while jobs run
+MEMORY_POLL_SECONDS = 0.5
+
+def process_memory_bytes(pid):
+    """Proportional set size of a process from /proc, or None where unavailable"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def measured_memory_bytes():
+    """Memory of this process and its live worker processes, or None where unavailable"""
+    total = 0
+    for pid in [os.getpid()] + [child.pid for child in multiprocessing.active_children()]:
+        size = process_memory_bytes(pid)
+        if size is None:
+            # A worker that just exited no longer counts; an unreadable
+            # parent means no measurement at all
+            if pid == os.getpid():
+                return None
+            continue
+        total += size
+    return total
+
+def admits(in_use, cost, memory_budget):
+    """
+    Whether a job estimated at cost bytes fits the budget next to the jobs
+    already admitted (in_use estimated bytes) and the measured memory
+    """
+    if in_use + cost > memory_budget:
+        return False
+    measured = measured_memory_bytes()
+    return measured is None or measured + cost <= memory_budget
+
+class BudgetMonitor:
+    """Warns once when the measured memory goes past the budget"""
+
+    def __init__(self, memory_budget, label):
+        self.memory_budget = memory_budget
+        self.label = label
+        self.peak = 0
+        self.warned = False
+
+    def check(self):
+        measured = measured_memory_bytes()
+        if measured is None:
+            return
+        self.peak = max(self.peak, measured)
+        if measured > self.memory_budget and not self.warned:
+            self.warned = True
+            print(
+                f"warning: {self.label} uses {measured / 2 ** 20:.0f} MB, over the "
+                f"{self.memory_budget / 2 ** 20:.0f} MB memory budget (the per-job estimates are too low)",
+                file=sys.stderr
+            )
+
+def max_concurrent_jobs(estimates, available_bytes):
+    """Largest number of jobs that fit in the budget together (at least 1)"""
+    used = 0
+    count = 0
+    for cost in sorted(estimates):
+        used += cost
+        if used > available_bytes:
+            break
+        count += 1
+    return max(1, count)
+
+def available_cpus():
+    """CPUs this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def call_analyzer(name, audio_file_path, transcription, y, sr, options=None):
+    """Run one analyzer on already-decoded audio"""
+    module_name, function_name, takes_transcription = ANALYZERS[name]
+    function = getattr(importlib.import_module(module_name), function_name)
+    args = (audio_file_path, transcription) if takes_transcription else (audio_file_path,)
+    return function(*args, y=y, sr=sr, **(options or {}))
+
+def _run_attached(name, spec, audio_file_path, transcription, options):
+    """Worker entry point: attach to the shared buffer and run one analyzer"""
+    import numpy as np
+
+    shm_name, shape, dtype, sr = spec
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        y = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        y.flags.writeable = False
+        result = call_analyzer(name, audio_file_path, transcription, y, sr, options)
+        del y
+        return result
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # A view is still referenced (e.g. by a traceback); the mapping
+            # goes away with the worker process
+            pass
+
+def run_analyzers(audio_file_path, transcription, y, sr, names=tuple(ANALYZERS), options=None,
+                  parallel=True, memory_budget=MEMORY_BUDGET_BYTES, max_workers=None,
+                  analyzer_options=None):
+    """
+    Run acoustic analyzers on one decoded buffer
+
+    Args:
+        audio_file_path: Path to audio file (existence checks, feature cache key)
+        transcription: Text transcription
+        y: Decoded audio samples
+        sr: Sample rate of y
+        names: Analyzers to run (keys of ANALYZERS)
+        options: Keyword arguments passed to every analyzer
+        parallel: Run in worker processes when the memory budget allows
+        memory_budget: Bytes the shared buffer and concurrent jobs may use
+        max_workers: Upper bound on worker processes (default: available CPUs)
+        analyzer_options: Analyzer name -> extra keyword arguments for that
+            analyzer only
+
+    Returns:
+        dict: Analyzer name -> result dict
+    """
+    options = {
+        name: {**(options or {}), **(analyzer_options or {}).get(name, {})}
+        for name in names
+    }
+    estimates = {name: estimate_job_bytes(name, len(y)) for name in names}
+    workers = min(
+        max_concurrent_jobs(list(estimates.values()), memory_budget - y.nbytes),
+        max_workers or available_cpus()
+    )
+
+    # Pool workers are daemonic and cannot start processes of their own
+    if not parallel or workers < 2 or multiprocessing.current_process().daemon:
+        return _run_serial(audio_file_path, transcription, y, sr, names, options)
+
+    return _run_shared(audio_file_path, transcription, y, sr, options, estimates, workers, memory_budget)
+
+def _run_serial(audio_file_path, transcription, y, sr, names, options):
+    """Run the analyzers one after another on one FeatureStore per quality profile"""
+    from feature_cache import FeatureStore
+    from quality import DEFAULT_QUALITY, QUALITY_PROFILES
+
+    # A shared store computes each feature (the STFT in particular) once for
+    # all analyzers instead of once per analyzer; an unknown profile is left
+    # for the analyzer to report
+    stores = {}
+    results = {}
+    for name in names:
+        quality = options[name].get("quality", DEFAULT_QUALITY)
+        if quality in QUALITY_PROFILES and quality not in stores:
+            stores[quality] = FeatureStore(audio_file_path, y=y, sr=sr, quality=quality)
+        analyzer_options = {**options[name], "store": stores[quality]} if quality in stores else options[name]
+        results[name] = call_analyzer(name, audio_file_path, transcription, y, sr, analyzer_options)
+    return results
+
+def _failed(error):
+    return {
+        "success": False,
+        "error": f"Analyzer process failed: {str(error) or type(error).__name__}"
+    }
+
+def _run_shared(audio_file_path, transcription, y, sr, options, estimates, workers, memory_budget):
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, y.nbytes))
+    try:
+        np.ndarray(y.shape, dtype=y.dtype, buffer=shm.buf)[:] = y
+        spec = (shm.name, y.shape, y.dtype.str, sr)
+
+        # Largest jobs first, so smaller ones fill the remaining budget
+        pending = sorted(estimates, key=estimates.get, reverse=True)
+        running = {}
+        results = {}
+        in_use = y.nbytes
+
+        monitor = BudgetMonitor(memory_budget, "parallel analysis")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    if running and not admits(in_use, estimates[name], memory_budget):
+                        continue
+                    pending.remove(name)
+                    try:
+                        future = executor.submit(
+                            _run_attached, name, spec, audio_file_path, transcription, options[name]
+                        )
+                    except BrokenProcessPool as e:
+                        # A worker died (e.g. killed for memory); fail the rest
+                        results[name] = _failed(e)
+                        continue
+                    in_use += estimates[name]
+                    running[future] = name
+
+                if not running:
+                    continue
+                # Wake up periodically to measure memory and retry admission
+                finished, _ = wait(running, timeout=MEMORY_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                monitor.check()
+                for future in finished:
+                    name = running.pop(future)
+                    in_use -= estimates[name]
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        results[name] = _failed(e)
+
+        return {name: results[name] for name in estimates}
+    finally:
+        shm.close()
+        shm.unlink()
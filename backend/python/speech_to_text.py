@@ -6,96 +6,165 @@ Converts audio file to text transcription using Google Speech Recognition
 
 import sys
 import json
-import speech_recognition as sr
 from pathlib import Path
 
-def speech_to_text(audio_file_path):
+from profiling import profiled, stage
+from result_cache import cached
+
+class AudioConversionError(Exception):
+    """Raised when an upload cannot be decoded for recognition"""
+
+# Sample rate compressed uploads are decoded at for recognition
+RECOGNITION_SAMPLE_RATE = 16000
+
+def to_audio_data(samples, sample_rate):
     """
-    Convert audio file to text
+    Wrap mono samples in recognizer-ready 16-bit AudioData
+    
+    Args:
+        samples: int16 samples, or float samples in [-1, 1]
+        sample_rate: Sample rate of samples
+        
+    Returns:
+        sr.AudioData: Audio for recognize_google
+    """
+    import numpy as np
+    import speech_recognition as sr
+    
+    samples = np.asarray(samples)
+    if samples.dtype != np.int16:
+        # Same conversion libsndfile applies when writing float data as
+        # PCM_16 (scale to int32, then keep the top 16 bits); exact in float32
+        samples = np.floor(np.rint(samples.astype(np.float32) * np.float32(2 ** 31)) / 65536)
+        samples = np.clip(samples, -32768, 32767).astype(np.int16)
+    return sr.AudioData(samples.astype("<i2", copy=False).tobytes(), int(sample_rate), 2)
+
+def load_samples(audio_file_path):
+    """
+    Decode an audio file into mono samples for recognition
+    
+    WAV and canonical PCM files (see pcm_store) keep their sample rate; other
+    formats are decoded at RECOGNITION_SAMPLE_RATE.
     
     Args:
         audio_file_path: Path to audio file
         
     Returns:
-        dict: {success: bool, transcription: str, error: str}
+        tuple: (int16 or float32 samples, sample rate)
     """
+    import pcm_store
+    
+    # Get file extension
+    file_ext = Path(audio_file_path).suffix.lower()
+    
     try:
-        import librosa
-        import soundfile as sf
-        import tempfile
-        import os
-        
-        recognizer = sr.Recognizer()
+        if pcm_store.is_pcm(audio_file_path):
+            return pcm_store.open_pcm(audio_file_path)
+        elif file_ext in ['.wav', '.wave']:
+            return pcm_store.read_wav(audio_file_path, dtype="int16")
+        else:
+            # Load audio file with librosa (supports many formats including MP4)
+            import librosa
+            return librosa.load(audio_file_path, sr=RECOGNITION_SAMPLE_RATE)
+    except Exception as e:
+        raise AudioConversionError(f"Failed to convert audio format: {str(e)}")
+
+def load_audio_data(audio_file_path):
+    """
+    Decode an audio file into recognizer-ready AudioData, in memory
+    
+    Args:
+        audio_file_path: Path to audio file
         
+    Returns:
+        sr.AudioData: Decoded audio (see load_samples)
+    """
+    return to_audio_data(*load_samples(audio_file_path))
+
+def recognize_google(audio):
+    """
+    Default recognize function: Google Web Speech API through the pooled,
+    rate-limited client (see recognizer_client)
+    
+    Raises NoSpeechError when nothing intelligible was said and
+    speech_recognition.RequestError when the service fails.
+    """
+    from recognizer_client import get_client
+    
+    return get_client().recognize(audio)
+
+def complete_transcription(result):
+    """Whether a result transcribed every segment; partial transcriptions are not cached"""
+    return bool(result.get("success")) and not result.get("failedSegments")
+
+@cached("speech_to_text", cacheable=complete_transcription)
+@profiled("speech_to_text")
+def speech_to_text(audio_file_path, samples=None, sample_rate=None, segmented=False, recognize=None):
+    """
+    Convert audio file to text
+    
+    Args:
+        audio_file_path: Path to audio file
+        samples: Optional already-decoded mono samples (int16, or float in
+            [-1, 1]); skips decoding the file
+        sample_rate: Sample rate of samples
+        segmented: Split at pauses and transcribe the segments concurrently
+            (see segmented_transcription); adds per-segment timestamps
+        recognize: Optional function AudioData -> text replacing the Google
+            recognizer (raises NoSpeechError when nothing was said)
+    
+    Returns:
+        dict: {success: bool, transcription: str, error: str}
+    """
+    try:
         # Check if file exists
-        if not Path(audio_file_path).exists():
+        if samples is None and not Path(audio_file_path).exists():
             return {
                 "success": False,
                 "error": f"Audio file not found: {audio_file_path}"
             }
         
-        # Get file extension
-        file_ext = Path(audio_file_path).suffix.lower()
+        import speech_recognition as sr
+        from segmented_transcription import NoSpeechError, TRANSCRIPTION_RETRIES, transcribe_segments
+        recognize = recognize or recognize_google
         
-        # If not WAV, convert to WAV first using librosa
-        if file_ext not in ['.wav', '.wave']:
-            try:
-                # Load audio file with librosa (supports many formats including MP4)
-                audio_data, sample_rate = librosa.load(audio_file_path, sr=16000)
-                
-                # Create temporary WAV file
-                temp_wav = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
-                temp_wav_path = temp_wav.name
-                temp_wav.close()
-                
-                # Save as WAV
-                sf.write(temp_wav_path, audio_data, sample_rate)
-                audio_file_to_use = temp_wav_path
-                cleanup_temp = True
-            except Exception as e:
-                return {
-                    "success": False,
-                    "error": f"Failed to convert audio format: {str(e)}"
-                }
-        else:
-            audio_file_to_use = audio_file_path
-            cleanup_temp = False
+        try:
+            with stage("load"):
+                if samples is None:
+                    samples, sample_rate = load_samples(audio_file_path)
+                audio = None if segmented else to_audio_data(samples, sample_rate)
+        except AudioConversionError as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        
+        if segmented:
+            with stage("recognize"):
+                # The default client already retries failed requests itself
+                retries = 0 if recognize is recognize_google else TRANSCRIPTION_RETRIES
+                return transcribe_segments(samples, sample_rate, recognize, retries=retries)
         
+        # Perform speech recognition
         try:
-            # Load audio file
-            with sr.AudioFile(audio_file_to_use) as source:
-                # Adjust for ambient noise
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                
-                # Record audio
-                audio = recognizer.record(source)
+            with stage("recognize"):
+                transcription = recognize(audio)
             
-            # Perform speech recognition
-            try:
-                transcription = recognizer.recognize_google(audio)
-                
-                return {
-                    "success": True,
-                    "transcription": transcription,
-                    "word_count": len(transcription.split())
-                }
-            except sr.UnknownValueError:
-                return {
-                    "success": False,
-                    "error": "Could not understand audio. Please ensure clear speech."
-                }
-            except sr.RequestError as e:
-                return {
-                    "success": False,
-                    "error": f"Speech recognition service error: {str(e)}"
-                }
-        finally:
-            # Clean up temporary file if created
-            if cleanup_temp and os.path.exists(audio_file_to_use):
-                try:
-                    os.unlink(audio_file_to_use)
-                except:
-                    pass
+            return {
+                "success": True,
+                "transcription": transcription,
+                "word_count": len(transcription.split())
+            }
+        except NoSpeechError:
+            return {
+                "success": False,
+                "error": "Could not understand audio. Please ensure clear speech."
+            }
+        except sr.RequestError as e:
+            return {
+                "success": False,
+                "error": f"Speech recognition service error: {str(e)}"
+            }
             
     except Exception as e:
         return {
@@ -112,5 +181,6 @@ if __name__ == "__main__":
         sys.exit(1)
     
     audio_path = sys.argv[1]
-    result = speech_to_text(audio_path)
+    segmented = "--segmented" in sys.argv[2:]
+    result = speech_to_text(audio_path, segmented=segmented)
     print(json.dumps(result))
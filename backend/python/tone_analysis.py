@@ -6,87 +6,192 @@ Analyzes speech tone including pitch variation, monotone detection, and energy
 
 import sys
 import json
-import numpy as np
-import librosa
 from pathlib import Path
 
-def analyze_tone(audio_file_path):
+import startup
+from profiling import profiled, stage
+from quality import DEFAULT_QUALITY, QUALITY_PROFILES, parse_quality
+from result_cache import cached
+
+# Pitch tracking frame settings (librosa.piptrack defaults)
+PITCH_N_FFT = 2048
+PITCH_HOP_LENGTH = 512
+
+# Frames analyzed per piptrack call; bounds the (n_bins x frames) matrices
+# to a few MB regardless of recording length
+PITCH_BLOCK_FRAMES = 256
+
+# Fast estimator: YIN on audio decimated to this rate
+YIN_SAMPLE_RATE = 8000
+YIN_FMIN = 65
+YIN_FMAX = 1000
+# Frames quieter than this (dB below the loudest frame) count as unvoiced
+YIN_SILENCE_DB = 40
+
+PITCH_METHODS = ("piptrack", "yin")
+
+@cached("tone_analysis")
+@profiled("tone_analysis")
+def analyze_tone(audio_file_path, y=None, sr=None, pitch_method="piptrack", stream=False,
+                 features=None, quality=DEFAULT_QUALITY, vad=False, store=None,
+                 sample=False):
     """
     Analyze speech tone
     
     Args:
         audio_file_path: Path to audio file
+        y: Optional pre-decoded audio samples (skips loading the file)
+        sr: Sample rate of y
+        pitch_method: "piptrack" (default) or "yin" (faster, see extract_pitch)
+        stream: Read the file in blocks with bounded memory instead of
+            loading it whole (piptrack only, see audio_stream)
+        features: Optional stream_features() result to reuse in stream mode
+        quality: Quality profile for the full-load path (see quality)
+        vad: Track pitch on voiced frames only (see vad; full-load path
+            with piptrack) and report speechRatio
+        store: Optional FeatureStore of the same audio and quality, shared
+            with the other analyzers so features are computed once
+        sample: Estimate recordings of SAMPLE_MIN_SECONDS or more from a
+            sample of windows and add confidence intervals (see sampling;
+            piptrack only); shorter recordings take the exact path
         
     Returns:
         dict: Tone analysis results
     """
     try:
-        # Check if file exists
-        if not Path(audio_file_path).exists():
+        if pitch_method not in PITCH_METHODS:
             return {
                 "success": False,
-                "error": f"Audio file not found: {audio_file_path}"
+                "error": f"Unknown pitch method: {pitch_method}"
             }
         
-        # Load audio file
-        y, sr = librosa.load(audio_file_path, sr=None)
-        
-        # Extract pitch (fundamental frequency)
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        
-        # Get pitch values (filter out zeros)
-        pitch_values = []
-        for t in range(pitches.shape[1]):
-            index = magnitudes[:, t].argmax()
-            pitch = pitches[index, t]
-            if pitch > 0:
-                pitch_values.append(pitch)
-        
-        if len(pitch_values) == 0:
+        if quality not in QUALITY_PROFILES:
             return {
                 "success": False,
-                "error": "Could not extract pitch information"
+                "error": f"Unknown quality profile: {quality}"
             }
         
-        # Calculate pitch statistics
-        mean_pitch = np.mean(pitch_values)
-        std_pitch = np.std(pitch_values)
-        pitch_range = np.max(pitch_values) - np.min(pitch_values)
-        
-        # Calculate coefficient of variation for pitch
-        cv_pitch = (std_pitch / mean_pitch) * 100 if mean_pitch > 0 else 0
+        # Check if file exists (not needed when stream features are supplied)
+        if not (stream and features is not None) and not Path(audio_file_path).exists():
+            return {
+                "success": False,
+                "error": f"Audio file not found: {audio_file_path}"
+            }
         
-        # Analyze energy/volume
-        energy = librosa.feature.rms(y=y)[0]
-        mean_energy = np.mean(energy)
-        std_energy = np.std(energy)
-        cv_energy = (std_energy / mean_energy) * 100 if mean_energy > 0 else 0
+        # Estimate long recordings from a sample of windows (see sampling);
+        # shorter ones, or files that cannot seek, take the exact path
+        if sample and features is None and pitch_method == "piptrack":
+            from sampling import sample_features
+            features = sample_features(audio_file_path, pitch=True)
+            stream = stream or features is not None
         
-        # Detect monotone (low pitch variation)
-        is_monotone = cv_pitch < 10
+        with stage("features"):
+            if stream:
+                if pitch_method != "piptrack":
+                    return {
+                        "success": False,
+                        "error": "Streaming mode only supports the piptrack pitch method"
+                    }
+                
+                # Accumulate pitch and energy statistics block by block
+                if features is None:
+                    from audio_stream import stream_features
+                    features = stream_features(audio_file_path, pitch=True)
+                pitch_stats = features["pitch"]
+                
+                if pitch_stats.count == 0:
+                    return {
+                        "success": False,
+                        "error": "Could not extract pitch information"
+                    }
+                
+                mean_pitch = pitch_stats.mean
+                std_pitch = pitch_stats.std
+                pitch_range = pitch_stats.max - pitch_stats.min
+                mean_energy = features["rms"].mean
+                std_energy = features["rms"].std
+            else:
+                # Features are read through the cache; the file is only
+                # decoded (unless the caller already did) on a cache miss
+                import numpy as np
+                from feature_cache import FeatureStore
+                if store is None:
+                    store = FeatureStore(audio_file_path, y=y, sr=sr, quality=quality)
+                
+                # Skip silent frames before pitch tracking
+                frame_mask = store.voiced_mask() if vad else None
+                params = pitch_params(pitch_method, store.n_fft, store.hop_length)
+                if frame_mask is not None:
+                    params["vad"] = store.vad_params()
+                
+                # Extract pitch (fundamental frequency) of the voiced frames,
+                # from the store's shared STFT unless VAD would skip most of it
+                pitch_values = store.get(
+                    "pitch", params,
+                    lambda y, sr: extract_pitch(
+                        y, sr, method=pitch_method, n_fft=store.n_fft, hop_length=store.hop_length,
+                        frame_mask=frame_mask,
+                        S=store.magnitude(compute=frame_mask is None) if pitch_method == "piptrack" else None
+                    )
+                )
+                
+                if len(pitch_values) == 0:
+                    return {
+                        "success": False,
+                        "error": "Could not extract pitch information"
+                    }
+                
+                # Calculate pitch statistics
+                mean_pitch = np.mean(pitch_values)
+                std_pitch = np.std(pitch_values)
+                pitch_range = np.max(pitch_values) - np.min(pitch_values)
+                
+                # Analyze energy/volume
+                energy = store.rms()
+                mean_energy = np.mean(energy)
+                std_energy = np.std(energy)
         
-        # Calculate tone score (0-100)
-        tone_score = calculate_tone_score(cv_pitch, cv_energy, is_monotone)
+        with stage("scoring"):
+            # Calculate coefficients of variation for pitch and energy
+            cv_pitch, cv_energy = variation_coefficients(mean_pitch, std_pitch, mean_energy, std_energy)
+            
+            # Detect monotone (low pitch variation)
+            is_monotone = cv_pitch < 10
+            
+            # Calculate tone score (0-100)
+            tone_score = calculate_tone_score(cv_pitch, cv_energy, is_monotone)
         
         # Generate feedback
-        feedback = generate_tone_feedback(
-            tone_score,
-            cv_pitch,
-            cv_energy,
-            is_monotone,
-            mean_pitch
-        )
+        with stage("feedback"):
+            feedback = generate_tone_feedback(
+                tone_score,
+                cv_pitch,
+                cv_energy,
+                is_monotone,
+                mean_pitch
+            )
         
-        return {
+        result = {
             "success": True,
             "score": int(round(tone_score)),
-            "pitchVariation": float(round(cv_pitch, 2)),
-            "energyVariation": float(round(cv_energy, 2)),
+            "pitchVariation": round(float(cv_pitch), 2),
+            "energyVariation": round(float(cv_energy), 2),
             "isMonotone": bool(is_monotone),
-            "meanPitch": float(round(mean_pitch, 2)),
-            "pitchRange": float(round(pitch_range, 2)),
-            "feedback": feedback
+            "meanPitch": round(float(mean_pitch), 2),
+            "pitchRange": round(float(pitch_range), 2),
+            "feedback": feedback,
+            "metrics": {
+                "cv_pitch": float(cv_pitch),
+                "cv_energy": float(cv_energy)
+            }
         }
+        if vad and not stream:
+            from vad import speech_ratio
+            result["speechRatio"] = round(speech_ratio(frame_mask), 4)
+        if stream and "windows" in features:
+            from sampling import with_intervals
+            result = with_intervals(result, features, stream_metrics)
+        return result
         
     except Exception as e:
         return {
@@ -94,6 +199,162 @@ def analyze_tone(audio_file_path):
             "error": f"Tone analysis error: {str(e)}"
         }
 
+def extract_pitch(y, sr, method="piptrack", n_fft=PITCH_N_FFT, hop_length=PITCH_HOP_LENGTH,
+                  frame_mask=None, S=None):
+    """
+    Extract per-frame pitch values, dropping frames without a pitch
+    
+    "piptrack" gives the same values as taking the strongest piptrack peak
+    of every frame over the whole signal, but only holds PITCH_BLOCK_FRAMES
+    frames of the pitch/magnitude matrices at a time.
+    
+    "yin" runs librosa.yin on audio decimated to YIN_SAMPLE_RATE and skips
+    frames more than YIN_SILENCE_DB below the loudest one. On continuous
+    voiced speech pitched above piptrack's 150 Hz floor, meanPitch and
+    pitchVariation stay within 1% of the piptrack values. piptrack also
+    reports peaks in silent/noisy frames and a harmonic for voices below
+    150 Hz, so on recordings with long pauses or low voices "yin" gives
+    lower (closer to the true fundamental) meanPitch and pitchVariation.
+    
+    Args:
+        y: Audio samples
+        sr: Sample rate
+        method: "piptrack" or "yin"
+        n_fft: piptrack FFT size
+        hop_length: Frame hop at sample rate sr
+        frame_mask: Optional voiced flag per frame (see vad); piptrack then
+            only runs on those frames. "yin" gates frames by energy itself
+            and ignores it.
+        S: Optional STFT magnitude of y (centered, n_fft, hop_length) to
+            run piptrack on instead of transforming y again; "yin" ignores it
+        
+    Returns:
+        np.ndarray: Pitch values in Hz
+    """
+    if method == "yin":
+        return yin_pitch(y, sr, hop_length=hop_length)
+    if S is not None:
+        return magnitude_pitch(S if frame_mask is None else S[:, frame_mask], sr, n_fft=n_fft, hop_length=hop_length)
+    if frame_mask is not None:
+        return masked_piptrack_pitch(y, sr, frame_mask, n_fft=n_fft, hop_length=hop_length)
+    return piptrack_pitch(y, sr, n_fft=n_fft, hop_length=hop_length)
+
+def pitch_params(method, n_fft=PITCH_N_FFT, hop_length=PITCH_HOP_LENGTH):
+    """Parameters that determine extract_pitch output (feature cache key)"""
+    if method == "yin":
+        return {
+            "method": method, "hop_length": hop_length, "sample_rate": YIN_SAMPLE_RATE,
+            "fmin": YIN_FMIN, "fmax": YIN_FMAX, "silence_db": YIN_SILENCE_DB
+        }
+    return {"method": method, "n_fft": n_fft, "hop_length": hop_length}
+
+def piptrack_pitch(y, sr, n_fft=PITCH_N_FFT, hop_length=PITCH_HOP_LENGTH,
+                   block_frames=PITCH_BLOCK_FRAMES):
+    """Strongest piptrack peak per frame, computed block by block"""
+    import numpy as np
+    import librosa
+    
+    # Pad once like a centered STFT so each block can be framed without centering
+    y_padded = np.pad(y, n_fft // 2)
+    n_frames = 1 + len(y) // hop_length
+    
+    pitch_blocks = []
+    for start in range(0, n_frames, block_frames):
+        stop = min(start + block_frames, n_frames)
+        segment = y_padded[start * hop_length:(stop - 1) * hop_length + n_fft]
+        pitches, magnitudes = librosa.piptrack(
+            y=segment, sr=sr, n_fft=n_fft, hop_length=hop_length, center=False
+        )
+        
+        # Pick the pitch at the strongest magnitude of every frame at once
+        strongest = magnitudes.argmax(axis=0)
+        frame_pitch = pitches[strongest, np.arange(pitches.shape[1])]
+        pitch_blocks.append(frame_pitch[frame_pitch > 0])
+    
+    return np.concatenate(pitch_blocks)
+
+def magnitude_pitch(S, sr, n_fft=PITCH_N_FFT, hop_length=PITCH_HOP_LENGTH,
+                    block_frames=PITCH_BLOCK_FRAMES):
+    """Strongest piptrack peak per frame of a precomputed STFT magnitude (same values as piptrack_pitch)"""
+    import numpy as np
+    import librosa
+    
+    pitch_blocks = [np.zeros(0, dtype=np.float32)]
+    for start in range(0, S.shape[1], block_frames):
+        pitches, magnitudes = librosa.piptrack(
+            S=S[:, start:start + block_frames], sr=sr, n_fft=n_fft, hop_length=hop_length
+        )
+        frame_pitch = pitches[magnitudes.argmax(axis=0), np.arange(pitches.shape[1])]
+        pitch_blocks.append(frame_pitch[frame_pitch > 0])
+    
+    return np.concatenate(pitch_blocks)
+
+def masked_piptrack_pitch(y, sr, frame_mask, n_fft=PITCH_N_FFT, hop_length=PITCH_HOP_LENGTH):
+    """Strongest piptrack peak of the voiced frames only (same values as piptrack_pitch there)"""
+    import numpy as np
+    import librosa
+    from vad import masked_frames
+    
+    def strongest(segment):
+        pitches, magnitudes = librosa.piptrack(
+            y=segment, sr=sr, n_fft=n_fft, hop_length=hop_length, center=False
+        )
+        return pitches[magnitudes.argmax(axis=0), np.arange(pitches.shape[1])]
+    
+    frame_pitch = masked_frames(y, frame_mask, n_fft, hop_length, strongest)
+    return frame_pitch[frame_pitch > 0]
+
+def yin_pitch(y, sr, hop_length=PITCH_HOP_LENGTH):
+    """Fundamental frequency of the non-silent frames using YIN on decimated audio"""
+    import numpy as np
+    import librosa
+    
+    target_sr = min(sr, YIN_SAMPLE_RATE)
+    if target_sr != sr:
+        y = librosa.resample(y, orig_sr=sr, target_sr=target_sr, res_type="soxr_qq")
+    
+    # Keep the frame duration close to the piptrack frames
+    hop_length = max(1, int(round(hop_length * target_sr / sr)))
+    frame_length = 4 * hop_length
+    if len(y) < frame_length:
+        return np.zeros(0, dtype=np.float32)
+    
+    f0 = librosa.yin(
+        y, fmin=YIN_FMIN, fmax=min(YIN_FMAX, target_sr / 2 - 1), sr=target_sr,
+        frame_length=frame_length, hop_length=hop_length
+    )
+    
+    # YIN always returns an estimate, so gate out silent frames by energy
+    rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
+    if len(rms) == 0 or np.max(rms) <= 0:
+        return np.zeros(0, dtype=np.float32)
+    voiced = librosa.amplitude_to_db(rms, ref=np.max) > -YIN_SILENCE_DB
+    
+    n = min(len(f0), len(voiced))
+    return f0[:n][voiced[:n]]
+
+def variation_coefficients(mean_pitch, std_pitch, mean_energy, std_energy):
+    """Coefficients of variation (percent) of pitch and energy"""
+    cv_pitch = (std_pitch / mean_pitch) * 100 if mean_pitch > 0 else 0
+    cv_energy = (std_energy / mean_energy) * 100 if mean_energy > 0 else 0
+    return cv_pitch, cv_energy
+
+def stream_metrics(features):
+    """
+    Raw metrics of stream_features() output, without scoring or feedback;
+    the sampled-estimate bootstrap calls this once per resample
+    
+    Returns:
+        dict: {"cv_pitch", "cv_energy"}, or None without pitch information
+    """
+    pitch_stats = features["pitch"]
+    if pitch_stats.count == 0:
+        return None
+    cv_pitch, cv_energy = variation_coefficients(
+        pitch_stats.mean, pitch_stats.std, features["rms"].mean, features["rms"].std
+    )
+    return {"cv_pitch": float(cv_pitch), "cv_energy": float(cv_energy)}
+
 def calculate_tone_score(cv_pitch, cv_energy, is_monotone):
     """Calculate tone score based on variation metrics"""
     # Ideal pitch variation: 15-30%
@@ -166,6 +427,14 @@ if __name__ == "__main__":
         }))
         sys.exit(1)
     
-    audio_path = sys.argv[1]
-    result = analyze_tone(audio_path)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    stream = "--stream" in sys.argv[1:]
+    vad = "--vad" in sys.argv[1:]
+    sample = "--sample" in sys.argv[1:]
+    quality = parse_quality(sys.argv[1:])
+    audio_path = args[0]
+    pitch_method = args[1] if len(args) > 1 else "piptrack"
+    result = analyze_tone(
+        audio_path, pitch_method=pitch_method, stream=stream, quality=quality, vad=vad, sample=sample
+    )
     print(json.dumps(result))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Voice Activity Detection
+Cheap energy-based pre-pass that marks the frames worth running the
+expensive spectral features (STFT, piptrack, spectral centroid) on
+
+A frame is voiced when its RMS is within VAD_TOP_DB of the loudest frame,
+the same rule librosa.effects.split applies, widened by a few frames so
+onsets and decays are kept. Per-frame features computed on the voiced runs
+only are identical to the same frames of a full-signal analysis.
+"""
+
+import startup
+
+# Frames more than this many dB below the loudest frame are silence
+# (same threshold as the confidence analyzer's pause detection)
+VAD_TOP_DB = 30
+
+# Frames kept on each side of a voiced run
+VAD_PAD_FRAMES = 2
+
+# Frames per feature call inside a voiced run; bounds the spectra held at once
+VAD_BLOCK_FRAMES = 256
+
+def voiced_mask(rms, top_db=VAD_TOP_DB, pad_frames=VAD_PAD_FRAMES):
+    """
+    Boolean voiced flag per frame from frame RMS energy
+
+    Args:
+        rms: Frame RMS values
+        top_db: Silence threshold below the loudest frame
+        pad_frames: Frames added on each side of every voiced run
+
+    Returns:
+        np.ndarray: bool mask, one entry per frame
+    """
+    import numpy as np
+    import librosa
+
+    rms = np.asarray(rms)
+    if len(rms) == 0 or np.max(rms) <= 0:
+        return np.zeros(len(rms), dtype=bool)
+
+    mask = librosa.amplitude_to_db(rms, ref=np.max, top_db=None) > -top_db
+    if pad_frames > 0:
+        # Widen every run by pad_frames: a frame is kept when any frame
+        # within pad_frames of it is voiced
+        counts = np.concatenate(([0], np.cumsum(mask)))
+        index = np.arange(len(mask))
+        low = np.maximum(index - pad_frames, 0)
+        high = np.minimum(index + pad_frames + 1, len(mask))
+        mask = counts[high] - counts[low] > 0
+    return mask
+
+def voiced_runs(mask):
+    """(start, stop) frame indices of the runs of True in mask"""
+    import numpy as np
+
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+def speech_ratio(mask):
+    """Fraction of frames that are voiced"""
+    return float(mask.mean()) if len(mask) > 0 else 0.0
+
+def masked_frames(y, mask, n_fft, hop_length, compute, block_frames=VAD_BLOCK_FRAMES):
+    """
+    Run a per-frame feature on the voiced frames only
+
+    The signal is padded once like a centered STFT, and each voiced run is
+    framed with center=False, so every returned value equals the value of
+    the same frame in a centered full-signal analysis.
+
+    Args:
+        y: Audio samples
+        mask: Voiced flag per frame (1 + len(y) // hop_length frames)
+        n_fft: Frame length
+        hop_length: Frame hop
+        compute: Function segment -> per-frame 1-D array, framing the
+            segment with center=False
+        block_frames: Most frames per compute call
+
+    Returns:
+        np.ndarray: Feature values of the voiced frames, in frame order
+    """
+    import numpy as np
+
+    y_padded = np.pad(y, n_fft // 2)
+    values = []
+    for start, stop in voiced_runs(mask):
+        for block_start in range(start, stop, block_frames):
+            block_stop = min(block_start + block_frames, stop)
+            segment = y_padded[block_start * hop_length:(block_stop - 1) * hop_length + n_fft]
+            values.append(np.asarray(compute(segment)))
+    if not values:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(values)
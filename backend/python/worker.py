@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Analysis Worker
+Long-lived worker that keeps the analyzers imported and processes
+JSON-lines jobs from stdin or a UNIX socket
+
+Each job is one line of JSON:
+    {"id": "job-1", "script": "pace_analysis", "args": ["/path/audio.wav", "text"]}
+
+Each result is one line of JSON tagged with the same id:
+    {"id": "job-1", "script": "pace_analysis", "result": {...}}
+
+"script" and "args" follow the command line of the standalone scripts,
+including flags such as "--stream" and "--quality=fast" after the required
+arguments. Keyword arguments can also be passed as an "options" object:
+    {"id": "job-2", "script": "analyze_all", "args": [...], "options": {"stream": true}}
+"""
+
+import os
+import sys
+import json
+import signal
+import inspect
+import argparse
+import importlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Script name -> (module, function, number of required positional arguments,
+# keyword names for optional trailing arguments)
+SCRIPTS = {
+    "speech_to_text": ("speech_to_text", "speech_to_text", 1, ()),
+    "fluency_analysis": ("fluency_analysis", "analyze_fluency", 1, ()),
+    "pace_analysis": ("pace_analysis", "analyze_pace", 2, ()),
+    "tone_analysis": ("tone_analysis", "analyze_tone", 1, ("pitch_method",)),
+    "confidence_analysis": ("confidence_analysis", "analyze_confidence", 2, ()),
+    "analyze_all": ("analyze_all", "analyze_all", 2, ()),
+    "clip_batch": ("clip_batch", "analyze_clip_source", 1, ()),
+    "analyze_upload": ("job_queue", "analyze_upload", 1, ()),
+    "job_queue": ("job_queue", "queue_command", 1, ("argument",)),
+    "pcm_store": ("pcm_store", "ingest_audio", 1, ("output_path",))
+}
+
+# Recycle the worker processes after this many jobs each to bound memory growth
+DEFAULT_MAX_JOBS = 50
+
+def warm_up():
+    """Import every analyzer module and load its compiled kernels once per worker process"""
+    for module_name, _, _, _ in SCRIPTS.values():
+        importlib.import_module(module_name)
+
+    import startup
+    try:
+        startup.warm_up()
+    except Exception:
+        # A failed warm-up only costs the first job its compile time
+        pass
+
+def start_worker_process():
+    """Pool initializer: the serving process handles Ctrl+C and SIGTERM, then warm up"""
+    # Workers start on demand, after serve_socket has installed its handler
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    warm_up()
+
+def run_job(job):
+    """
+    Run a single job inside a worker process
+
+    Args:
+        job: dict with id, script, args and optional options
+
+    Returns:
+        dict: {id, script, result}
+    """
+    job_id = job.get("id")
+    script = job.get("script")
+    try:
+        if script not in SCRIPTS:
+            raise ValueError(f"Unknown script: {script}")
+
+        module_name, function_name, arg_count, optional_names = SCRIPTS[script]
+        function = getattr(importlib.import_module(module_name), function_name)
+        args = job.get("args") or []
+        if len(args) < arg_count:
+            raise ValueError(f"{script} requires {arg_count} argument(s)")
+
+        # Command line flags such as "--stream" or "--quality=fast" become
+        # keyword arguments. Only arguments after the required positionals
+        # are flags, and only for parameters of the script's function, so a
+        # transcription that starts with "--" stays a positional argument.
+        parameters = inspect.signature(function).parameters
+        keyword_names = list(parameters)[arg_count:]
+        any_keyword = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values())
+        options = {}
+        trailing = []
+        for arg in args[arg_count:]:
+            if not (isinstance(arg, str) and arg.startswith("--")):
+                trailing.append(arg)
+                continue
+            name, _, value = arg[2:].partition("=")
+            name = name.replace("-", "_")
+            if name not in keyword_names and not any_keyword:
+                raise ValueError(f"Unknown option for {script}: {arg}")
+            options[name] = value if value else True
+        if len(trailing) > len(optional_names):
+            raise ValueError(f"Too many arguments for {script}")
+        options.update(zip(optional_names, trailing))
+
+        # Keyword arguments may also be given as a JSON object
+        options.update(job.get("options") or {})
+        result = function(*args[:arg_count], **options)
+    except Exception as e:
+        result = {
+            "success": False,
+            "error": f"Worker error: {str(e)}"
+        }
+
+    return {"id": job_id, "script": script, "result": result}
+
+def parse_job(line):
+    """Parse a JSON-lines job, returning (job, error_response)"""
+    try:
+        job = json.loads(line)
+        if not isinstance(job, dict):
+            raise ValueError("job must be a JSON object")
+        return job, None
+    except ValueError as e:
+        return None, {
+            "id": None,
+            "script": None,
+            "result": {
+                "success": False,
+                "error": f"Invalid job: {str(e)}"
+            }
+        }
+
+class ResultWriter:
+    """Thread-safe JSON-lines writer shared by pool callbacks"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def write(self, response):
+        line = json.dumps(response) + "\n"
+        with self.lock:
+            try:
+                self.stream.write(line)
+                self.stream.flush()
+            except (OSError, ValueError):
+                # Client went away; nothing left to report to
+                pass
+
+class JobPool:
+    """
+    Worker processes running jobs
+
+    A worker process that dies mid-job (killed for memory, or crashed)
+    breaks its process pool: every job the pool still held is answered with
+    an error and later jobs go to a fresh pool. Pools are also retired after
+    max_jobs jobs per worker process, like a pool's maxtasksperchild.
+    """
+
+    def __init__(self, workers, max_jobs):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.lock = threading.Lock()
+        self.executor = None
+        self.submitted = 0
+
+    def _replace(self):
+        if self.executor is not None:
+            # Running jobs of a retired pool still finish and report
+            self.executor.shutdown(wait=False)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=start_worker_process)
+        self.submitted = 0
+
+    def submit(self, job):
+        """Start a job; returns (pool, future) where pool is the executor that runs it"""
+        with self.lock:
+            if self.executor is None or self.submitted >= self.workers * self.max_jobs:
+                self._replace()
+            try:
+                future = self.executor.submit(run_job, job)
+            except BrokenProcessPool:
+                self._replace()
+                future = self.executor.submit(run_job, job)
+            self.submitted += 1
+            return self.executor, future
+
+    def broken(self, executor):
+        """Replace executor after one of its processes died, unless already done"""
+        with self.lock:
+            if executor is self.executor:
+                self._replace()
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+
+def submit(pool, writer, line):
+    """
+    Dispatch one input line to the pool; the result is written when ready
+
+    Returns:
+        threading.Event: Set once the job is answered, or None for a line
+        answered right away
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    job, error_response = parse_job(line)
+    if error_response:
+        writer.write(error_response)
+        return None
+
+    def failure(message):
+        return {
+            "id": job.get("id"),
+            "script": job.get("script"),
+            "result": {
+                "success": False,
+                "error": f"Worker error: {message}"
+            }
+        }
+
+    answered = threading.Event()
+    executor, future = pool.submit(job)
+
+    def on_done(future):
+        try:
+            writer.write(future.result())
+        except BrokenProcessPool:
+            pool.broken(executor)
+            writer.write(failure("worker process died before the job finished"))
+        except Exception as e:
+            writer.write(failure(str(e)))
+        finally:
+            answered.set()
+
+    future.add_done_callback(on_done)
+    return answered
+
+def serve_stdin(pool):
+    """Read jobs from stdin until EOF and write results to stdout"""
+    writer = ResultWriter(sys.stdout)
+    pending = []
+    for line in sys.stdin:
+        pending.append(submit(pool, writer, line))
+        pending = [p for p in pending if p is not None and not p.is_set()]
+
+    for p in pending:
+        p.wait()
+
+class BytesWriterAdapter:
+    """Adapt a binary socket file to the text interface ResultWriter expects"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text):
+        self.wfile.write(text.encode("utf-8"))
+
+    def flush(self):
+        self.wfile.flush()
+
+def serve_socket(pool, socket_path):
+    """Accept JSON-lines connections on a UNIX socket until interrupted"""
+    import socketserver
+
+    class JobHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            writer = ResultWriter(BytesWriterAdapter(self.wfile))
+            pending = []
+            for raw in self.rfile:
+                pending.append(submit(pool, writer, raw.decode("utf-8")))
+                pending = [p for p in pending if p is not None and not p.is_set()]
+
+            # Keep the connection open until its last result is written
+            for p in pending:
+                p.wait()
+
+    class JobServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    # Treat SIGTERM like Ctrl+C so the socket file is removed on shutdown
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    with JobServer(socket_path, JobHandler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-lived speech analysis worker")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (default: 1)")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS,
+                        help=f"Recycle the workers after this many jobs each (default: {DEFAULT_MAX_JOBS})")
+    parser.add_argument("--socket",
+                        help="Listen on this UNIX socket path instead of stdin/stdout")
+    options = parser.parse_args(argv)
+
+    pool = JobPool(max(1, options.workers), max(1, options.max_jobs))
+    try:
+        if options.socket:
+            serve_socket(pool, options.socket)
+        else:
+            serve_stdin(pool)
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ const { upload, handleUploadError } = require('../middleware/upload');
 const {
     uploadSpeech,
     analyzeSpeech,
+    getAnalysisStatus,
     getSpeechHistory,
     getAnalysisById,
     deleteSpeech
@@ -31,6 +32,13 @@ router.post(
  */
 router.post('/analyze', authenticateUser, analyzeSpeech);
 
+/**
+ * GET /api/speech/jobs/:id
+ * Get the status of a queued analysis (ANALYSIS_QUEUE=true) by session ID
+ * Requires authentication
+ */
+router.get('/jobs/:id', authenticateUser, getAnalysisStatus);
+
 /**
  * GET /api/speech/history
  * Get user's speech analysis history
@@ -2,6 +2,7 @@ const express = require('express');
 const cors = require('cors');
 const dotenv = require('dotenv');
 const { testConnection } = require('./config/supabase');
+const { stopWorker } = require('./utils/pythonWorker');
 
 // Load environment variables
 dotenv.config();
@@ -66,7 +67,7 @@ const startServer = async () => {
         // Test Supabase connection
         await testConnection();
 
-        app.listen(PORT, () => {
+        const server = app.listen(PORT, () => {
             console.log('=================================');
             console.log(`🚀 StutterLess Backend Server`);
             console.log(`📡 Running on port ${PORT}`);
@@ -74,6 +75,16 @@ const startServer = async () => {
             console.log(`⏰ Started at: ${new Date().toISOString()}`);
             console.log('=================================');
         });
+
+        // Stop taking requests and let the Python worker finish its jobs before exiting
+        const shutdown = async (signal) => {
+            console.log(`${signal} received, shutting down`);
+            server.close();
+            await stopWorker();
+            process.exit(0);
+        };
+        process.once('SIGTERM', shutdown);
+        process.once('SIGINT', shutdown);
     } catch (error) {
         console.error('Failed to start server:', error);
         process.exit(1);
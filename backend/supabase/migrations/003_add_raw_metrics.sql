@@ -0,0 +1,5 @@
+-- Store the versioned raw-metrics record of each analysis
+-- Scores can be recomputed from it after a scoring change (see python/rescoring.py)
+
+ALTER TABLE public.analysis_results
+    ADD COLUMN IF NOT EXISTS raw_metrics JSONB;
@@ -0,0 +1,15 @@
+-- Allow one analysis_results row per session
+-- Concurrent polls of a queued analysis may both try to save it; the constraint
+-- lets the second save find the first one's row instead of adding a duplicate
+
+-- Keep the earliest row of sessions that were already saved twice
+DELETE FROM public.analysis_results a
+    USING public.analysis_results b
+    WHERE a.session_id = b.session_id
+    AND (a.created_at, a.id) > (b.created_at, b.id);
+
+ALTER TABLE public.analysis_results
+    ADD CONSTRAINT analysis_results_session_id_key UNIQUE (session_id);
+
+-- The unique index serves session lookups
+DROP INDEX IF EXISTS public.idx_analysis_results_session_id;
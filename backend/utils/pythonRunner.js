@@ -1,5 +1,9 @@
 const { spawn } = require('child_process');
 const path = require('path');
+const { runWorkerJob } = require('./pythonWorker');
+
+// Route scripts through the long-lived Python worker instead of one process per script
+const useWorker = process.env.PYTHON_WORKER === 'true';
 
 /**
  * Execute a Python script and return the result
@@ -8,6 +12,10 @@ const path = require('path');
  * @returns {Promise<Object>} - Parsed JSON output from Python script
  */
 const runPythonScript = (scriptName, args = []) => {
+    if (useWorker) {
+        return runWorkerJob(scriptName, args);
+    }
+
     return new Promise((resolve, reject) => {
         const scriptPath = path.join(__dirname, '..', 'python', `${scriptName}.py`);
 
@@ -65,53 +73,173 @@ const runPythonScript = (scriptName, args = []) => {
 };
 
 /**
- * Run all speech analysis scripts in parallel
+ * Run each speech analysis script in its own process (legacy path)
+ * @param {string} audioFilePath - Path to the audio file
+ * @param {string} transcription - Text transcription of the speech
+ * @returns {Promise<Object>} - Combined analysis results
+ */
+const runSeparateAnalyses = async (audioFilePath, transcription) => {
+    // Helper function to run analysis with fallback
+    const runWithFallback = async (scriptName, args, defaultScore = 50) => {
+        try {
+            const result = await runPythonScript(scriptName, args);
+            return result;
+        } catch (error) {
+            console.error(`[${scriptName}] Failed, using default values:`, error.message);
+            return {
+                success: true,
+                score: defaultScore,
+                feedback: `Analysis could not be completed. ${error.message}`
+            };
+        }
+    };
+
+    // Run analyses SEQUENTIALLY to reduce memory usage (Render free tier has 512MB limit)
+    // Running in parallel causes memory overflow with librosa
+    const fluencyResult = await runWithFallback('fluency_analysis', [transcription], 50);
+    const paceResult = await runWithFallback('pace_analysis', [audioFilePath, transcription], 50);
+    const toneResult = await runWithFallback('tone_analysis', [audioFilePath], 50);
+    const confidenceResult = await runWithFallback('confidence_analysis', [audioFilePath, transcription], 50);
+
+    // Calculate overall score (weighted average)
+    const overallScore = Math.round(
+        (fluencyResult.score * 0.25) +
+        (paceResult.score * 0.25) +
+        (toneResult.score * 0.25) +
+        (confidenceResult.score * 0.25)
+    );
+
+    return {
+        fluency: fluencyResult,
+        pace: paceResult,
+        tone: toneResult,
+        confidence: confidenceResult,
+        overallScore
+    };
+};
+
+/**
+ * analyze_all flags selected by the environment
+ * @returns {Array} - Command line flags
+ */
+const analysisFlags = () => {
+    // ANALYSIS_STREAMING reads the audio in blocks to keep memory bounded on long files
+    // ANALYSIS_PARALLEL runs the acoustic analyzers in processes sharing the decoded audio
+    const flags = [];
+    if (process.env.ANALYSIS_STREAMING === 'true') {
+        flags.push('--stream');
+    }
+    if (process.env.ANALYSIS_PARALLEL === 'true') {
+        flags.push('--parallel');
+    }
+    // ANALYSIS_QUALITY trades metric resolution for speed (precise, balanced, fast)
+    if (process.env.ANALYSIS_QUALITY) {
+        flags.push(`--quality=${process.env.ANALYSIS_QUALITY}`);
+    }
+    // ANALYSIS_VAD skips silent frames in pitch tracking and the spectral centroid
+    if (process.env.ANALYSIS_VAD === 'true') {
+        flags.push('--vad');
+    }
+    // ANALYSIS_SAMPLE estimates long recordings from a sample of windows, with confidence intervals
+    if (process.env.ANALYSIS_SAMPLE === 'true') {
+        flags.push('--sample');
+    }
+    return flags;
+};
+
+/**
+ * Run all speech analyses on a single decode of the audio file
  * @param {string} audioFilePath - Path to the audio file
  * @param {string} transcription - Text transcription of the speech
  * @returns {Promise<Object>} - Combined analysis results
  */
 const runFullAnalysis = async (audioFilePath, transcription) => {
     try {
-        // Helper function to run analysis with fallback
-        const runWithFallback = async (scriptName, args, defaultScore = 50) => {
-            try {
-                const result = await runPythonScript(scriptName, args);
-                return result;
-            } catch (error) {
-                console.error(`[${scriptName}] Failed, using default values:`, error.message);
-                return {
-                    success: true,
-                    score: defaultScore,
-                    feedback: `Analysis could not be completed. ${error.message}`
-                };
-            }
-        };
-
-        // Run analyses SEQUENTIALLY to reduce memory usage (Render free tier has 512MB limit)
-        // Running in parallel causes memory overflow with librosa
-        const fluencyResult = await runWithFallback('fluency_analysis', [transcription], 50);
-        const paceResult = await runWithFallback('pace_analysis', [audioFilePath, transcription], 50);
-        const toneResult = await runWithFallback('tone_analysis', [audioFilePath], 50);
-        const confidenceResult = await runWithFallback('confidence_analysis', [audioFilePath, transcription], 50);
-
-        // Calculate overall score (weighted average)
-        const overallScore = Math.round(
-            (fluencyResult.score * 0.25) +
-            (paceResult.score * 0.25) +
-            (toneResult.score * 0.25) +
-            (confidenceResult.score * 0.25)
-        );
+        let result;
+        try {
+            // analyze_all decodes once and applies the same per-analyzer fallbacks
+            result = await runPythonScript('analyze_all', [audioFilePath, transcription, ...analysisFlags()]);
+        } catch (error) {
+            console.error('[analyze_all] Failed, running analyzers separately:', error.message);
+            return await runSeparateAnalyses(audioFilePath, transcription);
+        }
 
         return {
-            fluency: fluencyResult,
-            pace: paceResult,
-            tone: toneResult,
-            confidence: confidenceResult,
-            overallScore
+            fluency: result.fluency,
+            pace: result.pace,
+            tone: result.tone,
+            confidence: result.confidence,
+            overallScore: result.overallScore,
+            metrics: result.metrics
         };
     } catch (error) {
         throw new Error(`Analysis failed: ${error.message}`);
     }
 };
 
-module.exports = { runPythonScript, runFullAnalysis };
+/**
+ * Queue transcription and full analysis of an upload for the job queue workers
+ * @param {string} jobId - Job id (the speech session id, so a session is queued once)
+ * @param {string} audioFilePath - Path to the uploaded audio file
+ * @returns {Promise<Object>} - { job } with the job status, or { job: null, retryAfter } when the queue is full
+ */
+const enqueueAnalysis = async (jobId, audioFilePath) => {
+    const args = [audioFilePath, ...analysisFlags()];
+    if (process.env.TRANSCRIPTION_SEGMENTED === 'true') {
+        args.push('--segmented');
+    }
+    // The worker decodes into PCM itself, so the request does not wait for it
+    if (process.env.ANALYSIS_PCM_INGEST === 'true') {
+        args.push('--pcm-ingest');
+    }
+    const job = JSON.stringify({ id: jobId, script: 'analyze_upload', args });
+    return await runPythonScript('job_queue', ['enqueue', job]);
+};
+
+/**
+ * Status of a queued analysis
+ * @param {string} jobId - Job id
+ * @returns {Promise<Object|null>} - Job status ({ id, status, ahead, attempts, result, error }), or null if unknown
+ */
+const getAnalysisJob = async (jobId) => {
+    const result = await runPythonScript('job_queue', ['status', jobId]);
+    return result.job;
+};
+
+/**
+ * Mark a queued analysis as collected once its results are saved, so the queue may forget it
+ * @param {string} jobId - Job id
+ * @returns {Promise<boolean>} - Whether the job was done and is now collected
+ */
+const collectAnalysisJob = async (jobId) => {
+    const result = await runPythonScript('job_queue', ['collect', jobId]);
+    return result.collected;
+};
+
+/**
+ * Decode an upload once into a canonical PCM file (when ANALYSIS_PCM_INGEST is enabled)
+ * @param {string} audioFilePath - Path to the uploaded audio file
+ * @returns {Promise<string>} - Path of the PCM file, or the original path if ingest is off or fails
+ */
+const ingestAudio = async (audioFilePath) => {
+    if (process.env.ANALYSIS_PCM_INGEST !== 'true') {
+        return audioFilePath;
+    }
+
+    try {
+        const args = [audioFilePath];
+        if (process.env.ANALYSIS_QUALITY) {
+            args.push(`--quality=${process.env.ANALYSIS_QUALITY}`);
+        }
+        const result = await runPythonScript('pcm_store', args);
+        if (result.success) {
+            return result.path;
+        }
+        console.error('[pcm_store] Ingest failed, using the original upload:', result.error);
+    } catch (error) {
+        console.error('[pcm_store] Ingest failed, using the original upload:', error.message);
+    }
+    return audioFilePath;
+};
+
+module.exports = { runPythonScript, runFullAnalysis, ingestAudio, enqueueAnalysis, getAnalysisJob, collectAnalysisJob };
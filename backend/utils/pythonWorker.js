@@ -0,0 +1,161 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+const workerPath = path.join(__dirname, '..', 'python', 'worker.py');
+
+// A job that has not answered by then is rejected and its worker restarted
+const jobTimeoutMs = Number(process.env.PYTHON_WORKER_JOB_TIMEOUT_SECONDS || 600) * 1000;
+
+// Time a stopping worker gets to finish its jobs before it is killed
+const STOP_GRACE_MS = 30000;
+
+let workerProcess = null;
+let nextJobId = 1;
+
+/**
+ * Reject every job still waiting on a worker that went away
+ * @param {ChildProcess} worker - The worker whose jobs are failed
+ * @param {Error} error - Reason passed to the pending promises
+ */
+const failPendingJobs = (worker, error) => {
+    for (const { reject } of worker.pendingJobs.values()) {
+        reject(error);
+    }
+    worker.pendingJobs.clear();
+};
+
+/**
+ * Kill a worker and its pool processes, which share its process group
+ * @param {ChildProcess} worker - The worker to kill
+ */
+const killWorker = (worker) => {
+    if (workerProcess === worker) {
+        workerProcess = null;
+    }
+    try {
+        process.kill(-worker.pid, 'SIGKILL');
+    } catch (error) {
+        // Already gone
+    }
+};
+
+/**
+ * Start the long-lived Python worker if it is not already running
+ * @returns {ChildProcess} - The worker process
+ */
+const getWorker = () => {
+    if (workerProcess) return workerProcess;
+
+    const args = [
+        workerPath,
+        '--workers', process.env.PYTHON_WORKER_PROCESSES || '1',
+        '--max-jobs', process.env.PYTHON_WORKER_MAX_JOBS || '50'
+    ];
+    // Own process group, so a stuck worker can be killed with its pool processes
+    const worker = spawn('python', args, { detached: true });
+    worker.pendingJobs = new Map();
+    workerProcess = worker;
+
+    // Results come back as JSON lines tagged with the job id
+    const lines = readline.createInterface({ input: worker.stdout });
+    lines.on('line', (line) => {
+        let response;
+        try {
+            response = JSON.parse(line);
+        } catch (error) {
+            console.error('[worker] Invalid JSON from worker:', line);
+            return;
+        }
+
+        const job = worker.pendingJobs.get(response.id);
+        if (!job) return;
+        worker.pendingJobs.delete(response.id);
+        job.resolve(response.result);
+    });
+
+    worker.stderr.on('data', (data) => {
+        console.log('[worker] STDERR:', data.toString());
+    });
+
+    worker.on('error', (error) => {
+        console.error('Failed to start Python worker:', error);
+        if (workerProcess === worker) {
+            workerProcess = null;
+        }
+        failPendingJobs(worker, new Error(`Failed to start Python worker: ${error.message}`));
+    });
+
+    worker.on('close', (code) => {
+        console.log(`[worker] Process exited with code ${code}`);
+        if (workerProcess === worker) {
+            workerProcess = null;
+        }
+        failPendingJobs(worker, new Error(`Python worker exited with code ${code}`));
+    });
+
+    return worker;
+};
+
+/**
+ * Run a Python script through the long-lived worker
+ * @param {string} scriptName - Name of the Python script (without .py extension)
+ * @param {Array} args - Arguments to pass to the script
+ * @returns {Promise<Object>} - Parsed JSON result from the worker
+ */
+const runWorkerJob = (scriptName, args = []) => {
+    return new Promise((resolve, reject) => {
+        const id = nextJobId++;
+        const worker = getWorker();
+
+        const timer = setTimeout(() => {
+            worker.pendingJobs.delete(id);
+            console.error(`[${scriptName}] Worker job timed out after ${jobTimeoutMs / 1000}s, restarting the worker`);
+            reject(new Error(`${scriptName}: timed out after ${jobTimeoutMs / 1000}s`));
+            killWorker(worker);
+        }, jobTimeoutMs);
+
+        worker.pendingJobs.set(id, {
+            resolve: (result) => {
+                clearTimeout(timer);
+                console.log(`[${scriptName}] Worker result:`, result);
+
+                // Check if the Python script returned an error
+                if (!result || result.success === false) {
+                    const message = result ? result.error : 'empty result';
+                    console.error(`[${scriptName}] Script returned error:`, message);
+                    return reject(new Error(`${scriptName}: ${message}`));
+                }
+
+                resolve(result);
+            },
+            reject: (error) => {
+                clearTimeout(timer);
+                reject(error);
+            }
+        });
+
+        worker.stdin.write(JSON.stringify({ id, script: scriptName, args }) + '\n');
+    });
+};
+
+/**
+ * Stop the worker (used on shutdown): it finishes its jobs, or is killed after a grace period
+ * @returns {Promise<void>} - Resolves once the worker has exited
+ */
+const stopWorker = () => {
+    const worker = workerProcess;
+    if (!worker) return Promise.resolve();
+    workerProcess = null;
+
+    return new Promise((resolve) => {
+        const timer = setTimeout(() => killWorker(worker), STOP_GRACE_MS);
+        worker.once('close', () => {
+            clearTimeout(timer);
+            resolve();
+        });
+        worker.stdin.end();
+    });
+};
+
+module.exports = { runWorkerJob, stopWorker };